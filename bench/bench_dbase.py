@@ -0,0 +1,346 @@
+"""Throughput benchmarks for the dBASE-style command interpreter.
+
+Generates a database of ``--rows`` (or ``--size small|medium|large``: 10k,
+1M, or 10M) rows and times the commands users run against it: INSERT,
+a batched RUN script, LIST with WHERE/ORDER BY/PAGE, FIND, UPDATE, REPLACE,
+every EXPORT format, and MODIF DROP. The results are printed as JSON::
+
+    python bench/bench_dbase.py --size small --output baseline.json
+    python bench/bench_dbase.py --size small --compare baseline.json
+    python bench/bench_dbase.py --compare baseline.json --input current.json
+
+Each benchmark reports rows per second, latency percentiles for per-command
+benchmarks, and the process's peak RSS after it ran. With ``--compare`` the
+run is checked against a saved result and the exit status is 1 when a
+benchmark lost more than ``--threshold`` of its throughput or its p95 latency
+grew by more than that fraction.
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.wrapp_dbase3 import Db3, __version__  # noqa: E402
+from lib.wrapp_terminal import Terminal  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SIZES = {"small": 10_000, "medium": 1_000_000, "large": 10_000_000}
+CATEGORIES = 50
+GENERATE_BATCH = 50_000
+PAGE_SIZE = 50
+# Commands timed one by one; full-scan FINDs are capped separately.
+DEFAULT_OPERATIONS = 2000
+SCAN_OPERATIONS = 20
+SCRIPT_BATCH = 5000
+EXPORT_FORMATS = ("csv", "json", "ndjson", "xml")
+
+
+def generate_database(path, rows, seed=1):
+    """Create ``items`` with ``rows`` deterministic rows and a category index."""
+
+    generator = random.Random(seed)
+    with contextlib.closing(sqlite3.connect(path)) as connection:
+        connection.execute(
+            "CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, category TEXT, "
+            "price REAL, qty INTEGER, note TEXT)"
+        )
+        for start in range(1, rows + 1, GENERATE_BATCH):
+            connection.executemany(
+                "INSERT INTO items (id, name, category, price, qty, note) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        row_id,
+                        f"item-{row_id}",
+                        f"c{row_id % CATEGORIES}",
+                        round(generator.uniform(1, 1000), 2),
+                        generator.randrange(100),
+                        "generated row",
+                    )
+                    for row_id in range(start, min(start + GENERATE_BATCH, rows + 1))
+                ),
+            )
+        connection.execute("CREATE INDEX by_category ON items (category, price)")
+        connection.commit()
+
+
+def peak_rss_kb():
+    """Return this process's peak resident set size in KiB, or ``None``."""
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def percentile(values, percent):
+    """Return the nearest-rank ``percent`` percentile of ``values``."""
+
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def _result(rows, seconds, latencies=None):
+    result = {
+        "rows": rows,
+        "seconds": round(seconds, 6),
+        "rows_per_second": round(rows / seconds, 1) if seconds else None,
+    }
+    if latencies:
+        result["latency_ms"] = {
+            name: round(value * 1000, 4)
+            for name, value in (
+                ("p50", percentile(latencies, 50)),
+                ("p95", percentile(latencies, 95)),
+                ("p99", percentile(latencies, 99)),
+                ("max", max(latencies)),
+            )
+        }
+    result["peak_rss_kb"] = peak_rss_kb()
+    return result
+
+
+def _run_commands(database, commands):
+    """Run commands one by one; return ``(rows, seconds, latencies)``."""
+
+    latencies = []
+    rows = 0
+    for command in commands:
+        started = time.perf_counter()
+        if command.startswith("LIST "):
+            rows += len(database.cmd_list(command[5:]))
+        else:
+            database.execute_dbase_command(command)
+            rows += 1
+        latencies.append(time.perf_counter() - started)
+    return rows, sum(latencies), latencies
+
+
+def _in_transaction(database, commands):
+    database.execute_dbase_command("BEGIN")
+    try:
+        return _run_commands(database, commands)
+    finally:
+        database.execute_dbase_command("COMMIT")
+
+
+def run_benchmarks(rows, operations=DEFAULT_OPERATIONS, directory=None, seed=1):
+    """Generate a database of ``rows`` rows, run every benchmark, return the report."""
+
+    operations = max(1, min(operations, rows))
+    generator = random.Random(seed)
+    with contextlib.ExitStack() as stack:
+        if directory is None:
+            directory = stack.enter_context(tempfile.TemporaryDirectory(prefix="pydb-bench-"))
+        db_file = os.path.join(directory, "bench.db")
+        if os.path.exists(db_file):
+            os.remove(db_file)
+        started = time.perf_counter()
+        generate_database(db_file, rows, seed)
+        benchmarks = {"generate": _result(rows, time.perf_counter() - started)}
+
+        sink = stack.enter_context(open(os.devnull, "w", encoding="utf-8"))
+        stack.enter_context(contextlib.redirect_stdout(sink))
+        database = Db3(
+            db_file,
+            export_dir=directory,
+            terminal=Terminal(colors=False),
+            output=sink,
+            confirm=lambda prompt: True,
+        )
+        stack.callback(database.close)
+        database.cmd_use("items")
+
+        def keys(count):
+            return [generator.randint(1, rows) for _ in range(count)]
+
+        benchmarks["insert"] = _result(
+            *_in_transaction(
+                database,
+                [
+                    f"INSERT (name, category, price, qty, note) "
+                    f"VALUES ('new-{number}', 'c{number % CATEGORIES}', 9.5, 1, 'inserted')"
+                    for number in range(operations)
+                ],
+            )
+        )
+
+        script = os.path.join(directory, "bench.dbs")
+        with open(script, "w", encoding="utf-8") as script_file:
+            script_file.write("USE items\n")
+            for number in range(operations):
+                script_file.write(
+                    f"INSERT (name, category, price, qty, note) "
+                    f"VALUES ('script-{number}', 'c1', 2.5, 2, 'script')\n"
+                )
+        started = time.perf_counter()
+        database.run_script(script, SCRIPT_BATCH)
+        benchmarks["run_script"] = _result(operations, time.perf_counter() - started)
+
+        pages = max(1, rows // CATEGORIES // PAGE_SIZE)
+        benchmarks["list_page"] = _result(
+            *_run_commands(
+                database,
+                [
+                    f"LIST name price WHERE category = 'c{generator.randrange(CATEGORIES)}' "
+                    f"ORDER BY price PAGE {generator.randint(1, pages)} SIZE {PAGE_SIZE}"
+                    for _ in range(min(operations, 200))
+                ],
+            )
+        )
+        benchmarks["list_scan"] = _result(
+            *_run_commands(database, ["LIST id name price WHERE qty < 50 ORDER BY price"] * 3)
+        )
+        benchmarks["find_key"] = _result(
+            *_run_commands(database, [f"FIND id = {key}" for key in keys(operations)])
+        )
+        benchmarks["find_scan"] = _result(
+            *_run_commands(
+                database,
+                [f"FIND name = 'item-{key}'" for key in keys(min(operations, SCAN_OPERATIONS))],
+            )
+        )
+        benchmarks["update"] = _result(
+            *_in_transaction(
+                database,
+                [f"UPDATE SET price = 12.5 WHERE id = {key}" for key in keys(operations)],
+            )
+        )
+        benchmarks["replace"] = _result(
+            *_in_transaction(
+                database, [f"REPLACE qty WITH 7 FOR id = {key}" for key in keys(operations)]
+            )
+        )
+
+        total = database.conn.execute("SELECT count(*) FROM items").fetchone()[0]
+        for file_format in EXPORT_FORMATS:
+            started = time.perf_counter()
+            database.export("items", f"bench.{file_format}", file_format, progress=False)
+            benchmarks[f"export_{file_format}"] = _result(total, time.perf_counter() - started)
+            os.remove(os.path.join(directory, f"bench.{file_format}"))
+
+        started = time.perf_counter()
+        database.modify_table("DROP", "note", progress=False)
+        benchmarks["modif_drop"] = _result(total, time.perf_counter() - started)
+
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "rows": rows,
+        "operations": operations,
+        "benchmarks": benchmarks,
+    }
+
+
+def compare_results(baseline, current, threshold=0.1):
+    """Return ``(lines, regressions)`` comparing two reports benchmark by benchmark.
+
+    A benchmark regresses when its rows per second dropped, or its p95 latency
+    rose, by more than ``threshold`` (a fraction) relative to ``baseline``.
+    """
+
+    lines = [f"{'Benchmark':<14}{'Baseline rows/s':>18}{'Current rows/s':>18}{'Change':>10}"]
+    regressions = []
+    if baseline.get("rows") != current.get("rows"):
+        lines.append(
+            f"WARNING: baseline has {baseline.get('rows')} rows, "
+            f"this run {current.get('rows')}."
+        )
+    for name, result in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if before is None or not before.get("rows_per_second") or not result["rows_per_second"]:
+            continue
+        change = result["rows_per_second"] / before["rows_per_second"] - 1
+        line = (
+            f"{name:<14}{before['rows_per_second']:>18,.1f}"
+            f"{result['rows_per_second']:>18,.1f}{change:>+10.1%}"
+        )
+        reasons = []
+        if change < -threshold:
+            reasons.append("throughput")
+        if "latency_ms" in result and "latency_ms" in before:
+            p95, p95_before = result["latency_ms"]["p95"], before["latency_ms"]["p95"]
+            if p95_before and p95 / p95_before - 1 > threshold:
+                reasons.append(f"p95 {p95_before:.3f} -> {p95:.3f} ms")
+        if reasons:
+            regressions.append(name)
+            line += "  REGRESSION: " + ", ".join(reasons)
+        lines.append(line)
+    return lines, regressions
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--size", choices=SIZES, default="small", help="preset table size")
+    size.add_argument("--rows", type=int, help="explicit number of generated rows")
+    parser.add_argument(
+        "--operations",
+        type=int,
+        default=DEFAULT_OPERATIONS,
+        help=f"commands per per-command benchmark (default: {DEFAULT_OPERATIONS})",
+    )
+    parser.add_argument("--directory", help="work directory to keep (default: a temporary one)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against a report")
+    parser.add_argument(
+        "--input", metavar="REPORT", help="with --compare, compare this report instead of running"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="allowed slowdown as a fraction before --compare fails (default: 0.1)",
+    )
+    arguments = parser.parse_args(argv)
+    if arguments.rows is not None and arguments.rows < 1:
+        parser.error("--rows must be a positive integer")
+    if arguments.operations < 1:
+        parser.error("--operations must be a positive integer")
+    if arguments.input and not arguments.compare:
+        parser.error("--input requires --compare")
+    return arguments
+
+
+def main(argv=None):
+    arguments = parse_arguments(argv)
+    if arguments.input:
+        with open(arguments.input, encoding="utf-8") as report_file:
+            report = json.load(report_file)
+    else:
+        report = run_benchmarks(
+            arguments.rows or SIZES[arguments.size], arguments.operations, arguments.directory
+        )
+        text = json.dumps(report, indent=2)
+        if arguments.output:
+            with open(arguments.output, "w", encoding="utf-8") as report_file:
+                report_file.write(text + "\n")
+        else:
+            print(text)
+    if not arguments.compare:
+        return 0
+    with open(arguments.compare, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    lines, regressions = compare_results(baseline, report, arguments.threshold)
+    print("\n".join(lines), file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,32 @@
 """dBASE III-style command wrapper around a SQLite database."""
 
+import base64
+import contextlib
+import concurrent.futures
+import copy
+import cProfile
 import csv
+import functools
+import itertools
 import json
+import logging
+import logging.handlers
 import math
+import multiprocessing
 import os
+import pathlib
+import pstats
+import queue
 import re
 import sqlite3
+import sys
+import threading
+import time
 import xml.etree.ElementTree as ET
+from collections import Counter, OrderedDict, namedtuple
+from xml.sax.saxutils import escape
 
-from .wrapp_terminal import Terminal
+from .wrapp_terminal import StatusLine, Terminal, ansi_enabled, progress_bar
 
 __version__ = "0.5.0"
 
@@ -32,8 +50,28 @@ COMMANDS = {
     "STRU": "STRUCT",
     "MODI": "MODIF",
     "EXPO": "EXPORT",
+    "IMPO": "IMPORT",
+    "BEGI": "BEGIN",
+    "COMM": "COMMIT",
+    "ROLL": "ROLLBACK",
+    "INDE": "INDEX",
+    "REIN": "REINDEX",
+    "SET": "SET",
+    "ADVI": "ADVISE",
+    "SAVE": "SAVE",
+    "PROF": "PROFILE",
+    "STAT": "STATS",
+    "COUN": "COUNT",
+    "SUM": "SUM",
+    "AVER": "AVERAGE",
+    "TOTA": "TOTAL",
 }
 
+# Commands that only read; with a reader pool they run without waiting for writes.
+READ_ONLY_COMMANDS = frozenset(
+    {"LIST", "SELECT", "FIND", "COUNT", "SUM", "AVERAGE", "SHOW", "STRUCT", "USE", "HELP"}
+)
+
 HELP_LINES = (
     ("CREATE", " <table_name>    - Creates a table with default columns."),
     ("INSERT", " (columns) VALUES (values) - Inserts a row into the active table."),
@@ -42,18 +80,42 @@ HELP_LINES = (
     ("DROP", " <table_name>      - Removes a table after confirmation."),
     ("LIST", " [cols] [WHERE <condition>] [ORDER BY <col> [ASC|DESC]]"),
     ("", " [LIMIT <count> [OFFSET <count>] | PAGE <number> SIZE <count>]"),
+    ("LIST", " NEXT | PREV       - Shows the page after or before the last LIST page."),
     ("FIND", " <condition>      - Finds and displays the first matching record."),
     ("LOCATE", " FOR <condition>  - Alias for FIND using dBASE-style syntax."),
+    ("COUNT", " [FOR <condition>] - Counts active-table records."),
+    ("SUM", " [<cols>] [FOR <condition>] - Totals numeric columns."),
+    ("AVERAGE", " [<cols>] [FOR <condition>] - Averages numeric columns."),
+    ("TOTAL", " ON <key> TO <table> [FIELDS <cols>] [FOR <condition>] - Totals by key."),
     ("UPDATE", " SET <col>=<value> WHERE <condition> - Updates matching records."),
     ("REPLACE", " <col> WITH <value> FOR <condition> - dBASE-style update."),
     ("USE", " <table>            - Selects the active table."),
+    ("INDEX", " ON <cols> TAG <name> [UNIQUE] - Creates an index on the active table."),
+    ("REINDEX", " [<tag>]         - Rebuilds the active table's indexes."),
+    ("DELETE", " TAG <name>       - Removes an index."),
+    ("SET", " ORDER TO [<tag>]   - Orders LIST and FIND by an index, or clears it."),
+    ("SET", " PROFILE <name>     - Applies the safe, fast, or bulkload PRAGMA preset."),
+    ("SET", " PRAGMA [<n> TO <v>] - Shows connection PRAGMAs or changes one."),
+    ("SET", " TIMING ON|OFF      - Reports parse/execute/fetch/render time per command."),
     ("SHOW", "                   - Lists tables in the current database."),
-    ("STRUCT", "                 - Displays the active table structure."),
+    ("STRUCT", "                 - Displays the active table structure and indexes."),
     ("MODIF", " ADD <col> <type> - Adds a column to the active table."),
     ("MODIF", " DROP <col>       - Removes a column from the active table."),
+    ("MODIF", " RENAME <col> TO <name> / ALTER <col> TYPE <type> - Changes a column."),
+    ("MODIF", " BEGIN ... APPLY  - Applies several MODIF changes with one table rewrite."),
     ("SQL", ' "<query>"          - Executes a raw SQL query.'),
-    ("RUN", " <file>.dbs         - Executes commands from a script."),
+    ("EXPORT", " <file>.csv|json|ndjson|xml - Exports the active table."),
+    ("EXPORT", " ALL TO <dir> [FORMAT <f>] [WORKERS <n>] - Exports every table in parallel."),
+    ("IMPORT", " <file>.csv|json|ndjson [FAST] - Bulk-loads rows into the active table."),
+    ("RUN", " <file>.dbs [BATCH <n>] - Executes a script, committing every n commands."),
+    ("BEGIN", "                  - Starts an explicit transaction."),
+    ("COMMIT", "                 - Commits the explicit transaction."),
+    ("ROLLBACK", "               - Discards the explicit transaction."),
+    ("ADVISE", " [APPLY|RESET]    - Suggests indexes for slow FIND/LIST/UPDATE/DELETE filters."),
+    ("PROFILE", " <command>      - Runs a command under cProfile and shows hot spots."),
+    ("STATS", " [RESET]           - Shows session counters: commands, rows, time in SQLite."),
     ("HELP", "                   - Displays this help message."),
+    ("SAVE", "                   - Writes an in-memory (--memory) database to its file."),
     ("EXIT", "                   - Exits the emulator."),
 )
 
@@ -138,10 +200,11 @@ def _foreign_key_sql(value):
 
 
 def _split_sql_items(text):
-    """Split comma-separated SQL fragments without splitting quoted values."""
+    """Split comma-separated SQL fragments outside quotes and parentheses."""
 
     items, current = [], []
     quote = None
+    depth = 0
     index = 0
     while index < len(text):
         character = text[index]
@@ -156,18 +219,26 @@ def _split_sql_items(text):
         elif character in ("'", '"'):
             quote = character
             current.append(character)
-        elif character == ",":
+        elif character == "," and not depth:
             item = "".join(current).strip()
             if not item:
                 raise ValueError("Empty value in a comma-separated list.")
             items.append(item)
             current = []
         else:
+            if character == "(":
+                depth += 1
+            elif character == ")":
+                depth -= 1
+                if depth < 0:
+                    raise ValueError("Unbalanced parentheses.")
             current.append(character)
         index += 1
 
     if quote:
         raise ValueError("Unterminated quoted value.")
+    if depth:
+        raise ValueError("Unbalanced parentheses.")
     item = "".join(current).strip()
     if not item:
         raise ValueError("Empty value in a comma-separated list.")
@@ -208,6 +279,88 @@ def _split_keyword(text, keyword):
     return None, None
 
 
+_NOT_LITERAL = object()
+_NUMBER_PATTERN = re.compile(r"[+-]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?")
+_COMPARISON_PATTERN = re.compile(
+    r"\s*([A-Za-z_][A-Za-z0-9_]*)\s*(==|=|!=|<>|<=|>=|<|>|LIKE\b)\s*(.+?)\s*", re.I | re.S
+)
+
+
+def _literal_value(text, double_quoted=False):
+    """Return the value of a simple SQL string/number/NULL literal, or ``_NOT_LITERAL``.
+
+    Double-quoted text is accepted as a string only where SQLite cannot read
+    it as a column name, such as inside INSERT's VALUES list.
+    """
+
+    text = text.strip()
+    quotes = ("'", '"') if double_quoted else ("'",)
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in quotes:
+        quote = text[0]
+        body = text[1:-1]
+        if quote in body.replace(quote * 2, ""):
+            return _NOT_LITERAL
+        return body.replace(quote * 2, quote)
+    if text.upper() == "NULL":
+        return None
+    if _NUMBER_PATTERN.fullmatch(text):
+        if re.fullmatch(r"[+-]?\d+", text):
+            value = int(text)
+            return value if -(2**63) <= value < 2**63 else _NOT_LITERAL
+        return float(text)
+    return _NOT_LITERAL
+
+
+def _parameterize_values(items, double_quoted=False):
+    """Replace literal SQL items with ``?`` and return ``(sql_items, params)``."""
+
+    sql_items, params = [], []
+    for item in items:
+        value = _literal_value(item, double_quoted)
+        if value is _NOT_LITERAL:
+            sql_items.append(item)
+        else:
+            sql_items.append("?")
+            params.append(value)
+    return sql_items, tuple(params)
+
+
+def _split_comparisons(condition):
+    """Return ``(column, operator, operand)`` for AND-joined comparisons, or ``None``."""
+
+    comparisons = []
+    rest = condition
+    while rest is not None:
+        part, after = _split_keyword(rest, "AND")
+        part, rest = (rest, None) if part is None else (part, after)
+        match = _COMPARISON_PATTERN.fullmatch(part)
+        if match is None:
+            return None
+        column, operator, operand = match.groups()
+        comparisons.append((column, operator.upper(), operand))
+    return comparisons
+
+
+def _parameterize_condition(condition):
+    """Bind the literals of simple AND-joined comparisons; return ``(sql, params)``.
+
+    Conditions such as ``name='Mouse' AND price < 20`` become
+    ``name = ? AND price < ?``; anything more complex is returned unchanged.
+    """
+
+    comparisons = _split_comparisons(condition)
+    if comparisons is None:
+        return condition, ()
+    sql_parts, params = [], []
+    for column, operator, operand in comparisons:
+        value = _literal_value(operand)
+        if value is _NOT_LITERAL or value is None:
+            return condition, ()
+        sql_parts.append(f"{column} {operator} ?")
+        params.append(value)
+    return " AND ".join(sql_parts), tuple(params)
+
+
 def _list_clause_matches(text):
     """Locate LIST clauses while ignoring clause-looking quoted SQL values."""
 
@@ -239,320 +392,2332 @@ def _list_clause_matches(text):
     return matches
 
 
-class Db3:
-    """Interactive dBASE-style command interpreter backed by SQLite."""
+def _seek_conditions(column, descending, key):
+    """Return ``(sql, params)`` filters selecting the rows after ``key`` in keyset order.
 
-    COMMANDS = COMMANDS
+    Rows are ordered by ``column`` (SQLite sorts NULL first) and then by rowid,
+    both ascending or both descending; ``key`` holds the last row's column value
+    and rowid, or only the rowid when ``column`` is ``None``. Rows after a key
+    may span the NULL and non-NULL ranges; each range gets its own filter, to be
+    queried in order, because an OR would stop SQLite from seeking in an index.
+    """
 
-    def __init__(self, db_file="main.sql", export_dir="export", debug=False, terminal=None):
-        self.db_file = db_file
-        self.export_dir = export_dir
-        self.debug_mode = debug
-        self.term = terminal or Terminal()
-        self.conn = sqlite3.connect(self.db_file)
-        self.conn.execute("PRAGMA foreign_keys = ON")
-        self.cursor = self.conn.cursor()
-        self.active_table = None
-        os.makedirs(self.export_dir, exist_ok=True)
+    operator = "<" if descending else ">"
+    if column is None:
+        return [(f"rowid {operator} ?", (key[-1],))]
+    column = _quote_identifier(column)
+    value, rowid = key
+    if value is None:
+        nulls = (f"{column} IS NULL AND rowid {operator} ?", (rowid,))
+        return [nulls] if descending else [nulls, (f"{column} IS NOT NULL", ())]
+    values = (f"({column}, rowid) {operator} (?, ?)", (value, rowid))
+    return [values, (f"{column} IS NULL", ())] if descending else [values]
 
-    def close(self):
-        self.conn.close()
 
-    def debug(self, mode):
-        self.debug_mode = bool(mode)
-        print("Debug mode enabled." if self.debug_mode else "Debug mode disabled.")
+def _encode_page_token(state):
+    return base64.urlsafe_b64encode(
+        json.dumps(state, separators=(",", ":")).encode("utf-8")
+    ).decode("ascii")
 
-    def _debug(self, query):
-        if self.debug_mode:
-            print(f"DEBUG: Executing SQL -> {query}")
 
-    def execute(self, query, params=(), suppress_debug=False):
-        """Execute SQL for callers using the wrapper as a small library."""
+def _decode_page_token(token):
+    """Return the page state in a ``ListPage`` token; raise ``ValueError`` if invalid."""
 
-        if not suppress_debug:
-            self._debug(query)
-        try:
-            self.cursor.execute(query, params)
-            self.conn.commit()
-            return self.cursor.fetchall()
-        except sqlite3.Error as error:
-            print(f"SQL Error: {error}")
-            return None
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except (AttributeError, UnicodeError, ValueError):
+        state = None
+    if (
+        not isinstance(state, dict)
+        or not isinstance(state.get("table"), str)
+        or not isinstance(state.get("arguments"), str)
+        or not isinstance(state.get("size"), int)
+        or not isinstance(state.get("page"), int)
+        or state.get("move") not in ("next", "prev")
+        or not all(_valid_page_key(state.get(name)) for name in ("first", "last"))
+    ):
+        raise ValueError("Invalid page token.")
+    return state
 
-    def table_exists(self, table_name):
-        self.cursor.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
-            (table_name,),
-        )
-        return self.cursor.fetchone() is not None
 
-    def create(self, table_name, column_definitions=None):
-        if not table_name:
-            print("Table name is missing.")
-            return False
-        columns = column_definitions or "(id INTEGER PRIMARY KEY, data TEXT)"
-        query = f"CREATE TABLE {_quote_identifier(table_name)} {columns}"
-        if self.execute(query) is None:
-            return False
-        self.active_table = table_name
-        print(f"Table '{table_name}' created and set as active.")
+def _valid_page_key(key, length=None):
+    """Return whether ``key`` is ``None`` or scalar keyset values ending in a rowid."""
+
+    if key is None:
         return True
+    return (
+        isinstance(key, list)
+        and len(key) in ((1, 2) if length is None else (length,))
+        and type(key[-1]) is int
+        and all(value is None or isinstance(value, (int, float, str)) for value in key)
+    )
 
-    def create_table_from_fields(self, table_name, fields):
-        """Create a legacy JSON-defined table with TEXT fields and a uid key."""
 
-        return self.create_table_from_columns(
-            table_name, [{"field": field} for field in fields]
-        )
+def _page_key(values):
+    """Return a row's keyset values as a JSON-safe list, or ``None`` (e.g. for BLOBs)."""
 
-    def create_table_from_columns(self, table_name, columns):
-        """Create a table from validated JSON column definitions."""
+    values = list(values)
+    if all(value is None or isinstance(value, (int, float, str)) for value in values):
+        return values
+    return None
 
-        if not _valid_identifier(table_name):
-            raise ValueError(f"Invalid table name '{table_name}'.")
-        if not isinstance(columns, list) or not columns:
-            raise ValueError("JSON definition must contain a non-empty 'columns' list.")
 
-        fields = []
-        definitions = []
-        for column in columns:
-            if not isinstance(column, dict):
-                raise ValueError("Each item in 'columns' must be an object.")
-            field = column.get("field")
-            if not _valid_identifier(field):
-                raise ValueError("JSON fields must be valid non-empty identifiers.")
-            fields.append(field)
+@functools.lru_cache(maxsize=1024)
+def _split_command(command):
+    """Return the original command word, its lookup key, and the arguments."""
 
-            for property_name in ("not_null", "unique"):
-                if property_name in column and not isinstance(column[property_name], bool):
-                    raise ValueError(f"Column '{property_name}' must be true or false.")
-            if "description" in column and not isinstance(column["description"], str):
-                raise ValueError("Column 'description' must be a string.")
+    words = command.split(" ", 1)
+    command_word = words[0].upper()
+    args = words[1].strip() if len(words) > 1 else ""
+    command_key = command_word[:4] if len(command_word) >= 4 else command_word[:3]
+    return words[0], command_key, args
 
-            if field == "uid":
-                if "type" in column and _column_type(column["type"]) != "INTEGER":
-                    raise ValueError("The special 'uid' field must use type INTEGER.")
-                definition = f"{_quote_identifier(field)} INTEGER PRIMARY KEY"
-            else:
-                field_type = _column_type(column.get("type", "TEXT"))
-                definition = f"{_quote_identifier(field)} {field_type}"
 
-            if column.get("not_null", False):
-                definition += " NOT NULL"
-            if "default" in column:
-                definition += f" DEFAULT {_default_sql(column['default'])}"
-            if column.get("unique", False):
-                definition += " UNIQUE"
-            if "foreign_key" in column:
-                definition += " " + _foreign_key_sql(column["foreign_key"])
-            definitions.append(definition)
+def _fetch_chunks(cursor, size):
+    """Yield non-empty lists of rows fetched from ``cursor`` with ``fetchmany``."""
 
-        if len(set(fields)) != len(fields):
-            raise ValueError("JSON fields must not contain duplicates.")
-        query = (
-            f"CREATE TABLE IF NOT EXISTS {_quote_identifier(table_name)} "
-            f"({', '.join(definitions)})"
-        )
-        self._debug(query)
-        self.cursor.execute(query)
-        self.conn.commit()
-        print(f"Table '{table_name}' created from JSON definition.")
-        return True
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield rows
 
-    def execute_sql_script(self, script):
-        """Execute a trusted SQL schema script used with the --create option."""
 
-        if not isinstance(script, str) or not script.strip():
-            raise ValueError("SQL definition file must not be empty.")
-        self._debug(script)
-        self.conn.executescript(script)
-        print("SQL definition script executed.")
-        return True
+EXPORT_FORMATS = {
+    ".csv": "csv",
+    ".json": "json",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".xml": "xml",
+}
 
-    def cmd_show(self, output_format="text"):
-        self.cursor.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' ORDER BY name"
-        )
-        tables = self.cursor.fetchall()
-        table_names = [table_name for (table_name,) in tables]
-        if output_format == "json":
-            print(
-                json.dumps(
-                    {"database": os.path.basename(self.db_file), "tables": table_names},
-                    ensure_ascii=False,
-                )
-            )
-            return table_names
-        if not tables:
-            print("No tables found.")
-            return table_names
-        self.term.y("Tables in database:")
-        for (table_name,) in tables:
-            marker = " (ACTIVE)" if table_name == self.active_table else ""
-            print(f"- {table_name}{marker}")
-        return table_names
 
-    def cmd_use(self, table_name):
-        if not table_name:
-            print("Table name is missing.")
-            return False
-        if not self.table_exists(table_name):
-            print(f"Table '{table_name}' does not exist.")
-            return False
-        self.active_table = table_name
-        print(f"Using table '{table_name}'. (Active Table Set)")
-        return True
+def _write_csv(export_file, table_name, column_names, chunks):
+    writer = csv.writer(export_file)
+    writer.writerow(column_names)
+    for rows in chunks:
+        writer.writerows(rows)
 
-    def _active_table_columns(self):
-        self.cursor.execute(f"PRAGMA table_info({_quote_identifier(self.active_table)})")
-        return [column[1] for column in self.cursor.fetchall()]
 
-    def _parse_list_arguments(self, arguments):
-        """Parse LIST's lightweight WHERE/ORDER/LIMIT and paging clauses."""
+def _write_json(export_file, table_name, column_names, chunks):
+    """Write one indented JSON array without building it in memory."""
 
-        if isinstance(arguments, (list, tuple)):
-            arguments = " ".join(arguments)
-        arguments = (arguments or "").strip()
-        matches = _list_clause_matches(arguments)
-        clauses = {}
-        columns_part = arguments[: matches[0][0]].strip() if matches else arguments
-        for position, match in enumerate(matches):
-            clause = re.sub(r"\s+", " ", match[2].upper())
-            value_end = matches[position + 1][0] if position + 1 < len(matches) else len(arguments)
-            value = arguments[match[1] : value_end].strip()
-            if clause in clauses:
-                raise ValueError(f"LIST clause '{clause}' may be used only once.")
-            if not value:
-                raise ValueError(f"LIST clause '{clause}' requires a value.")
-            clauses[clause] = value
+    separator = "[\n    "
+    for rows in chunks:
+        parts = []
+        for row in rows:
+            item = json.dumps(dict(zip(column_names, row)), indent=4, ensure_ascii=False)
+            parts.append(separator + item.replace("\n", "\n    "))
+            separator = ",\n    "
+        export_file.write("".join(parts))
+    export_file.write("\n]" if separator != "[\n    " else "[]")
 
-        allowed_clause_order = ["WHERE", "ORDER BY", "LIMIT", "OFFSET", "PAGE", "SIZE"]
-        encountered = [re.sub(r"\s+", " ", match[2].upper()) for match in matches]
-        if encountered != sorted(encountered, key=allowed_clause_order.index):
-            raise ValueError("LIST clauses must be ordered as WHERE, ORDER BY, LIMIT/OFFSET, PAGE/SIZE.")
 
-        columns = columns_part.replace(",", " ").split() if columns_part else []
-        parsed = {"columns": columns, "where": clauses.get("WHERE"), "order_by": None,
-                  "limit": None, "offset": 0}
-        if "ORDER BY" in clauses:
-            parts = clauses["ORDER BY"].split()
-            if len(parts) not in (1, 2) or (len(parts) == 2 and parts[1].upper() not in {"ASC", "DESC"}):
-                raise ValueError("Use: ORDER BY <column> [ASC|DESC]")
-            parsed["order_by"] = (parts[0], parts[1].upper() if len(parts) == 2 else "ASC")
+def _write_ndjson(export_file, table_name, column_names, chunks):
+    for rows in chunks:
+        export_file.write(
+            "".join(
+                json.dumps(dict(zip(column_names, row)), ensure_ascii=False) + "\n"
+                for row in rows
+            )
+        )
 
-        def positive_integer(value, label, allow_zero=False):
-            if not re.fullmatch(r"\d+", value) or (not allow_zero and int(value) == 0):
-                comparison = "a non-negative" if allow_zero else "a positive"
-                raise ValueError(f"{label} must be {comparison} integer.")
-            return int(value)
 
-        if "LIMIT" in clauses:
-            parsed["limit"] = positive_integer(clauses["LIMIT"], "LIMIT")
-        if "OFFSET" in clauses:
-            if parsed["limit"] is None:
-                raise ValueError("OFFSET requires LIMIT.")
-            parsed["offset"] = positive_integer(clauses["OFFSET"], "OFFSET", allow_zero=True)
-        has_page = "PAGE" in clauses or "SIZE" in clauses
-        if has_page:
-            if "PAGE" not in clauses or "SIZE" not in clauses:
-                raise ValueError("Paging requires both PAGE <number> and SIZE <count>.")
-            if parsed["limit"] is not None:
-                raise ValueError("Use either LIMIT/OFFSET or PAGE/SIZE, not both.")
-            page = positive_integer(clauses["PAGE"], "PAGE")
-            size = positive_integer(clauses["SIZE"], "SIZE")
-            parsed["limit"] = size
-            parsed["offset"] = (page - 1) * size
-        return parsed
+def _write_xml(export_file, table_name, column_names, chunks):
+    """Write the XML document one ``<row>`` element at a time."""
 
-    def _display_rows(self, column_names, rows):
-        self.term.y(" | ".join(column_names))
-        print("-" * (len(column_names) * 10))
+    name = escape(table_name, {'"': "&quot;"})
+    export_file.write('<?xml version="1.0" encoding="utf-8"?>\n')
+    export_file.write(f'<table name="{name}">')
+    for rows in chunks:
+        parts = []
         for row in rows:
-            print(" | ".join("" if value is None else str(value) for value in row))
+            row_element = ET.Element("row")
+            for column_name, value in zip(column_names, row):
+                column_element = ET.SubElement(row_element, column_name)
+                column_element.text = "" if value is None else str(value)
+            parts.append(ET.tostring(row_element, encoding="unicode") + "\n")
+        export_file.write("".join(parts))
+    export_file.write("</table>")
+
+
+_EXPORT_WRITERS = {
+    "csv": _write_csv,
+    "json": _write_json,
+    "ndjson": _write_ndjson,
+    "xml": _write_xml,
+}
 
-    def cmd_list(self, arguments=""):
-        if self.active_table is None:
-            print("No table selected. Use 'USE <table>' first.")
-            return []
 
+def export_table(connection, table_name, file_path, file_format, batch_size=500, progress=None):
+    """Stream one table to ``file_path`` and return the number of exported rows.
+
+    At most ``batch_size`` rows are held in memory. ``progress`` is an optional
+    callable receiving ``(exported_rows, total_rows)`` after every batch. Nothing
+    is written for an empty table; a failed export leaves no partial file behind.
+    """
+
+    writer = _EXPORT_WRITERS.get(file_format)
+    if writer is None:
+        raise ValueError(
+            f"Unsupported file format '{file_format}'. Use csv, json, ndjson, or xml."
+        )
+    cursor = connection.cursor()
+    try:
+        total = None
+        if progress is not None:
+            cursor.execute(f"SELECT COUNT(*) FROM {_quote_identifier(table_name)}")
+            total = cursor.fetchone()[0]
+        cursor.execute(f"SELECT * FROM {_quote_identifier(table_name)}")
+        column_names = [description[0] for description in cursor.description]
+        first_rows = cursor.fetchmany(batch_size)
+        if not first_rows:
+            return 0
+
+        exported = 0
+
+        def chunks():
+            nonlocal exported
+            rows = first_rows
+            while rows:
+                yield rows
+                exported += len(rows)
+                if progress is not None:
+                    progress(exported, max(total, exported))
+                rows = cursor.fetchmany(batch_size)
+
+        temporary_path = file_path + ".part"
+        newline = "" if file_format == "csv" else None
         try:
-            options = self._parse_list_arguments(arguments)
-            requested_columns = options["columns"]
-            available_columns = self._active_table_columns()
-            missing_columns = [
-                column for column in requested_columns if column not in available_columns
-            ]
-            if missing_columns:
-                print(
-                    f"WARNING: Column(s) not found in '{self.active_table}': "
-                    + ", ".join(missing_columns)
-                )
-                return []
-            if options["order_by"] and options["order_by"][0] not in available_columns:
-                print(
-                    f"WARNING: Column '{options['order_by'][0]}' not found in "
-                    f"'{self.active_table}'."
-                )
-                return []
-
-            column_names = requested_columns or available_columns
-            select_columns = ", ".join(_quote_identifier(column) for column in column_names)
-            query = f"SELECT {select_columns} FROM {_quote_identifier(self.active_table)}"
-            if options["where"]:
-                query += f" WHERE {options['where']}"
-            if options["order_by"]:
-                column, direction = options["order_by"]
-                query += f" ORDER BY {_quote_identifier(column)} {direction}"
-            if options["limit"] is not None:
-                query += f" LIMIT {options['limit']} OFFSET {options['offset']}"
-            self._debug(query)
-            self.cursor.execute(query)
-            rows = self.cursor.fetchall()
-            if not rows:
-                print(f"No records found in '{self.active_table}'.")
-                return []
+            with open(temporary_path, "w", newline=newline, encoding="utf-8") as export_file:
+                writer(export_file, table_name, column_names, chunks())
+            os.replace(temporary_path, file_path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+        return exported
+    finally:
+        cursor.close()
 
-            self._display_rows(column_names, rows)
-            return rows
-        except (ValueError, sqlite3.Error) as error:
-            print(f"SQL Error: {error}")
-            return []
 
-    def cmd_find(self, condition):
-        """Display the first active-table record matching a SQL condition."""
+def _export_worker(db_file, table_name, file_path, file_format, batch_size, updates=None):
+    """Export one table through a private read-only connection in a worker process.
 
-        if self.active_table is None:
-            print("No table selected. Use 'USE <table>' first.")
-            return None
-        condition = (condition or "").strip()
-        if condition.upper().startswith("FOR "):
-            condition = condition[4:].strip()
-        if condition.upper().startswith("WHERE "):
-            condition = condition[6:].strip()
-        if not condition:
-            print("Missing condition. Use: FIND <condition> or LOCATE FOR <condition>")
+    ``updates`` is an optional queue receiving ``(table_name, new_rows)`` roughly
+    every 5% of the table so the parent can show aggregate progress.
+    """
+
+    progress = None
+    if updates is not None:
+        reported = 0
+
+        def progress(current, total):
+            nonlocal reported
+            if current == total or current - reported >= max(total // 20, 1):
+                updates.put((table_name, current - reported))
+                reported = current
+
+    uri = pathlib.Path(os.path.abspath(db_file)).as_uri() + "?mode=ro"
+    with contextlib.closing(sqlite3.connect(uri, uri=True)) as connection:
+        return export_table(connection, table_name, file_path, file_format, batch_size, progress)
+
+
+IMPORT_FORMATS = {
+    ".csv": "csv",
+    ".json": "json",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+}
+IMPORT_BATCH_SIZE = 10000
+
+
+def _column_affinity(declared_type):
+    """Return the SQLite type affinity for a declared column type."""
+
+    declared_type = (declared_type or "").upper()
+    if "INT" in declared_type:
+        return "INTEGER"
+    if any(name in declared_type for name in ("CHAR", "CLOB", "TEXT")):
+        return "TEXT"
+    if not declared_type or "BLOB" in declared_type:
+        return "BLOB"
+    if any(name in declared_type for name in ("REAL", "FLOA", "DOUB")):
+        return "REAL"
+    return "NUMERIC"
+
+
+def _text_converter(column_name, affinity):
+    """Return a function converting one CSV text cell for a column affinity."""
+
+    if affinity == "TEXT":
+        return lambda value: value
+    if affinity == "NUMERIC":
+        # SQLite converts numeric text itself and keeps other text, such as
+        # DATE or DECIMAL values, as it is.
+        return lambda value: None if value == "" else value
+
+    def convert(value):
+        if value == "":
             return None
+        if affinity != "REAL":
+            try:
+                return int(value)
+            except ValueError:
+                pass
         try:
-            columns = self._active_table_columns()
-            query = (
-                f"SELECT {', '.join(_quote_identifier(column) for column in columns)} "
-                f"FROM {_quote_identifier(self.active_table)} WHERE {condition} LIMIT 1"
-            )
-            self._debug(query)
-            self.cursor.execute(query)
-            row = self.cursor.fetchone()
-            if row is None:
-                print(f"No matching record found in '{self.active_table}'.")
-                return None
-            self._display_rows(columns, [row])
+            return float(value)
+        except ValueError:
+            if affinity == "BLOB":
+                return value
+            raise ValueError(
+                f"Value '{value}' is not valid for {affinity} column '{column_name}'."
+            ) from None
+
+    return convert
+
+
+def _json_value(column_name, value):
+    """Validate one JSON import value as an SQLite-compatible scalar."""
+
+    if isinstance(value, bool):
+        return int(value)
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    raise ValueError(f"Field '{column_name}' must be a JSON string, number, boolean, or null.")
+
+
+def _iter_json_array(import_file, chunk_size=1 << 16):
+    """Yield the items of a JSON array file without loading the whole document."""
+
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+    state = "start"
+    while True:
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
+        if position >= len(buffer):
+            if eof:
+                raise ValueError("Unexpected end of the JSON import file.")
+            chunk = import_file.read(chunk_size)
+            buffer, position, eof = buffer[position:] + chunk, 0, not chunk
+            continue
+
+        character = buffer[position]
+        if state == "start":
+            if character != "[":
+                raise ValueError("A JSON import file must contain an array of objects.")
+            position += 1
+            state = "first"
+        elif state == "separator":
+            if character == "]":
+                return
+            if character != ",":
+                raise ValueError("Expected ',' or ']' between JSON array items.")
+            position += 1
+            state = "item"
+        elif character == "]" and state == "first":
+            return
+        else:
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as error:
+                if eof:
+                    raise ValueError(f"Invalid JSON import file: {error}") from None
+                chunk = import_file.read(chunk_size)
+                buffer, position, eof = buffer[position:] + chunk, 0, not chunk
+                continue
+            state = "separator"
+            yield item
+
+
+def _iter_ndjson(import_file):
+    for line_number, line in enumerate(import_file, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as error:
+            raise ValueError(f"Invalid JSON on line {line_number}: {error}") from None
+
+
+OUTPUT_FORMATS = ("text", "json", "ndjson", "csv")
+
+# Connection PRAGMAs a profile may set, in the order they are applied:
+# page_size must precede journal_mode because WAL fixes the page size.
+PRAGMA_SETTINGS = {
+    "page_size": int,
+    "journal_mode": ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"),
+    "synchronous": ("OFF", "NORMAL", "FULL", "EXTRA"),
+    "cache_size": int,
+    "mmap_size": int,
+    "temp_store": ("DEFAULT", "FILE", "MEMORY"),
+    "busy_timeout": int,
+}
+PRAGMA_PROFILES = {
+    "safe": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    "bulkload": {
+        "journal_mode": "MEMORY",
+        "synchronous": "OFF",
+        "cache_size": -262144,
+        "mmap_size": 1073741824,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+
+
+def pragma_profile(profile):
+    """Validate a profile and return its PRAGMA settings in application order.
+
+    ``profile`` is a preset name from ``PRAGMA_PROFILES`` or an object of
+    settings, optionally based on a ``"preset"``: ``{"preset": "fast",
+    "cache_size": -200000}``. Raises ``ValueError`` for unknown names or values.
+    """
+
+    if profile is None:
+        return {}
+    if isinstance(profile, str):
+        profile = {"preset": profile}
+    if not isinstance(profile, dict):
+        raise ValueError("'profile' must be a preset name or an object of PRAGMA settings")
+    settings = {}
+    preset = profile.get("preset")
+    if preset is not None:
+        if preset not in PRAGMA_PROFILES:
+            raise ValueError(
+                f"Unknown profile '{preset}'. Use one of: " + ", ".join(PRAGMA_PROFILES)
+            )
+        settings.update(PRAGMA_PROFILES[preset])
+    for name, value in profile.items():
+        if name != "preset":
+            settings[name] = _pragma_value(name, value)
+    return {name: settings[name] for name in PRAGMA_SETTINGS if name in settings}
+
+
+def _pragma_value(name, value):
+    """Validate one profile PRAGMA and return its normalized value."""
+
+    allowed = PRAGMA_SETTINGS.get(name)
+    if allowed is None:
+        raise ValueError(
+            f"Unsupported PRAGMA '{name}'. Use one of: " + ", ".join(PRAGMA_SETTINGS)
+        )
+    if allowed is int:
+        if isinstance(value, str) and re.fullmatch(r"-?\d+", value.strip()):
+            value = int(value)
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise ValueError(f"PRAGMA '{name}' must be an integer.")
+        if value < 0 and name != "cache_size":
+            raise ValueError(f"PRAGMA '{name}' must not be negative.")
+        return value
+    if not isinstance(value, str) or value.strip().upper() not in allowed:
+        raise ValueError(f"PRAGMA '{name}' must be one of: " + ", ".join(allowed))
+    return value.strip().upper()
+
+
+class _TextResult:
+    """Write one result set as the interactive ``a | b`` table."""
+
+    def __init__(self, terminal, stream, column_names):
+        self._table = terminal.table(column_names, stream)
+        self._started = False
+
+    def write(self, rows):
+        self._table.write(rows)
+        self._started = True
+
+    def close(self):
+        # Empty results print no header; LIST reports them itself.
+        if self._started:
+            self._table.stream.flush()
+
+
+class _CsvResult:
+    """Write one result set as CSV with a header row."""
+
+    def __init__(self, stream, column_names):
+        self._writer = csv.writer(stream)
+        self._column_names = column_names
+        self._started = False
+
+    def write(self, rows):
+        if not self._started:
+            self._writer.writerow(self._column_names)
+            self._started = True
+        self._writer.writerows(rows)
+
+    def close(self):
+        if not self._started:
+            self._writer.writerow(self._column_names)
+
+
+class _NdjsonResult:
+    """Write one JSON object per result row."""
+
+    def __init__(self, stream, column_names):
+        self._stream = stream
+        self._column_names = column_names
+
+    def write(self, rows):
+        self._stream.write(
+            "".join(
+                json.dumps(dict(zip(self._column_names, row)), ensure_ascii=False, default=str)
+                + "\n"
+                for row in rows
+            )
+        )
+
+    def close(self):
+        pass
+
+
+class _JsonResult(_NdjsonResult):
+    """Write one result set as a JSON array of row objects."""
+
+    def __init__(self, stream, column_names):
+        super().__init__(stream, column_names)
+        self._separator = "[\n"
+
+    def write(self, rows):
+        parts = []
+        for row in rows:
+            item = json.dumps(dict(zip(self._column_names, row)), ensure_ascii=False, default=str)
+            parts.append(self._separator + item)
+            self._separator = ",\n"
+        self._stream.write("".join(parts))
+
+    def close(self):
+        self._stream.write("[]\n" if self._separator == "[\n" else "\n]\n")
+
+
+_RESULT_WRITERS = {"csv": _CsvResult, "json": _JsonResult, "ndjson": _NdjsonResult}
+
+# Phases reported by SET TIMING ON, and the number of functions PROFILE shows.
+TIMING_PHASES = ("parse", "execute", "fetch", "render")
+PROFILE_LIMIT = 15
+
+# Size and rotation of the slow-command log, and the SQL kept per entry.
+SLOW_LOG_MAX_BYTES = 1 << 20
+SLOW_LOG_BACKUPS = 3
+SLOW_LOG_STATEMENTS = 20
+_PLANNABLE_PATTERN = re.compile(r"\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b", re.I)
+STATS_COUNTERS = (
+    "rows_read",
+    "rows_written",
+    "bytes_exported",
+    "commits",
+    "slow_commands",
+    "cache_hits",
+    "cache_misses",
+    "sqlite_seconds",
+    "python_seconds",
+)
+
+
+def _slow_logger(file_path):
+    """Return a logger appending to a rotating slow-command log at ``file_path``."""
+
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    handler = logging.handlers.RotatingFileHandler(
+        file_path, maxBytes=SLOW_LOG_MAX_BYTES, backupCount=SLOW_LOG_BACKUPS, encoding="utf-8"
+    )
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    # Not registered with logging.getLogger, so every Db3 gets its own handler.
+    logger = logging.Logger("pydb.slow")
+    logger.addHandler(handler)
+    return logger
+
+
+def _confirm_input(prompt):
+    """Ask an interactive Y/N question on standard input."""
+
+    return input(prompt).strip().upper() == "Y"
+
+
+ColumnInfo = namedtuple("ColumnInfo", "cid name type not_null default primary_key")
+IndexInfo = namedtuple("IndexInfo", "name table unique origin columns sql")
+ListPage = namedtuple("ListPage", "rows page next previous")
+_PageQuery = namedtuple(
+    "_PageQuery", "columns select condition params order_by order_column descending keyset"
+)
+
+
+def _cache_key(query, params):
+    """Return the result cache key of a query.
+
+    Parameter types are part of the key: ``1 == 1.0`` in Python, but SQLite
+    compares them differently with a TEXT column.
+    """
+
+    return query, tuple((type(value), value) for value in params)
+
+
+def _rows_size(rows):
+    """Estimate the memory held by a list of row tuples, in bytes."""
+
+    return sys.getsizeof(rows) + sum(
+        sys.getsizeof(row) + sum(map(sys.getsizeof, row)) for row in rows
+    )
+
+
+class ResultCache:
+    """LRU cache of query results bounded by the estimated memory of their rows.
+
+    Entries are only valid for the data ``stamp`` they were read at; looking
+    up a different stamp empties the cache. A single result larger than a
+    quarter of ``max_bytes`` is not cached.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, stamp):
+        """Return the cached rows for ``key`` at ``stamp``, or ``None``."""
+
+        with self._lock:
+            if stamp != self._stamp:
+                self._clear()
+                self._stamp = stamp
+                return None
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, rows, stamp, size=None):
+        """Store ``rows`` read at ``stamp``; return whether they were cached."""
+
+        size = _rows_size(rows) if size is None else size
+        with self._lock:
+            if stamp != self._stamp or size > self.max_bytes // 4:
+                return False
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (rows, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._entries.clear()
+        self.size = 0
+
+
+class SchemaCatalog:
+    """Table, column, and index metadata cached for one SQLite connection.
+
+    Metadata is read from ``sqlite_master`` and the ``PRAGMA`` functions once and
+    then served from memory. Call ``invalidate`` after a schema change made
+    through the same connection, or ``validate`` to detect changes made by other
+    connections through ``PRAGMA schema_version``. ``generation`` increases on
+    every invalidation, so callers can key their own caches on it. The catalog
+    may be shared by threads; ``reader``, a context manager factory lending a
+    connection, lets it read through a connection pool instead of ``connection``.
+    """
+
+    def __init__(self, connection, reader=None):
+        self._reader = reader or (lambda: contextlib.nullcontext(connection))
+        self._lock = threading.RLock()
+        self._schema_version = None
+        self._tables = None
+        self._index_sql = None
+        self._columns = {}
+        self._indexes = {}
+        self.generation = 0
+
+    def _load(self):
+        if self._tables is not None:
+            return
+        with self._lock:
+            if self._tables is not None:
+                return
+            tables, index_sql = {}, {}
+            with self._reader() as connection:
+                version = connection.execute("PRAGMA schema_version").fetchone()[0]
+                for object_type, name, table_name, sql in connection.execute(
+                    "SELECT type, name, tbl_name, sql FROM sqlite_master "
+                    "WHERE type IN ('table', 'index') ORDER BY name"
+                ):
+                    if object_type == "table":
+                        tables[name] = sql
+                    else:
+                        index_sql[name] = (table_name, sql)
+            self._schema_version = version
+            self._index_sql = index_sql
+            self._tables = tables
+
+    def invalidate(self):
+        """Forget all cached metadata; it is reloaded on the next request."""
+
+        with self._lock:
+            self._tables = self._index_sql = None
+            self._columns.clear()
+            self._indexes.clear()
+            self.generation += 1
+
+    def validate(self):
+        """Invalidate the catalog if the database schema changed; return whether it did."""
+
+        with self._lock:
+            if self._tables is None:
+                return False
+            with self._reader() as connection:
+                version = connection.execute("PRAGMA schema_version").fetchone()[0]
+            if version == self._schema_version:
+                return False
+            self.invalidate()
+            return True
+
+    def refresh(self):
+        """Reload the table list immediately."""
+
+        with self._lock:
+            self.invalidate()
+            self._load()
+
+    @property
+    def schema_version(self):
+        """Return the ``PRAGMA schema_version`` the cached metadata belongs to."""
+
+        self._load()
+        return self._schema_version
+
+    def tables(self):
+        """Return the table names sorted by name."""
+
+        self._load()
+        return list(self._tables)
+
+    def has_table(self, table_name):
+        self._load()
+        return table_name in self._tables
+
+    def table_sql(self, table_name):
+        """Return the ``CREATE TABLE`` statement of a table, or ``None``."""
+
+        self._load()
+        return self._tables.get(table_name)
+
+    def columns(self, table_name):
+        """Return ``ColumnInfo`` tuples for a table; empty when it does not exist."""
+
+        columns = self._columns.get(table_name)
+        if columns is None:
+            with self._lock:
+                if not self.has_table(table_name):
+                    return []
+                with self._reader() as connection:
+                    columns = [
+                        ColumnInfo(*row)
+                        for row in connection.execute(
+                            f"PRAGMA table_info({_quote_identifier(table_name)})"
+                        )
+                    ]
+                self._columns[table_name] = columns
+        return columns
+
+    def column_names(self, table_name):
+        return [column.name for column in self.columns(table_name)]
+
+    def indexes(self, table_name):
+        """Return ``IndexInfo`` tuples for a table, including automatic indexes."""
+
+        indexes = self._indexes.get(table_name)
+        if indexes is None:
+            with self._lock:
+                if not self.has_table(table_name):
+                    return []
+                indexes = []
+                with self._reader() as connection:
+                    for _, name, unique, origin, _ in connection.execute(
+                        f"PRAGMA index_list({_quote_identifier(table_name)})"
+                    ).fetchall():
+                        columns = [
+                            row[2]
+                            for row in connection.execute(
+                                f"PRAGMA index_info({_quote_identifier(name)})"
+                            )
+                        ]
+                        sql = self._index_sql.get(name, (table_name, None))[1]
+                        indexes.append(
+                            IndexInfo(name, table_name, bool(unique), origin, columns, sql)
+                        )
+                indexes.sort()
+                self._indexes[table_name] = indexes
+        return indexes
+
+
+PREDICATE_LOG_SIZE = 1000
+_FULL_SCAN_PATTERN = re.compile(r"^SCAN (?:TABLE )?(\S+)(?!.*\bUSING\b)|TEMP B-TREE FOR ORDER BY")
+
+_DDL_PATTERN = re.compile(r"\s*(CREATE|ALTER|DROP)\b", re.I)
+
+
+def _single_column_order(order_sql):
+    """Return ``(column, descending)`` for an ORDER BY of one plain column, else ``None``."""
+
+    match = re.fullmatch(
+        r'\s*("(?:[^"]|"")+"|[A-Za-z_]\w*)(?:\s+(ASC|DESC))?\s*', order_sql, re.I
+    )
+    if match is None:
+        return None
+    column = match.group(1)
+    if column.startswith('"'):
+        column = column[1:-1].replace('""', '"')
+    return column, (match.group(2) or "").upper() == "DESC"
+
+
+def _index_order_sql(index):
+    """Return the ORDER BY expression matching an index's key columns."""
+
+    if index.sql:
+        on_match = re.search(r"\bON\b[^(]*\(", index.sql, re.I | re.S)
+        if on_match:
+            depth = 0
+            for position in range(on_match.end() - 1, len(index.sql)):
+                if index.sql[position] == "(":
+                    depth += 1
+                elif index.sql[position] == ")":
+                    depth -= 1
+                    if not depth:
+                        return index.sql[on_match.end() : position].strip()
+    return ", ".join(_quote_identifier(column) for column in index.columns)
+
+
+REBUILD_CHUNK_SIZE = 50000
+_TABLE_CONSTRAINT_PATTERN = re.compile(
+    r"(CONSTRAINT|PRIMARY\s+KEY|UNIQUE|CHECK|FOREIGN\s+KEY)\b", re.I
+)
+
+
+def _leading_identifier(text):
+    """Return ``(name, rest)`` for the quoted or bare identifier starting ``text``."""
+
+    text = text.lstrip()
+    closing = {'"': '"', "`": "`", "[": "]"}.get(text[:1])
+    if closing is None:
+        match = re.match(r"[^\s(]+", text)
+        return match.group(0), text[match.end() :]
+    end = 1
+    while True:
+        end = text.find(closing, end)
+        if end < 0:
+            raise ValueError("Unterminated quoted identifier.")
+        if closing != "]" and text[end + 1 : end + 2] == closing:
+            end += 2
+            continue
+        return text[1:end].replace(closing * 2, closing), text[end + 1 :]
+
+
+def _table_definition(sql):
+    """Split ``CREATE TABLE`` SQL into its columns, table constraints, and options.
+
+    Returns ``(columns, constraints, options)`` where ``columns`` lists
+    ``(name, definition)`` pairs, the definition being everything after the name.
+    """
+
+    start, end = sql.index("("), sql.rindex(")")
+    columns, constraints = [], []
+    for item in _split_sql_items(sql[start + 1 : end]):
+        if _TABLE_CONSTRAINT_PATTERN.match(item):
+            constraints.append(item)
+        else:
+            name, definition = _leading_identifier(item)
+            columns.append((name, definition.strip()))
+    return columns, constraints, sql[end + 1 :].strip()
+
+
+_COLUMN_CONSTRAINT_PATTERN = re.compile(
+    r"\b(CONSTRAINT|PRIMARY|NOT|NULL|UNIQUE|CHECK|DEFAULT|COLLATE|REFERENCES|GENERATED|AS)\b",
+    re.I,
+)
+_MIGRATION_USAGE = (
+    "Usage: MODIF ADD <column> <type> | DROP <column> | RENAME <column> TO <name> "
+    "| ALTER <column> TYPE <type> | BEGIN | APPLY | CANCEL"
+)
+
+
+_SQL_TOKEN_PATTERN = re.compile(
+    r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|`(?:[^`]|``)*`|\[[^\]]*\]|[A-Za-z_]\w*|\S"""
+)
+# Keywords followed by the name of a table, index, trigger, or constraint, not a column.
+_OBJECT_NAME_KEYWORDS = frozenset(
+    {"INDEX", "TRIGGER", "VIEW", "TABLE", "CONSTRAINT", "ON", "INTO", "FROM", "JOIN", "UPDATE"}
+)
+
+
+def _token_identifier(token):
+    """Return the identifier a bare or quoted SQL token names, or ``None``."""
+
+    if token[0] in "\"`":
+        return token[1:-1].replace(token[0] * 2, token[0])
+    if token[0] == "[":
+        return token[1:-1]
+    return token if token[0].isalpha() or token[0] == "_" else None
+
+
+def _mentions_identifier(sql, name):
+    """Return whether SQL text refers to ``name`` as a bare or quoted identifier."""
+
+    name = name.lower()
+    return any(
+        (_token_identifier(token) or "").lower() == name
+        for token in _SQL_TOKEN_PATTERN.findall(sql)
+        if token[0] != "'"
+    )
+
+
+def _rename_identifiers(sql, renames):
+    """Replace column identifiers named in ``renames`` in one pass.
+
+    String literals, object names (after ``INDEX``, ``ON``, ``CONSTRAINT``,
+    ``FROM`` and the like), and the table and columns after ``REFERENCES`` are
+    left alone, as they never name a column of the renamed table.
+    """
+
+    if not renames:
+        return sql
+    parts, position = [], 0
+    pending = None  # "name", "table" (after REFERENCES), or "columns"
+    depth = 0
+    for match in _SQL_TOKEN_PATTERN.finditer(sql):
+        token = match.group()
+        if token[0] == "'":
+            continue
+        if depth:
+            depth += (token == "(") - (token == ")")
+            continue
+        if pending == "columns":
+            pending = None
+            if token == "(":
+                depth = 1
+                continue
+        if token[0] in "\"`[":
+            name, word = _token_identifier(token), None
+        elif token[0].isalpha() or token[0] == "_":
+            name, word = token, token.upper()
+        else:
+            pending = None
+            continue
+        if pending == "table":
+            pending = "columns"
+            continue
+        if pending == "name":
+            if word not in ("IF", "NOT", "EXISTS"):
+                pending = None
+            continue
+        if word == "REFERENCES":
+            pending = "table"
+        elif word in _OBJECT_NAME_KEYWORDS:
+            pending = "name"
+        elif name in renames:
+            parts.append(sql[position : match.start()] + _quote_identifier(renames[name]))
+            position = match.end()
+    return "".join(parts) + sql[position:]
+
+
+def _replace_column_type(definition, column_type):
+    """Swap the type name at the start of a column definition, keeping constraints."""
+
+    match = _COLUMN_CONSTRAINT_PATTERN.search(definition)
+    return f"{column_type} {definition[match.start():] if match else ''}".strip()
+
+
+def _migration_operation(operation):
+    """Normalize a MODIF word list, tuple, or JSON object to an operation tuple."""
+
+    if isinstance(operation, dict):
+        action = str(operation.get("action", "")).upper()
+        field = operation.get("field")
+        names = [field, operation.get("to")] if action == "RENAME" else [field]
+        if not all(_valid_identifier(name) for name in names):
+            raise ValueError("Migration 'field' and 'to' must be valid identifiers.")
+        if action in ("ADD", "TYPE"):
+            column_type = _column_type(operation.get("type", "TEXT"))
+            if action == "ADD" and "default" in operation:
+                column_type += f" DEFAULT {_default_sql(operation['default'])}"
+            operation = (action, field, column_type)
+        elif action == "RENAME":
+            operation = (action, field, operation.get("to"))
+        else:
+            operation = (action, field)
+    words = list(operation)
+    action = str(words[0]).upper() if words else ""
+    if action == "ALTER" and len(words) >= 4 and str(words[2]).upper() == "TYPE":
+        return ("TYPE", words[1], " ".join(words[3:]))
+    if action == "RENAME" and len(words) == 4 and str(words[2]).upper() == "TO":
+        return ("RENAME", words[1], words[3])
+    if action in ("ADD", "TYPE") and len(words) >= 3:
+        return (action, words[1], " ".join(words[2:]))
+    if (action == "DROP" and len(words) == 2) or (action == "RENAME" and len(words) == 3):
+        return tuple([action] + words[1:])
+    raise ValueError(_MIGRATION_USAGE)
+
+
+def _migration_applied(operation, columns):
+    """Return whether ``[name, definition, ...]`` columns already reflect an operation."""
+
+    action, column_name = operation[:2]
+    definitions = {column[0]: column[1] for column in columns}
+    if action == "ADD":
+        return column_name in definitions
+    if action == "DROP":
+        return column_name not in definitions
+    if action == "RENAME":
+        return column_name not in definitions and operation[2] in definitions
+    definition = definitions.get(column_name)
+    return definition is not None and _replace_column_type(definition, operation[2]) == definition
+
+
+def _alter_table_sql(table_name, operation):
+    """Return the ALTER TABLE statement running an ADD, DROP, or RENAME in place."""
+
+    action, column_name = operation[:2]
+    query = f"ALTER TABLE {_quote_identifier(table_name)} "
+    if action == "ADD":
+        return query + f"ADD COLUMN {_quote_identifier(column_name)} {operation[2]}"
+    if action == "DROP":
+        return query + f"DROP COLUMN {_quote_identifier(column_name)}"
+    return (
+        query + f"RENAME COLUMN {_quote_identifier(column_name)} "
+        f"TO {_quote_identifier(operation[2])}"
+    )
+
+
+class _CommandFailed(Exception):
+    """Signal that a batched script command reported an error."""
+
+
+class Db3:
+    """Interactive dBASE-style command interpreter backed by SQLite."""
+
+    COMMANDS = COMMANDS
+
+    def __init__(
+        self,
+        db_file="main.sql",
+        export_dir="export",
+        debug=False,
+        terminal=None,
+        fetch_size=500,
+        script_batch=None,
+        output=None,
+        output_format="text",
+        confirm=None,
+        statement_cache_size=256,
+        profile=None,
+        memory=False,
+        autosave=None,
+        readers=0,
+        shared=False,
+        slow_log=None,
+        slow_threshold=1.0,
+        result_cache=0,
+    ):
+        """Open ``db_file``.
+
+        Result rows are written to ``output`` (standard output by default) as an
+        interactive table or, with ``output_format``, as ``json``, ``ndjson`` or
+        ``csv``. ``confirm`` answers Y/N questions such as DROP confirmation.
+        ``statement_cache_size`` bounds both the parsed-command cache and
+        SQLite's prepared-statement cache. ``profile`` selects connection
+        PRAGMAs, see ``pragma_profile``.
+
+        With ``memory`` the file is copied into an in-memory database that all
+        commands use; ``save`` copies it back, as does ``close`` and, every
+        ``autosave`` seconds, a background thread.
+
+        ``readers`` opens that many read-only connections and switches the file
+        to WAL mode. LIST, FIND, EXPORT, and the schema catalog then read
+        through them, so the object can serve reads from several threads while
+        the single writer connection keeps working.
+
+        ``shared`` lets threads other than the creating one run commands, as
+        the ``--serve`` sessions do. Commands that write are run one at a time;
+        with ``readers`` the ``READ_ONLY_COMMANDS`` run alongside them.
+
+        Commands taking ``slow_threshold`` seconds or longer are appended to the
+        rotating log file ``slow_log`` with their SQL and query plans.
+
+        ``result_cache`` keeps up to that many bytes of LIST, FIND, COUNT, SUM,
+        and AVERAGE results. Repeating such a command returns the cached rows
+        while ``PRAGMA data_version`` and this connection's change count show
+        that the database was not modified.
+        """
+
+        if not isinstance(fetch_size, int) or fetch_size < 1:
+            raise ValueError("fetch_size must be a positive integer.")
+        if script_batch is not None and (not isinstance(script_batch, int) or script_batch < 1):
+            raise ValueError("script_batch must be a positive integer.")
+        if not isinstance(statement_cache_size, int) or statement_cache_size < 0:
+            raise ValueError("statement_cache_size must be a non-negative integer.")
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError("output_format must be one of: " + ", ".join(OUTPUT_FORMATS))
+        if autosave is not None and (
+            not memory or not isinstance(autosave, (int, float)) or autosave <= 0
+        ):
+            raise ValueError("autosave must be a positive number of seconds with memory=True.")
+        pragmas = pragma_profile(profile)
+        if not isinstance(readers, int) or readers < 0:
+            raise ValueError("readers must be a non-negative integer.")
+        if not isinstance(slow_threshold, (int, float)) or slow_threshold < 0:
+            raise ValueError("slow_threshold must be a non-negative number of seconds.")
+        if not isinstance(result_cache, int) or result_cache < 0:
+            raise ValueError("result_cache must be a non-negative number of bytes.")
+        if readers and (memory or pragmas.get("journal_mode", "WAL") != "WAL"):
+            raise ValueError("readers need a database file in journal_mode WAL.")
+        self.db_file = db_file
+        self.export_dir = export_dir
+        self.debug_mode = debug
+        self.term = terminal or Terminal()
+        self.fetch_size = fetch_size
+        self.script_batch = script_batch
+        self.output = output
+        self.output_format = output_format
+        self.confirm = confirm or _confirm_input
+        self.statement_cache_size = statement_cache_size
+        self._statements = OrderedDict()
+        self._statements_lock = threading.Lock()
+        self.error_count = 0
+        self.timing = False
+        # Per-thread timings and statements of the command being measured.
+        self._measurement = threading.local()
+        self.slow_threshold = slow_threshold
+        self._slow_log = _slow_logger(slow_log) if slow_log else None
+        self._stats = Counter()
+        self._command_counts = Counter()
+        self.result_cache = ResultCache(result_cache) if result_cache else None
+        self._explicit_transaction = False
+        self._script_transaction = False
+        # Thread of the open BEGIN or batched RUN, and the threads in a write command.
+        self._transaction_thread = None
+        self._writing = threading.local()
+        self.memory = memory
+        # Serializes commands with the autosave thread.
+        self._lock = threading.RLock()
+        if memory:
+            self.conn = sqlite3.connect(
+                ":memory:", cached_statements=statement_cache_size, check_same_thread=False
+            )
+            with contextlib.closing(sqlite3.connect(self.db_file)) as source:
+                source.backup(self.conn)
+        else:
+            self.conn = sqlite3.connect(
+                self.db_file,
+                cached_statements=statement_cache_size,
+                check_same_thread=not (readers or shared),
+            )
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.pragmas = {}
+        self._apply_pragmas(dict(pragmas, journal_mode="WAL") if readers else pragmas)
+        self._readers = None
+        self._lent_readers = set()
+        if readers:
+            self._reader_uri = pathlib.Path(os.path.abspath(db_file)).as_uri() + "?mode=ro"
+            self._reader_pragmas = {
+                name: value
+                for name, value in pragmas.items()
+                if name in ("cache_size", "mmap_size", "temp_store", "busy_timeout")
+            }
+            self._readers = queue.LifoQueue()
+            for _ in range(readers):
+                self._readers.put(self._open_reader())
+        self.cursor = self.conn.cursor()
+        self.catalog = SchemaCatalog(self.conn, self._reader)
+        self.active_table = None
+        self.order_tag = None
+        self._order_sql = None
+        self._predicates = {}
+        self._pending_migration = None
+        self._list_state = None
+        self._saved_state = self._memory_state() if memory else None
+        self._autosave_stop = threading.Event()
+        self._autosave_thread = None
+        if autosave:
+            self._autosave_thread = threading.Thread(
+                target=self._autosave, args=(autosave,), name="pydb-autosave", daemon=True
+            )
+            self._autosave_thread.start()
+        os.makedirs(self.export_dir, exist_ok=True)
+
+    def close(self):
+        """Close the connection, saving an in-memory database to its file first."""
+
+        if self._autosave_thread is not None:
+            self._autosave_stop.set()
+            self._autosave_thread.join()
+            self._autosave_thread = None
+        if self.memory:
+            with self._lock:
+                if self.conn.in_transaction:
+                    self.conn.rollback()
+                    self._explicit_transaction = False
+                    print("Uncommitted changes were discarded.")
+                self.save()
+        while self._readers is not None and not self._readers.empty():
+            self._readers.get_nowait().close()
+        if self._slow_log is not None:
+            for handler in self._slow_log.handlers:
+                handler.close()
+        self.conn.close()
+
+    def _open_reader(self):
+        connection = sqlite3.connect(
+            self._reader_uri,
+            uri=True,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size,
+        )
+        for name, value in self._reader_pragmas.items():
+            connection.execute(f"PRAGMA {name} = {value}")
+        return connection
+
+    @contextlib.contextmanager
+    def _reader(self):
+        """Lend a pooled read-only connection.
+
+        The writer is used instead when there is no pool, or while a
+        transaction is open and this thread owns it: it started the BEGIN or
+        batched RUN, or is running a write command. Reads then see the
+        transaction's own changes; other threads read committed rows from the
+        pool. When every pooled connection is busy a temporary one is opened
+        rather than waiting, as a streaming LIST may hold its connection for a
+        long time.
+        """
+
+        if self._readers is None or (self.conn.in_transaction and self._owns_writer()):
+            yield self.conn
+            return
+        try:
+            connection = self._readers.get_nowait()
+            pooled = True
+        except queue.Empty:
+            connection = self._open_reader()
+            pooled = False
+        self._lent_readers.add(connection)
+        try:
+            yield connection
+        finally:
+            self._lent_readers.discard(connection)
+            if pooled:
+                self._readers.put(connection)
+            else:
+                connection.close()
+
+    def _owns_writer(self):
+        return (
+            getattr(self._writing, "active", False)
+            or self._transaction_thread == threading.get_ident()
+        )
+
+    def interrupt(self):
+        """Abort the statements running on the writer and on lent reader connections.
+
+        Safe to call from another thread; the interrupted command fails with
+        ``sqlite3.OperationalError`` and is reported like any SQL error.
+        """
+
+        self.conn.interrupt()
+        for connection in list(self._lent_readers):
+            connection.interrupt()
+
+    def _memory_state(self):
+        return self.conn.total_changes, self.conn.execute("PRAGMA schema_version").fetchone()[0]
+
+    def save(self):
+        """Copy an in-memory database to its file; return whether it was written.
+
+        Nothing is written when there are no changes since the last save or while
+        BEGIN ... COMMIT is open, so the file only receives committed work.
+        """
+
+        if not self.memory:
+            self._error("SAVE is only available in memory mode (--memory).")
+            return False
+        with self._lock:
+            if self._explicit_transaction:
+                self._error("Cannot save inside a transaction. Use COMMIT or ROLLBACK first.")
+                return False
+            self._commit()
+            state = self._memory_state()
+            if state == self._saved_state:
+                return False
+            try:
+                with contextlib.closing(sqlite3.connect(self.db_file)) as target:
+                    self.conn.backup(target)
+            except sqlite3.Error as error:
+                self._error(f"ERROR: Failed to save '{self.db_file}': {error}")
+                return False
+            self._saved_state = state
+        return True
+
+    def _autosave(self, interval):
+        while not self._autosave_stop.wait(interval):
+            with self._lock:
+                if not self._explicit_transaction:
+                    self.save()
+
+    def cmd_save(self):
+        if self.save():
+            print(f"Database saved to '{self.db_file}'.")
+        elif self.memory and not self._explicit_transaction:
+            print("No changes to save.")
+
+    def debug(self, mode):
+        self.debug_mode = bool(mode)
+        print("Debug mode enabled." if self.debug_mode else "Debug mode disabled.")
+
+    def _debug(self, query, params=()):
+        statements = self._command_sql
+        if statements is not None and len(statements) < SLOW_LOG_STATEMENTS:
+            statements.append((query, params))
+        if self.debug_mode:
+            print(f"DEBUG: Executing SQL -> {query}" + (f" {params!r}" if params else ""))
+
+    @property
+    def _timings(self):
+        return getattr(self._measurement, "timings", None)
+
+    @_timings.setter
+    def _timings(self, timings):
+        self._measurement.timings = timings
+
+    @property
+    def _command_sql(self):
+        return getattr(self._measurement, "statements", None)
+
+    @_command_sql.setter
+    def _command_sql(self, statements):
+        self._measurement.statements = statements
+
+    @contextlib.contextmanager
+    def _timed(self, phase):
+        """Add the block's duration to ``phase`` while a command is being measured."""
+
+        timings = self._timings
+        if timings is None:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[phase] += time.perf_counter() - started
+
+    def _add_timing(self, phase, seconds):
+        timings = self._timings
+        if timings is not None:
+            timings[phase] += seconds
+
+    def _error(self, message):
+        """Print a command failure and count it for scripts and exit codes."""
+
+        self.error_count += 1
+        print(message)
+
+    def _cached_statement(self, kind, text, build):
+        """Return ``build(text)`` from an LRU cache of parsed commands.
+
+        Entries are keyed by the active table and schema generation, so any
+        CREATE, MODIF, DROP, or USE makes older entries unreachable. Reusing the
+        identical SQL text also lets SQLite reuse its prepared statement.
+        """
+
+        key = (kind, self.active_table, self.order_tag, self.catalog.generation, text)
+        with self._statements_lock:
+            entry = self._statements.get(key)
+            if entry is not None:
+                self._statements.move_to_end(key)
+                return entry
+        with self._timed("parse"):
+            entry = build(text)
+        if self.statement_cache_size:
+            with self._statements_lock:
+                self._statements[key] = entry
+                if len(self._statements) > self.statement_cache_size:
+                    self._statements.popitem(last=False)
+        return entry
+
+    def _schema_changed(self):
+        """Forget schema metadata and parsed commands after DDL."""
+
+        self.catalog.invalidate()
+        with self._statements_lock:
+            self._statements.clear()
+        if self.result_cache is not None:
+            self.result_cache.clear()
+
+    def _data_stamp(self):
+        """Return a value that changes whenever the database content may have changed.
+
+        ``PRAGMA data_version`` changes with commits by other connections and
+        ``total_changes`` with every write made through this one; rollbacks and
+        DDL clear the result cache through ``_schema_changed``. Returns ``None``,
+        meaning the cache must not be used, while the writer has a transaction
+        open: its commit changes neither value, so rows read meanwhile (from a
+        pool connection, or uncommitted ones from the writer) could outlive it.
+        The stamp is read before that check, so changes made between the two
+        are already part of it.
+        """
+
+        stamp = self.conn.execute("PRAGMA data_version").fetchone()[0], self.conn.total_changes
+        return None if self.conn.in_transaction else stamp
+
+    def _read(self, query, params):
+        """Return all rows of a read query, from the result cache when it is still valid."""
+
+        cache = self.result_cache
+        stamp = self._data_stamp() if cache is not None else None
+        if stamp is not None:
+            key = _cache_key(query, params)
+            rows = cache.get(key, stamp)
+            if rows is not None:
+                self._stats["cache_hits"] += 1
+                return rows
+            self._stats["cache_misses"] += 1
+        self._debug(query, params)
+        with self._reader() as connection:
+            with self._timed("execute"):
+                cursor = connection.execute(query, params)
+            with self._timed("fetch"):
+                rows = cursor.fetchall()
+        if stamp is not None:
+            cache.put(key, rows, stamp)
+        return rows
+
+    def _commit(self):
+        """Commit a write unless an explicit BEGIN or batched RUN is still open."""
+
+        if not self._explicit_transaction:
+            self._commit_connection()
+
+    def _commit_connection(self):
+        if self.conn.in_transaction:
+            self._stats["commits"] += 1
+        self.conn.commit()
+
+    @contextlib.contextmanager
+    def _savepoint(self, name):
+        """Run a block inside a savepoint, undoing only that block on failure."""
+
+        self.conn.execute(f"SAVEPOINT {name}")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute(f"ROLLBACK TO {name}")
+            self.conn.execute(f"RELEASE {name}")
+            self._schema_changed()
+            raise
+        self.conn.execute(f"RELEASE {name}")
+
+    def begin(self):
+        """Start an explicit transaction kept open until COMMIT or ROLLBACK."""
+
+        if self._explicit_transaction:
+            self._error("A transaction is already active.")
+            return False
+        self._commit_connection()
+        self._debug("BEGIN")
+        self.conn.execute("BEGIN")
+        self._explicit_transaction = True
+        self._transaction_thread = threading.get_ident()
+        print("Transaction started.")
+        return True
+
+    def commit(self):
+        """Commit the explicit transaction started with BEGIN."""
+
+        return self._end_transaction(commit=True)
+
+    def rollback(self):
+        """Discard every change made since BEGIN."""
+
+        return self._end_transaction(commit=False)
+
+    def _end_transaction(self, commit):
+        keyword = "COMMIT" if commit else "ROLLBACK"
+        if self._script_transaction:
+            self._error(f"{keyword} is not allowed inside a batched RUN script.")
+            return False
+        if not self._explicit_transaction:
+            self._error("No active transaction. Use BEGIN first.")
+            return False
+        self._debug(keyword)
+        try:
+            if commit:
+                self._commit_connection()
+            else:
+                self.conn.rollback()
+                self._schema_changed()
+        except sqlite3.Error as error:
+            self._error(f"SQL Error: {error}")
+            return False
+        self._explicit_transaction = False
+        self._transaction_thread = None
+        print("Transaction committed." if commit else "Transaction rolled back.")
+        return True
+
+    def execute(self, query, params=(), suppress_debug=False):
+        """Execute SQL for callers using the wrapper as a small library."""
+
+        if not suppress_debug:
+            self._debug(query, params)
+        try:
+            with self._timed("execute"):
+                self.cursor.execute(query, params)
+                if _DDL_PATTERN.match(query):
+                    self._schema_changed()
+                self._commit()
+            if self.cursor.rowcount > 0:
+                self._stats["rows_written"] += self.cursor.rowcount
+            with self._timed("fetch"):
+                rows = self.cursor.fetchall()
+            self._stats["rows_read"] += len(rows)
+            return rows
+        except sqlite3.Error as error:
+            self._error(f"SQL Error: {error}")
+            return None
+
+    def table_exists(self, table_name):
+        return self.catalog.has_table(table_name)
+
+    def create(self, table_name, column_definitions=None):
+        if not table_name:
+            self._error("Table name is missing.")
+            return False
+        columns = column_definitions or "(id INTEGER PRIMARY KEY, data TEXT)"
+        query = f"CREATE TABLE {_quote_identifier(table_name)} {columns}"
+        if self.execute(query) is None:
+            return False
+        self.active_table = table_name
+        print(f"Table '{table_name}' created and set as active.")
+        return True
+
+    def create_table_from_fields(self, table_name, fields):
+        """Create a legacy JSON-defined table with TEXT fields and a uid key."""
+
+        return self.create_table_from_columns(
+            table_name, [{"field": field} for field in fields]
+        )
+
+    def create_table_from_columns(self, table_name, columns):
+        """Create a table from validated JSON column definitions."""
+
+        if not _valid_identifier(table_name):
+            raise ValueError(f"Invalid table name '{table_name}'.")
+        if not isinstance(columns, list) or not columns:
+            raise ValueError("JSON definition must contain a non-empty 'columns' list.")
+
+        fields = []
+        definitions = []
+        for column in columns:
+            if not isinstance(column, dict):
+                raise ValueError("Each item in 'columns' must be an object.")
+            field = column.get("field")
+            if not _valid_identifier(field):
+                raise ValueError("JSON fields must be valid non-empty identifiers.")
+            fields.append(field)
+
+            for property_name in ("not_null", "unique"):
+                if property_name in column and not isinstance(column[property_name], bool):
+                    raise ValueError(f"Column '{property_name}' must be true or false.")
+            if "description" in column and not isinstance(column["description"], str):
+                raise ValueError("Column 'description' must be a string.")
+
+            if field == "uid":
+                if "type" in column and _column_type(column["type"]) != "INTEGER":
+                    raise ValueError("The special 'uid' field must use type INTEGER.")
+                definition = f"{_quote_identifier(field)} INTEGER PRIMARY KEY"
+            else:
+                field_type = _column_type(column.get("type", "TEXT"))
+                definition = f"{_quote_identifier(field)} {field_type}"
+
+            if column.get("not_null", False):
+                definition += " NOT NULL"
+            if "default" in column:
+                definition += f" DEFAULT {_default_sql(column['default'])}"
+            if column.get("unique", False):
+                definition += " UNIQUE"
+            if "foreign_key" in column:
+                definition += " " + _foreign_key_sql(column["foreign_key"])
+            definitions.append(definition)
+
+        if len(set(fields)) != len(fields):
+            raise ValueError("JSON fields must not contain duplicates.")
+        query = (
+            f"CREATE TABLE IF NOT EXISTS {_quote_identifier(table_name)} "
+            f"({', '.join(definitions)})"
+        )
+        self._debug(query)
+        self.cursor.execute(query)
+        self._schema_changed()
+        self._commit()
+        print(f"Table '{table_name}' created from JSON definition.")
+        return True
+
+    def execute_sql_script(self, script):
+        """Execute a trusted SQL schema script used with the --create option."""
+
+        if not isinstance(script, str) or not script.strip():
+            raise ValueError("SQL definition file must not be empty.")
+        self._debug(script)
+        self.conn.executescript(script)
+        self._schema_changed()
+        print("SQL definition script executed.")
+        return True
+
+    def cmd_show(self, output_format="text"):
+        table_names = self.catalog.tables()
+        tables = [(table_name,) for table_name in table_names]
+        if output_format == "json":
+            print(
+                json.dumps(
+                    {"database": os.path.basename(self.db_file), "tables": table_names},
+                    ensure_ascii=False,
+                ),
+                file=self._output(),
+            )
+            return table_names
+        if output_format != "text":
+            self._display_rows(["table"], tables, output_format)
+            return table_names
+        if not tables:
+            print("No tables found.")
+            return table_names
+        self.term.y("Tables in database:")
+        for (table_name,) in tables:
+            marker = " (ACTIVE)" if table_name == self.active_table else ""
+            print(f"- {table_name}{marker}")
+        return table_names
+
+    def cmd_use(self, table_name):
+        if not table_name:
+            self._error("Table name is missing.")
+            return False
+        if not self.table_exists(table_name):
+            self._error(f"Table '{table_name}' does not exist.")
+            return False
+        self.active_table = table_name
+        self.order_tag = self._order_sql = None
+        with self._statements_lock:
+            self._statements.clear()
+        print(f"Using table '{table_name}'. (Active Table Set)")
+        return True
+
+    def _active_table_columns(self):
+        return self.catalog.column_names(self.active_table)
+
+    def _parse_list_arguments(self, arguments):
+        """Parse LIST's lightweight WHERE/ORDER/LIMIT and paging clauses."""
+
+        if isinstance(arguments, (list, tuple)):
+            arguments = " ".join(arguments)
+        arguments = (arguments or "").strip()
+        matches = _list_clause_matches(arguments)
+        clauses = {}
+        columns_part = arguments[: matches[0][0]].strip() if matches else arguments
+        for position, match in enumerate(matches):
+            clause = re.sub(r"\s+", " ", match[2].upper())
+            value_end = matches[position + 1][0] if position + 1 < len(matches) else len(arguments)
+            value = arguments[match[1] : value_end].strip()
+            if clause in clauses:
+                raise ValueError(f"LIST clause '{clause}' may be used only once.")
+            if not value:
+                raise ValueError(f"LIST clause '{clause}' requires a value.")
+            clauses[clause] = value
+
+        allowed_clause_order = ["WHERE", "ORDER BY", "LIMIT", "OFFSET", "PAGE", "SIZE"]
+        encountered = [re.sub(r"\s+", " ", match[2].upper()) for match in matches]
+        if encountered != sorted(encountered, key=allowed_clause_order.index):
+            raise ValueError("LIST clauses must be ordered as WHERE, ORDER BY, LIMIT/OFFSET, PAGE/SIZE.")
+
+        columns = columns_part.replace(",", " ").split() if columns_part else []
+        parsed = {"columns": columns, "where": clauses.get("WHERE"), "order_by": None,
+                  "limit": None, "offset": 0, "page": None, "base": arguments}
+        if "ORDER BY" in clauses:
+            parts = clauses["ORDER BY"].split()
+            if len(parts) not in (1, 2) or (len(parts) == 2 and parts[1].upper() not in {"ASC", "DESC"}):
+                raise ValueError("Use: ORDER BY <column> [ASC|DESC]")
+            parsed["order_by"] = (parts[0], parts[1].upper() if len(parts) == 2 else "ASC")
+
+        def positive_integer(value, label, allow_zero=False):
+            if not re.fullmatch(r"\d+", value) or (not allow_zero and int(value) == 0):
+                comparison = "a non-negative" if allow_zero else "a positive"
+                raise ValueError(f"{label} must be {comparison} integer.")
+            return int(value)
+
+        if "LIMIT" in clauses:
+            parsed["limit"] = positive_integer(clauses["LIMIT"], "LIMIT")
+        if "OFFSET" in clauses:
+            if parsed["limit"] is None:
+                raise ValueError("OFFSET requires LIMIT.")
+            parsed["offset"] = positive_integer(clauses["OFFSET"], "OFFSET", allow_zero=True)
+        has_page = "PAGE" in clauses or "SIZE" in clauses
+        if has_page:
+            if "PAGE" not in clauses or "SIZE" not in clauses:
+                raise ValueError("Paging requires both PAGE <number> and SIZE <count>.")
+            if parsed["limit"] is not None:
+                raise ValueError("Use either LIMIT/OFFSET or PAGE/SIZE, not both.")
+            page = positive_integer(clauses["PAGE"], "PAGE")
+            size = positive_integer(clauses["SIZE"], "SIZE")
+            parsed["limit"] = size
+            parsed["offset"] = (page - 1) * size
+            parsed["page"] = page
+            page_start = next(match[0] for match in matches if match[2].upper() == "PAGE")
+            parsed["base"] = arguments[:page_start]
+        return parsed
+
+    def _output(self):
+        return self.output or sys.stdout
+
+    def _result_writer(self, column_names, output_format=None):
+        """Return a writer rendering one result set in the configured format."""
+
+        writer = _RESULT_WRITERS.get(output_format or self.output_format)
+        if writer is None:
+            return _TextResult(self.term, self._output(), column_names)
+        return writer(self._output(), column_names)
+
+    def _display_rows(self, column_names, rows, output_format=None):
+        writer = self._result_writer(column_names, output_format)
+        writer.write(rows)
+        writer.close()
+
+    def _list_columns(self, options):
+        """Return the columns LIST displays, checking every named column exists."""
+
+        requested_columns = options["columns"]
+        available_columns = self._active_table_columns()
+        missing_columns = [
+            column for column in requested_columns if column not in available_columns
+        ]
+        if missing_columns:
+            raise LookupError(
+                f"Column(s) not found in '{self.active_table}': " + ", ".join(missing_columns)
+            )
+        if options["order_by"] and options["order_by"][0] not in available_columns:
+            raise LookupError(
+                f"Column '{options['order_by'][0]}' not found in '{self.active_table}'."
+            )
+        return requested_columns or available_columns
+
+    def _build_list_query(self, arguments):
+        """Return LIST's columns, SELECT statement, parameters, filter/order, and paging."""
+
+        options = self._parse_list_arguments(arguments)
+        column_names = self._list_columns(options)
+        select_columns = ", ".join(_quote_identifier(column) for column in column_names)
+        query = f"SELECT {select_columns} FROM {_quote_identifier(self.active_table)}"
+        condition, params = None, ()
+        if options["where"]:
+            condition, params = _parameterize_condition(options["where"])
+            query += f" WHERE {condition}"
+        if options["order_by"]:
+            column, direction = options["order_by"]
+            query += f" ORDER BY {_quote_identifier(column)} {direction}"
+        elif self._order_sql:
+            query += f" ORDER BY {self._order_sql}"
+        if options["limit"] is not None:
+            query += f" LIMIT {options['limit']} OFFSET {options['offset']}"
+        paging = (options["base"].strip(), options["page"], options["limit"])
+        return (
+            column_names,
+            query,
+            params,
+            (condition, options["order_by"]),
+            paging if options["page"] else None,
+        )
+
+    def _build_page_query(self, arguments):
+        """Return a ``_PageQuery`` for LIST ``arguments`` without PAGE/SIZE.
+
+        Pages are ordered by the ORDER BY column, or the column of a one-column
+        SET ORDER TO index, and then by rowid, so a page can start right after
+        the previous page's last key. Keyset paging is not possible for WITHOUT
+        ROWID tables or a SET ORDER TO index with several columns, expressions,
+        or a collation; those pages fall back to OFFSET.
+        """
+
+        options = self._parse_list_arguments(arguments)
+        if options["limit"] is not None:
+            raise ValueError("Use either LIMIT/OFFSET or PAGE/SIZE, not both.")
+        column_names = self._list_columns(options)
+        order_column, descending = None, False
+        if options["order_by"]:
+            order_column, descending = options["order_by"][0], options["order_by"][1] == "DESC"
+        elif self._order_sql:
+            order_column, descending = _single_column_order(self._order_sql) or (None, False)
+        table_sql = self.catalog.table_sql(self.active_table) or ""
+        keyset = (
+            (options["order_by"] or not self._order_sql or order_column)
+            and not re.search(r"\bWITHOUT\s+ROWID\b", table_sql, re.I)
+        )
+        select_columns = [_quote_identifier(column) for column in column_names]
+        if keyset:
+            select_columns += ([_quote_identifier(order_column)] if order_column else []) + [
+                "rowid"
+            ]
+        select = (
+            f"SELECT {', '.join(select_columns)} FROM {_quote_identifier(self.active_table)}"
+        )
+        condition, params = None, ()
+        if options["where"]:
+            condition, params = _parameterize_condition(options["where"])
+        return _PageQuery(
+            column_names,
+            select,
+            condition,
+            params,
+            options["order_by"],
+            order_column,
+            descending,
+            bool(keyset),
+        )
+
+    def _page_queries(self, spec, page, size, key, backward):
+        """Return ``(sql, params)`` queries that together fetch ``size + 1`` rows of a page.
+
+        Without ``key`` the page is reached with OFFSET in one query; with it,
+        one query per range returned by ``_seek_conditions``.
+        """
+
+        descending = spec.descending != backward
+        seeks = [(None, ())]
+        if key is not None:
+            seeks = _seek_conditions(spec.order_column, descending, key)
+        return [
+            self._page_sql(spec, page, size, key, descending, seek, seek_params)
+            for seek, seek_params in seeks
+        ]
+
+    def _page_sql(self, spec, page, size, key, descending, seek, seek_params):
+        clauses = [f"({spec.condition})"] if spec.condition else []
+        if seek:
+            clauses.append(f"({seek})")
+        query = spec.select + (" WHERE " + " AND ".join(clauses) if clauses else "")
+        if spec.keyset:
+            direction = "DESC" if descending else "ASC"
+            order = [f"rowid {direction}"]
+            if spec.order_column:
+                order.insert(0, f"{_quote_identifier(spec.order_column)} {direction}")
+            query += " ORDER BY " + ", ".join(order)
+        elif spec.order_by:
+            query += f" ORDER BY {_quote_identifier(spec.order_by[0])} {spec.order_by[1]}"
+        elif self._order_sql:
+            query += f" ORDER BY {self._order_sql}"
+        query += f" LIMIT {size + 1}"
+        if key is None and page > 1:
+            query += f" OFFSET {(page - 1) * size}"
+        return query, tuple(spec.params) + tuple(seek_params)
+
+    def list_page(self, arguments="", token=None, display=False):
+        """Return one LIST page as ``ListPage(rows, page, next, previous)``.
+
+        Start with ``PAGE <n> SIZE <k>`` in ``arguments``; ``next`` and
+        ``previous`` are opaque tokens for the neighbouring pages (``None`` at
+        either end) to pass back as ``token``. A neighbouring page seeks past
+        the last ORDER BY key and rowid instead of skipping rows with OFFSET,
+        so it costs the same at any depth. Returns ``None`` after an error.
+        """
+
+        if self.active_table is None:
+            self._error("No table selected. Use 'USE <table>' first.")
+            return None
+        if token is not None:
+            try:
+                state = _decode_page_token(token)
+            except ValueError as error:
+                self._error(f"ERROR: {error}")
+                return None
+        else:
+            try:
+                _, _, _, _, paging = self._cached_statement(
+                    "LIST", (arguments or "").strip(), self._build_list_query
+                )
+            except LookupError as warning:
+                self._error(f"WARNING: {warning}")
+                return None
+            except (ValueError, sqlite3.Error) as error:
+                self._error(f"SQL Error: {error}")
+                return None
+            if paging is None:
+                self._error("Use: LIST [<cols>] [WHERE ...] [ORDER BY ...] PAGE <n> SIZE <k>")
+                return None
+            state = self._page_state(paging)
+        return self._list_page(state, display)
+
+    def _page_state(self, paging):
+        """Return the state for ``PAGE n``; it seeks from the last page when adjacent to it."""
+
+        base, page, size = paging
+        state = {"table": self.active_table, "arguments": base, "size": size, "page": page}
+        last = self._list_state
+        if (
+            last is not None
+            and all(last[name] == state[name] for name in ("table", "arguments", "size"))
+            and abs(page - last["page"]) == 1
+        ):
+            return dict(last, move="next" if page > last["page"] else "prev")
+        return state
+
+    def _list_page(self, state, display):
+        if state["table"] != self.active_table:
+            self._error(f"The page belongs to table '{state['table']}'. Use 'USE' to select it.")
+            return None
+        move = state.get("move")
+        try:
+            spec = self._cached_statement("PAGE", state["arguments"], self._build_page_query)
+        except LookupError as warning:
+            self._error(f"WARNING: {warning}")
+            return None
+        except (ValueError, sqlite3.Error) as error:
+            self._error(f"SQL Error: {error}")
+            return None
+        page, size, key = state["page"], state["size"], None
+        if move == "next":
+            page, key = page + 1, state.get("last")
+        elif move == "prev":
+            page, key = page - 1, state.get("first")
+        if page < 1 or size < 1:
+            self._error("There is no page before the first page.")
+            return None
+        if not spec.keyset:
+            key = None
+        elif not _valid_page_key(key, 2 if spec.order_column else 1):
+            self._error("ERROR: Invalid page token.")
+            return None
+        backward = move == "prev" and key is not None
+
+        try:
+            started = time.perf_counter()
+            fetched = []
+            for query, params in self._page_queries(spec, page, size, key, backward):
+                if len(fetched) > size:
+                    break
+                fetched += self._read(query, params)[: size + 1 - len(fetched)]
+            self._record_predicate(
+                self.active_table,
+                spec.condition,
+                spec.order_by,
+                spec.params,
+                time.perf_counter() - started,
+            )
+        except sqlite3.Error as error:
+            self._error(f"SQL Error: {error}")
+            return None
+        more = len(fetched) > size
+        fetched = fetched[:size]
+        if backward:
+            fetched.reverse()
+        if not fetched:
+            if display and move is None:
+                print(f"No records found in '{self.active_table}'.")
+            elif display:
+                print("No more records.")
+            return ListPage([], page, None, None)
+
+        count = len(spec.columns)
+        rows = [row[:count] for row in fetched] if spec.keyset else fetched
+        state = {
+            "table": self.active_table,
+            "arguments": state["arguments"],
+            "size": size,
+            "page": page,
+            "first": _page_key(fetched[0][count:]) if spec.keyset else None,
+            "last": _page_key(fetched[-1][count:]) if spec.keyset else None,
+        }
+        self._list_state = state
+        has_next = True if backward else more
+        has_previous = more if backward else page > 1
+        result = ListPage(
+            rows,
+            page,
+            _encode_page_token(dict(state, move="next")) if has_next else None,
+            _encode_page_token(dict(state, move="prev")) if has_previous else None,
+        )
+        self._stats["rows_read"] += len(rows)
+        if display:
+            with self._timed("render"):
+                self._display_rows(spec.columns, rows)
+            print(f"Page {page}" + (", LIST NEXT for more." if has_next else ", last page."))
+        return result
+
+    def _continue_list(self, move, display):
+        if self._list_state is None:
+            self._error("No LIST page to continue. Use LIST ... PAGE <n> SIZE <k> first.")
+            return None
+        return self._list_page(dict(self._list_state, move=move), display)
+
+    def iter_list(self, arguments="", display=False):
+        """Yield LIST rows lazily, fetching ``fetch_size`` rows at a time.
+
+        With ``display`` enabled every chunk is printed as soon as it arrives, so
+        the first rows appear before SQLite has produced the complete result.
+        """
+
+        if self.active_table is None:
+            self._error("No table selected. Use 'USE <table>' first.")
+            return
+        if isinstance(arguments, (list, tuple)):
+            arguments = " ".join(arguments)
+        move = (arguments or "").strip().upper()
+        if move in ("NEXT", "PREV"):
+            page = self._continue_list(move.lower(), display)
+            yield from page.rows if page else ()
+            return
+        try:
+            column_names, query, params, predicate, paging = self._cached_statement(
+                "LIST", (arguments or "").strip(), self._build_list_query
+            )
+        except LookupError as warning:
+            self._error(f"WARNING: {warning}")
+            return
+        except (ValueError, sqlite3.Error) as error:
+            self._error(f"SQL Error: {error}")
+            return
+        if paging is not None:
+            page = self._list_page(self._page_state(paging), display)
+            yield from page.rows if page else ()
+            return
+
+        table_name = self.active_table
+        writer = self._result_writer(column_names) if display else None
+        cache, cached = self.result_cache, None
+        if cache is not None:
+            try:
+                stamp = self._data_stamp()
+            except sqlite3.Error as error:
+                self._error(f"SQL Error: {error}")
+                return
+            if stamp is None:
+                cache = None
+        if cache is not None:
+            key = _cache_key(query, params)
+            cached = cache.get(key, stamp)
+            self._stats["cache_hits" if cached is not None else "cache_misses"] += 1
+        if cached is not None:
+            for start in range(0, len(cached), self.fetch_size):
+                rows = cached[start : start + self.fetch_size]
+                if writer:
+                    with self._timed("render"):
+                        writer.write(rows)
+                self._stats["rows_read"] += len(rows)
+                yield from rows
+            if writer:
+                with self._timed("render"):
+                    writer.close()
+            if not cached and display:
+                print(f"No records found in '{table_name}'.")
+            return
+
+        elapsed = 0.0
+        count = 0
+        # Rows kept for the result cache until they outgrow a cache entry.
+        collected, collected_size = ([], 0) if cache is not None else (None, 0)
+        with self._reader() as connection:
+            cursor = connection.cursor()
+            try:
+                self._debug(query, params)
+                started = time.perf_counter()
+                cursor.execute(query, params)
+                elapsed += time.perf_counter() - started
+                self._add_timing("execute", elapsed)
+                while True:
+                    started = time.perf_counter()
+                    rows = cursor.fetchmany(self.fetch_size)
+                    seconds = time.perf_counter() - started
+                    elapsed += seconds
+                    self._add_timing("fetch", seconds)
+                    if not rows:
+                        break
+                    if collected is not None:
+                        collected += rows
+                        collected_size += _rows_size(rows)
+                        if collected_size > cache.max_bytes // 4:
+                            collected = None
+                    if writer:
+                        with self._timed("render"):
+                            writer.write(rows)
+                    count += len(rows)
+                    yield from rows
+                if collected is not None:
+                    cache.put(key, collected, stamp, collected_size)
+                if writer:
+                    with self._timed("render"):
+                        writer.close()
+                if not count and display:
+                    print(f"No records found in '{table_name}'.")
+            except sqlite3.Error as error:
+                self._error(f"SQL Error: {error}")
+            finally:
+                cursor.close()
+                self._stats["rows_read"] += count
+                self._record_predicate(table_name, *predicate, params, elapsed)
+
+    def cmd_list(self, arguments="", stream=False):
+        """Display LIST rows and return them, or a lazy iterator with ``stream``."""
+
+        rows = self.iter_list(arguments, display=True)
+        return rows if stream else list(rows)
+
+    def cmd_find(self, condition):
+        """Display the first active-table record matching a SQL condition."""
+
+        if self.active_table is None:
+            self._error("No table selected. Use 'USE <table>' first.")
+            return None
+        condition = (condition or "").strip()
+        if condition.upper().startswith("FOR "):
+            condition = condition[4:].strip()
+        if condition.upper().startswith("WHERE "):
+            condition = condition[6:].strip()
+        if not condition:
+            self._error("Missing condition. Use: FIND <condition> or LOCATE FOR <condition>")
+            return None
+        try:
+            columns, query, params, condition = self._cached_statement(
+                "FIND", condition, self._build_find_query
+            )
+            started = time.perf_counter()
+            rows = self._read(query, params)
+            self._record_predicate(
+                self.active_table, condition, None, params, time.perf_counter() - started
+            )
+            row = rows[0] if rows else None
+            if row is None:
+                print(f"No matching record found in '{self.active_table}'.")
+                return None
+            self._stats["rows_read"] += 1
+            with self._timed("render"):
+                self._display_rows(columns, [row])
             return row
         except sqlite3.Error as error:
-            print(f"SQL Error: {error}")
+            self._error(f"SQL Error: {error}")
+            return None
+
+    def _build_find_query(self, condition):
+        columns = self._active_table_columns()
+        condition, params = _parameterize_condition(condition)
+        query = (
+            f"SELECT {', '.join(_quote_identifier(column) for column in columns)} "
+            f"FROM {_quote_identifier(self.active_table)} WHERE {condition}"
+        )
+        if self._order_sql:
+            query += f" ORDER BY {self._order_sql}"
+        return columns, query + " LIMIT 1", params, condition
+
+    def _numeric_columns(self, table_name):
+        """Return the numeric columns that are not part of the primary key."""
+
+        numeric = ("INTEGER", "REAL", "NUMERIC")
+        return [
+            column.name
+            for column in self.catalog.columns(table_name)
+            if not column.primary_key and _column_affinity(column.type) in numeric
+        ]
+
+    def _build_aggregate_query(self, kind, arguments):
+        """Return COUNT/SUM/AVERAGE's result names, SELECT statement, parameters, and filter."""
+
+        columns_text, condition = _split_keyword(arguments, "FOR")
+        if columns_text is not None:
+            arguments = f"{columns_text} WHERE {condition}"
+        options = self._parse_list_arguments(arguments)
+        if options["order_by"] or options["limit"] is not None:
+            raise ValueError(f"{kind} accepts only FOR <condition> or WHERE <condition>.")
+        columns = options["columns"]
+        if kind == "COUNT":
+            if columns:
+                raise ValueError("Use: COUNT [FOR <condition>]")
+            names, expressions = ["count"], ["count(*)"]
+        else:
+            available_columns = self._active_table_columns()
+            missing_columns = [column for column in columns if column not in available_columns]
+            if missing_columns:
+                raise LookupError(
+                    f"Column(s) not found in '{self.active_table}': " + ", ".join(missing_columns)
+                )
+            names = columns or self._numeric_columns(self.active_table)
+            if not names:
+                raise LookupError(f"'{self.active_table}' has no numeric columns.")
+            template = "coalesce(sum({}), 0)" if kind == "SUM" else "avg({})"
+            expressions = [template.format(_quote_identifier(name)) for name in names]
+        query = f"SELECT {', '.join(expressions)} FROM {_quote_identifier(self.active_table)}"
+        condition, params = None, ()
+        if options["where"]:
+            condition, params = _parameterize_condition(options["where"])
+            query += f" WHERE {condition}"
+        return names, query, params, condition
+
+    def _aggregate(self, kind, arguments):
+        """Run COUNT, SUM, or AVERAGE in one SQLite query and display the result row."""
+
+        if self.active_table is None:
+            self._error("No table selected. Use 'USE <table>' first.")
+            return None
+        try:
+            names, query, params, condition = self._cached_statement(
+                kind,
+                (arguments or "").strip(),
+                lambda text: self._build_aggregate_query(kind, text),
+            )
+        except LookupError as warning:
+            self._error(f"WARNING: {warning}")
+            return None
+        except ValueError as error:
+            self._error(f"{kind.capitalize()} error: {error}")
+            return None
+        try:
+            started = time.perf_counter()
+            row = self._read(query, params)[0]
+            self._record_predicate(
+                self.active_table, condition, None, params, time.perf_counter() - started
+            )
+        except sqlite3.Error as error:
+            self._error(f"SQL Error: {error}")
+            return None
+        self._stats["rows_read"] += 1
+        with self._timed("render"):
+            self._display_rows(names, [row])
+        return row[0] if kind == "COUNT" else dict(zip(names, row))
+
+    def cmd_count(self, arguments=""):
+        """Return the number of active-table records, optionally ``FOR <condition>``."""
+
+        return self._aggregate("COUNT", arguments)
+
+    def cmd_sum(self, arguments=""):
+        """Return ``{column: total}`` for the given, or all numeric, columns."""
+
+        return self._aggregate("SUM", arguments)
+
+    def cmd_average(self, arguments=""):
+        """Return ``{column: average}``; averages are ``None`` when no record matches."""
+
+        return self._aggregate("AVERAGE", arguments)
+
+    def cmd_total(self, arguments):
+        """Run dBASE TOTAL ON <key> TO <table> [FIELDS <cols>] [FOR <condition>].
+
+        Creates ``<table>`` with one row per key value holding the sums of the
+        numeric columns (or the FIELDS columns), computed by one GROUP BY query.
+        Returns the number of rows created, or ``None`` after an error.
+        """
+
+        if self.active_table is None:
+            self._error("No table selected. Use 'USE <table>' first.")
+            return None
+        arguments = (arguments or "").strip()
+        clauses, condition = _split_keyword(arguments, "FOR")
+        if clauses is None:
+            clauses, condition = _split_keyword(arguments, "WHERE")
+        if clauses is None:
+            clauses, condition = arguments, None
+        match = re.fullmatch(r"ON\s+(\S+)\s+TO\s+(\S+)(?:\s+FIELDS\s+(.+))?", clauses, re.I | re.S)
+        if match is None:
+            self._error("Usage: TOTAL ON <key> TO <table> [FIELDS <cols>] [FOR <condition>]")
+            return None
+        key, target, fields = match.groups()
+        columns = {column.name: column.type for column in self.catalog.columns(self.active_table)}
+        fields = fields.replace(",", " ").split() if fields else [
+            name for name in self._numeric_columns(self.active_table) if name != key
+        ]
+        missing_columns = [name for name in [key] + fields if name not in columns]
+        if missing_columns:
+            self._error(
+                f"WARNING: Column(s) not found in '{self.active_table}': "
+                + ", ".join(missing_columns)
+            )
+            return None
+        if key in fields or not fields:
+            self._error("TOTAL needs numeric FIELDS other than the key column.")
+            return None
+        if not _valid_identifier(target):
+            self._error(f"Invalid table name '{target}'.")
+            return None
+        if self.table_exists(target):
+            self._error(f"Table '{target}' already exists.")
+            return None
+
+        definitions = ", ".join(
+            f"{_quote_identifier(name)} {columns[name]}".strip() for name in [key] + fields
+        )
+        sums = ", ".join(f"coalesce(sum({_quote_identifier(name)}), 0)" for name in fields)
+        query = (
+            f"INSERT INTO {_quote_identifier(target)} "
+            f"SELECT {_quote_identifier(key)}, {sums} FROM {_quote_identifier(self.active_table)}"
+        )
+        params = ()
+        if condition:
+            with self._timed("parse"):
+                condition, params = _parameterize_condition(condition)
+            query += f" WHERE {condition}"
+        query += f" GROUP BY {_quote_identifier(key)} ORDER BY {_quote_identifier(key)}"
+        try:
+            with self._savepoint("pydb_total"):
+                create = f"CREATE TABLE {_quote_identifier(target)} ({definitions})"
+                self._debug(create)
+                self.conn.execute(create)
+                self._debug(query, params)
+                started = time.perf_counter()
+                with self._timed("execute"):
+                    created = self.conn.execute(query, params).rowcount
+                self._record_predicate(
+                    self.active_table, condition, None, params, time.perf_counter() - started
+                )
+            self._schema_changed()
+            self._commit()
+        except sqlite3.Error as error:
+            self._error(f"SQL Error: {error}")
             return None
+        self._stats["rows_written"] += created
+        print(f"{created} record(s) totaled on '{key}' into '{target}'.")
+        return created
 
     def _parse_assignments(self, text, separator):
+        return self._cached_statement(
+            separator, text, lambda text: self._build_assignments(text, separator)
+        )
+
+    def _build_assignments(self, text, separator):
+        """Return ``(assignments, params)`` with literal values bound as ``?``."""
+
         columns = self._active_table_columns()
-        assignments = []
+        names, values = [], []
         for item in _split_sql_items(text):
             if separator == "=":
                 name, delimiter, value = item.partition("=")
@@ -566,91 +2731,298 @@ class Db3:
                 raise ValueError(f"Each assignment must use '<column> {separator} <value>'.")
             if name not in columns:
                 raise ValueError(f"Column '{name}' does not exist in '{self.active_table}'.")
-            assignments.append(f"{_quote_identifier(name)} = {value}")
-        return assignments
+            names.append(name)
+            values.append(value)
+        values, params = _parameterize_values(values)
+        assignments = [
+            f"{_quote_identifier(name)} = {value}" for name, value in zip(names, values)
+        ]
+        return assignments, params
 
-    def _change_matching_records(self, assignments, condition):
+    def _change_matching_records(self, assignments, params, condition):
         if not condition:
-            print("A WHERE/FOR condition is required to avoid updating every record.")
+            self._error("A WHERE/FOR condition is required to avoid updating every record.")
             return False
+        with self._timed("parse"):
+            condition, condition_params = _parameterize_condition(condition)
+        params += condition_params
         query = (
             f"UPDATE {_quote_identifier(self.active_table)} SET {', '.join(assignments)} "
             f"WHERE {condition}"
         )
         try:
-            self._debug(query)
-            self.cursor.execute(query)
-            self.conn.commit()
+            self._debug(query, params)
+            started = time.perf_counter()
+            with self._timed("execute"):
+                self.cursor.execute(query, params)
+            self._record_predicate(
+                self.active_table,
+                condition,
+                None,
+                condition_params,
+                time.perf_counter() - started,
+            )
+            with self._timed("execute"):
+                self._commit()
+            self._stats["rows_written"] += self.cursor.rowcount
             print(f"{self.cursor.rowcount} record(s) updated in '{self.active_table}'.")
             return True
         except sqlite3.Error as error:
-            print(f"SQL Error: {error}")
+            self._error(f"SQL Error: {error}")
             return False
 
     def cmd_update(self, arguments):
         """Run UPDATE SET ... WHERE ... against the active table."""
 
         if self.active_table is None:
-            print("No table selected. Use 'USE <table>' first.")
+            self._error("No table selected. Use 'USE <table>' first.")
+            return False
+        before_where, condition = _split_keyword(arguments or "", "WHERE")
+        set_match = re.fullmatch(r"SET\s+(.+)", before_where or "", re.I | re.S)
+        if before_where is None or set_match is None:
+            self._error("Usage: UPDATE SET <column>=<value> [, ...] WHERE <condition>")
+            return False
+        try:
+            assignments, params = self._parse_assignments(set_match.group(1).strip(), "=")
+        except ValueError as error:
+            self._error(f"Update error: {error}")
+            return False
+        return self._change_matching_records(assignments, params, condition)
+
+    def cmd_replace(self, arguments):
+        """Run dBASE-style REPLACE <column> WITH <value> FOR <condition>."""
+
+        if self.active_table is None:
+            self._error("No table selected. Use 'USE <table>' first.")
+            return False
+        assignments_text, condition = _split_keyword(arguments or "", "FOR")
+        if assignments_text is None:
+            self._error("Usage: REPLACE <column> WITH <value> [, ...] FOR <condition>")
+            return False
+        try:
+            assignments, params = self._parse_assignments(assignments_text, "WITH")
+        except ValueError as error:
+            self._error(f"Replace error: {error}")
+            return False
+        return self._change_matching_records(assignments, params, condition)
+
+    def cmd_struct(self):
+        if self.active_table is None:
+            self._error("No table selected. Use 'USE <table>' first.")
+            return
+        try:
+            columns = self.catalog.columns(self.active_table)
+            if not columns:
+                self._error(f"No columns found in '{self.active_table}'.")
+                return
+            self.term.y(f"Structure of '{self.active_table}':")
+            self.term.y(f"{'Column':<20}{'Type':<10}{'Primary Key'}")
+            print("-" * 40)
+            for column in columns:
+                print(
+                    f"{column[1]:<20}{column[2]:<10}"
+                    f"{'YES' if column[5] else 'NO'}"
+                )
+            indexes = self.catalog.indexes(self.active_table)
+            if indexes:
+                self.term.y(f"{'Index':<20}{'Unique':<10}{'Key'}")
+                print("-" * 40)
+                for index in indexes:
+                    marker = " (ORDER)" if index.name == self.order_tag else ""
+                    print(
+                        f"{index.name:<20}{'YES' if index.unique else 'NO':<10}"
+                        f"{_index_order_sql(index)}{marker}"
+                    )
+        except sqlite3.Error as error:
+            self._error(f"SQL Error: {error}")
+
+    def _active_index(self, tag):
+        for index in self.catalog.indexes(self.active_table):
+            if index.name == tag:
+                return index
+        return None
+
+    def cmd_index(self, arguments):
+        """Run dBASE-style INDEX ON <columns> TAG <name> [UNIQUE]."""
+
+        if self.active_table is None:
+            self._error("No table selected. Use 'USE <table>' first.")
+            return False
+        match = re.fullmatch(
+            r"ON\s+(.+?)\s+TAG\s+([A-Za-z_][A-Za-z0-9_]*)(\s+UNIQUE)?",
+            (arguments or "").strip(),
+            re.I | re.S,
+        )
+        if match is None:
+            self._error("Usage: INDEX ON <column>[, ...] TAG <name> [UNIQUE]")
+            return False
+        expression, tag, unique = match.groups()
+        columns = self._active_table_columns()
+        try:
+            keys = []
+            for item in _split_sql_items(expression):
+                parts = item.split()
+                if len(parts) <= 2 and _valid_identifier(parts[0]) and (
+                    len(parts) == 1 or parts[1].upper() in ("ASC", "DESC")
+                ):
+                    if parts[0] not in columns:
+                        raise ValueError(
+                            f"Column '{parts[0]}' does not exist in '{self.active_table}'."
+                        )
+                    parts = [_quote_identifier(parts[0])] + [part.upper() for part in parts[1:]]
+                    item = " ".join(parts)
+                keys.append(item)
+        except ValueError as error:
+            self._error(f"Index error: {error}")
+            return False
+        query = (
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX {_quote_identifier(tag)} "
+            f"ON {_quote_identifier(self.active_table)} ({', '.join(keys)})"
+        )
+        if self.execute(query) is None:
+            return False
+        print(f"Index tag '{tag}' created on '{self.active_table}'.")
+        return True
+
+    def cmd_reindex(self, tag=""):
+        """Rebuild one index tag, or every index of the active table."""
+
+        tag = (tag or "").strip()
+        if self.active_table is None:
+            self._error("No table selected. Use 'USE <table>' first.")
+            return False
+        if tag and self._active_index(tag) is None:
+            self._error(f"Index tag '{tag}' does not exist on '{self.active_table}'.")
+            return False
+        if self.execute(f"REINDEX {_quote_identifier(tag or self.active_table)}") is None:
+            return False
+        print(f"Index(es) of '{self.active_table}' rebuilt.")
+        return True
+
+    def cmd_delete_tag(self, tag):
+        """Remove an index tag created on the active table."""
+
+        tag = (tag or "").strip()
+        if self.active_table is None:
+            self._error("No table selected. Use 'USE <table>' first.")
             return False
-        before_where, condition = _split_keyword(arguments or "", "WHERE")
-        set_match = re.fullmatch(r"SET\s+(.+)", before_where or "", re.I | re.S)
-        if before_where is None or set_match is None:
-            print("Usage: UPDATE SET <column>=<value> [, ...] WHERE <condition>")
+        index = self._active_index(tag)
+        if index is None or index.origin != "c":
+            self._error(f"Index tag '{tag}' does not exist on '{self.active_table}'.")
             return False
-        try:
-            assignments = self._parse_assignments(set_match.group(1).strip(), "=")
-        except ValueError as error:
-            print(f"Update error: {error}")
+        if self.execute(f"DROP INDEX {_quote_identifier(tag)}") is None:
             return False
-        return self._change_matching_records(assignments, condition)
+        if self.order_tag == tag:
+            self.order_tag = self._order_sql = None
+        print(f"Index tag '{tag}' removed.")
+        return True
 
-    def cmd_replace(self, arguments):
-        """Run dBASE-style REPLACE <column> WITH <value> FOR <condition>."""
+    def set_order(self, tag=None):
+        """Make LIST and FIND follow an index tag; ``None`` restores natural order."""
 
         if self.active_table is None:
-            print("No table selected. Use 'USE <table>' first.")
-            return False
-        assignments_text, condition = _split_keyword(arguments or "", "FOR")
-        if assignments_text is None:
-            print("Usage: REPLACE <column> WITH <value> [, ...] FOR <condition>")
+            self._error("No table selected. Use 'USE <table>' first.")
             return False
+        if not tag:
+            self.order_tag = self._order_sql = None
+            print("Natural order restored.")
+            return True
         try:
-            assignments = self._parse_assignments(assignments_text, "WITH")
-        except ValueError as error:
-            print(f"Replace error: {error}")
+            index = self._active_index(tag)
+        except sqlite3.Error as error:
+            self._error(f"SQL Error: {error}")
+            return False
+        if index is None:
+            self._error(f"Index tag '{tag}' does not exist on '{self.active_table}'.")
             return False
-        return self._change_matching_records(assignments, condition)
+        self.order_tag, self._order_sql = tag, _index_order_sql(index)
+        print(f"Order set to index tag '{tag}'.")
+        return True
+
+    def _apply_pragmas(self, pragmas):
+        """Set validated PRAGMAs and record the values SQLite reports back."""
+
+        for name, value in pragmas.items():
+            query = f"PRAGMA {name} = {value}"
+            self._debug(query)
+            self.conn.execute(query).fetchall()
+            self.pragmas[name] = self.conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+    def set_pragmas(self, profile):
+        """Switch to a preset name or an object of PRAGMA settings at runtime.
+
+        Returns the values now in effect, or ``None`` after reporting an error.
+        Journal mode and page size cannot change inside BEGIN ... COMMIT.
+        """
 
-    def cmd_struct(self):
-        if self.active_table is None:
-            print("No table selected. Use 'USE <table>' first.")
-            return
         try:
-            self.cursor.execute(f"PRAGMA table_info({_quote_identifier(self.active_table)})")
-            columns = self.cursor.fetchall()
-            if not columns:
-                print(f"No columns found in '{self.active_table}'.")
-                return
-            self.term.y(f"Structure of '{self.active_table}':")
-            self.term.y(f"{'Column':<20}{'Type':<10}{'Primary Key'}")
-            print("-" * 40)
-            for column in columns:
-                print(
-                    f"{column[1]:<20}{column[2]:<10}"
-                    f"{'YES' if column[5] else 'NO'}"
-                )
+            pragmas = pragma_profile(profile)
+        except ValueError as error:
+            self._error(f"ERROR: {error}")
+            return None
+        if self._explicit_transaction and {"journal_mode", "page_size"} & set(pragmas):
+            self._error("Cannot change journal_mode or page_size inside a transaction.")
+            return None
+        self._commit()
+        try:
+            self._apply_pragmas(pragmas)
         except sqlite3.Error as error:
-            print(f"SQL Error: {error}")
+            self._error(f"SQL Error: {error}")
+            return None
+        return {name: self.pragmas[name] for name in pragmas}
+
+    def cmd_set(self, arguments):
+        """Dispatch SET ORDER TO, SET PROFILE, SET PRAGMA, and SET TIMING options."""
+
+        arguments = (arguments or "").strip()
+        match = re.fullmatch(r"ORDER\s+TO(?:\s+(\S+))?", arguments, re.I)
+        if match:
+            return self.set_order(match.group(1))
+        match = re.fullmatch(r"TIMING\s+(ON|OFF)", arguments, re.I)
+        if match:
+            self.timing = match.group(1).upper() == "ON"
+            print("Timing enabled." if self.timing else "Timing disabled.")
+            return True
+        match = re.fullmatch(r"PROFILE\s+(\w+)", arguments, re.I)
+        if match:
+            profile = match.group(1).lower()
+        else:
+            match = re.fullmatch(r"PRAGMA(?:\s+(\w+)\s*(?:=|\s+TO\s+)\s*(\S+))?", arguments, re.I)
+            if match is None:
+                self._error(
+                    "Usage: SET ORDER TO [<tag>] | SET PROFILE <name> "
+                    "| SET PRAGMA [<name> TO <value>] | SET TIMING ON|OFF"
+                )
+                return False
+            if match.group(1) is None:
+                for name in PRAGMA_SETTINGS:
+                    value = self.conn.execute(f"PRAGMA {name}").fetchone()[0]
+                    print(f"{name:<14}{value}")
+                return True
+            profile = {match.group(1).lower(): match.group(2)}
+        applied = self.set_pragmas(profile)
+        if applied is None:
+            return False
+        for name, value in applied.items():
+            print(f"PRAGMA {name} = {value}")
+        return True
+
+    def modify_table(self, action, column_name, column_type=None, progress=None):
+        """Add or drop a column of the active table.
+
+        Dropping uses ``ALTER TABLE ... DROP COLUMN`` where SQLite allows it and
+        otherwise rebuilds the table, keeping its constraints, indexes, and
+        triggers. A progress bar is shown on interactive terminals during a
+        rebuild unless ``progress`` is explicitly disabled.
+        """
 
-    def modify_table(self, action, column_name, column_type=None):
         if self.active_table is None:
-            print("No table selected. Use 'USE <table>' first.")
+            self._error("No table selected. Use 'USE <table>' first.")
             return
         action = action.upper()
         if action == "ADD":
             if not column_name or not column_type:
-                print("Usage: MODIF ADD <column_name> <column_type>")
+                self._error("Usage: MODIF ADD <column_name> <column_type>")
                 return
             query = (
                 f"ALTER TABLE {_quote_identifier(self.active_table)} "
@@ -661,72 +3033,351 @@ class Db3:
             return
 
         if action != "DROP":
-            print("Usage: MODIF ADD <column_name> <column_type>")
+            self._error("Usage: MODIF ADD <column_name> <column_type>")
+            return
+
+        table_name = self.active_table
+        columns = self._active_table_columns()
+        if column_name not in columns:
+            self._error(f"Column '{column_name}' does not exist in '{table_name}'.")
             return
+        if len(columns) <= 2:
+            self._error("Cannot drop the last column (except primary key).")
+            return
+
+        if self.migrate(table_name, [("DROP", column_name)], progress=progress):
+            print(f"Column '{column_name}' removed from '{table_name}'.")
 
+    def cmd_modif(self, arguments):
+        """Run MODIF ADD/DROP/RENAME/ALTER, or collect them between BEGIN and APPLY."""
+
+        parameters = (arguments or "").split()
+        action = parameters[0].upper() if parameters else ""
+        if action in ("BEGIN", "APPLY", "CANCEL") and len(parameters) == 1:
+            return self._modif_block(action)
         try:
-            columns = self._active_table_columns()
-            if column_name not in columns:
-                print(f"Column '{column_name}' does not exist in '{self.active_table}'.")
-                return
-            if len(columns) <= 2:
-                print("Cannot drop the last column (except primary key).")
-                return
+            operation = _migration_operation(parameters)
+        except ValueError as error:
+            self._error(str(error))
+            return False
+        if self._pending_migration is not None:
+            self._pending_migration[1].append(operation)
+            print(f"{operation[0]} {operation[1]} queued; MODIF APPLY runs the changes.")
+            return True
+        if operation[0] in ("ADD", "DROP"):
+            self.modify_table(*operation)
+            return True
+        if self.active_table is None:
+            self._error("No table selected. Use 'USE <table>' first.")
+            return False
+        if not self.migrate(self.active_table, [operation]):
+            return False
+        print(f"Table '{self.active_table}' modified.")
+        return True
+
+    def _modif_block(self, action):
+        if action == "BEGIN":
+            if self.active_table is None:
+                self._error("No table selected. Use 'USE <table>' first.")
+                return False
+            if self._pending_migration is not None:
+                self._error("A MODIF block is already open. Use MODIF APPLY or MODIF CANCEL.")
+                return False
+            self._pending_migration = (self.active_table, [])
+            print(f"Collecting changes to '{self.active_table}' until MODIF APPLY.")
+            return True
+        if self._pending_migration is None:
+            self._error("No MODIF block is open. Use MODIF BEGIN first.")
+            return False
+        table_name, operations = self._pending_migration
+        self._pending_migration = None
+        if action == "CANCEL":
+            print(f"{len(operations)} queued change(s) to '{table_name}' discarded.")
+            return True
+        if not self.migrate(table_name, operations):
+            return False
+        print(f"{len(operations)} change(s) applied to '{table_name}'.")
+        return True
+
+    def migrate(self, table_name, operations, skip_applied=False, progress=None):
+        """Apply several column changes to a table in one transaction.
 
-            remaining_columns = [column for column in columns if column != column_name]
-            temporary_table = f"{self.active_table}_new"
-            self.cursor.execute(
-                f"CREATE TABLE {_quote_identifier(temporary_table)} AS "
-                f"SELECT {', '.join(_quote_identifier(column) for column in remaining_columns)} "
-                f"FROM {_quote_identifier(self.active_table)}"
+        ``operations`` holds ``("ADD", column, type)``, ``("DROP", column)``,
+        ``("RENAME", column, new_name)``, and ``("TYPE", column, type)`` tuples or
+        the equivalent JSON objects, e.g. ``{"action": "rename", "field": "qty",
+        "to": "quantity"}``. Adds and renames, and drops SQLite accepts natively,
+        run as ``ALTER TABLE``; otherwise the table is rebuilt once for all of
+        them. With ``skip_applied`` operations already reflected in the schema
+        are ignored. Returns ``True`` on success; malformed operations raise
+        ``ValueError``.
+        """
+
+        operations = [_migration_operation(operation) for operation in operations]
+        if not self.table_exists(table_name):
+            self._error(f"Table '{table_name}' does not exist.")
+            return False
+        try:
+            table_columns, constraints, options = _table_definition(
+                self.catalog.table_sql(table_name)
             )
-            self.cursor.execute(f"DROP TABLE {_quote_identifier(self.active_table)}")
-            self.cursor.execute(
-                f"ALTER TABLE {_quote_identifier(temporary_table)} "
-                f"RENAME TO {_quote_identifier(self.active_table)}"
+            # Work out the final column list; ``source`` is the old column read.
+            columns = [
+                [name, definition, _quote_identifier(name)] for name, definition in table_columns
+            ]
+            renames, dropped, applied = {}, [], []
+            for operation in operations:
+                action, column_name = operation[:2]
+                names = [column[0] for column in columns]
+                if skip_applied and _migration_applied(operation, columns):
+                    continue
+                if action == "ADD":
+                    if column_name in names:
+                        raise ValueError(f"Column '{column_name}' already exists.")
+                    columns.append([column_name, operation[2], None])
+                    applied.append(operation)
+                    continue
+                if column_name not in names:
+                    raise ValueError(f"Column '{column_name}' does not exist.")
+                column = columns[names.index(column_name)]
+                original = next(
+                    (old for old, new in renames.items() if new == column_name), column_name
+                )
+                if action == "DROP":
+                    if column[2] is not None and any(
+                        _mentions_identifier(constraint, original) for constraint in constraints
+                    ):
+                        raise ValueError(
+                            f"Column '{column_name}' is used by a table constraint."
+                        )
+                    columns.remove(column)
+                    if column[2] is not None:
+                        dropped.append(original)
+                        renames.pop(original, None)
+                elif action == "RENAME":
+                    if operation[2] in names:
+                        raise ValueError(f"Column '{operation[2]}' already exists.")
+                    column[0] = operation[2]
+                    if column[2] is not None:
+                        renames[original] = operation[2]
+                else:
+                    column[1] = _replace_column_type(column[1], operation[2])
+                applied.append(operation)
+            if not columns:
+                raise ValueError("Cannot drop every column of a table.")
+        except ValueError as error:
+            self._error(f"ERROR: Cannot modify '{table_name}': {error}")
+            return False
+        if not applied:
+            return True
+
+        native = all(operation[0] in ("ADD", "RENAME") for operation in applied) or (
+            sqlite3.sqlite_version_info >= (3, 35, 0)
+            and all(operation[0] != "TYPE" for operation in applied)
+        )
+        if native:
+            try:
+                with self._savepoint("pydb_migrate"):
+                    for operation in applied:
+                        query = _alter_table_sql(table_name, operation)
+                        self._debug(query)
+                        self.cursor.execute(query)
+            except sqlite3.OperationalError as error:
+                # Indexed, UNIQUE, or PRIMARY KEY columns cannot be dropped in place.
+                self._debug(f"-- ALTER TABLE failed ({error}); rebuilding")
+            except sqlite3.Error as error:
+                self._error(f"SQL Error: {error}")
+                return False
+            else:
+                self._schema_changed()
+                self._commit()
+                return True
+
+        status = StatusLine() if (ansi_enabled() if progress is None else progress) else None
+
+        def show_progress(current, total):
+            status.update(f"Rebuilding '{table_name}' {progress_bar(current, total)}")
+
+        try:
+            self._rebuild_table(
+                table_name,
+                columns,
+                [_rename_identifiers(constraint, renames) for constraint in constraints],
+                options,
+                dropped=dropped,
+                renames=renames,
+                progress=show_progress if status else None,
             )
-            self.conn.commit()
-            print(f"Column '{column_name}' removed from '{self.active_table}'.")
+        except ValueError as error:
+            self._error(f"ERROR: Cannot modify '{table_name}': {error}")
+            return False
         except sqlite3.Error as error:
-            print(f"SQL Error: {error}")
+            self._error(f"SQL Error: {error}")
+            return False
+        finally:
+            if status:
+                status.finish()
+        return True
+
+    def _rebuild_table(
+        self, table_name, columns, constraints, options, dropped=(), renames=None, progress=None
+    ):
+        """Recreate a table with new column definitions and copy its rows in chunks.
+
+        ``columns`` lists ``(name, definition, source)`` where ``source`` is the
+        SQL expression read from the old table, or ``None`` to use the column
+        default. Table constraints, indexes, and triggers are recreated with
+        ``renames`` applied, except for indexes on ``dropped`` columns. Rows keep
+        their rowid. Returns the number of copied rows.
+        """
+
+        quoted = _quote_identifier(table_name)
+        rebuilt = _quote_identifier(f"{table_name}_rebuild")
+        items = [
+            f"{_quote_identifier(name)} {definition}".rstrip() for name, definition, _ in columns
+        ]
+        create = f"CREATE TABLE {rebuilt} ({', '.join(items + list(constraints))}) {options}"
+        copied = [(name, source) for name, _, source in columns if source is not None]
+        target = ", ".join(_quote_identifier(name) for name, _ in copied)
+        select = ", ".join(source for _, source in copied)
+        indexes = [
+            index
+            for index in self.catalog.indexes(table_name)
+            if index.sql and not set(dropped) & set(index.columns)
+        ]
+        triggers = [
+            sql
+            for (sql,) in self.conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?",
+                (table_name,),
+            )
+        ]
+        without_rowid = re.search(r"\bWITHOUT\s+ROWID\b", options, re.I) is not None
+        total = self.conn.execute(f"SELECT count(*) FROM {quoted}").fetchone()[0]
+
+        # Foreign keys can only be switched off outside a transaction; dropping
+        # the old table would otherwise cascade into referencing tables.
+        self._commit()
+        foreign_keys = self.conn.execute("PRAGMA foreign_keys").fetchone()[0]
+        if foreign_keys and self.conn.in_transaction:
+            raise ValueError(
+                "the table must be rebuilt, which is not possible inside an open "
+                "transaction. COMMIT first."
+            )
+        if foreign_keys:
+            self.conn.execute("PRAGMA foreign_keys = OFF")
+        cursor = self.conn.cursor()
+        copied_rows = 0
+        try:
+            with self._savepoint("pydb_rebuild"):
+                self._debug(create)
+                cursor.execute(create)
+                if without_rowid and copied:
+                    cursor.execute(
+                        f"INSERT INTO {rebuilt} ({target}) SELECT {select} FROM {quoted}"
+                    )
+                    copied_rows = total
+                elif copied:
+                    insert = (
+                        f"INSERT INTO {rebuilt} (rowid, {target}) SELECT rowid, {select} "
+                        f"FROM {quoted} WHERE rowid >= ? AND rowid <= ?"
+                    )
+                    bounds = (
+                        f"SELECT min(rowid), max(rowid) FROM (SELECT rowid FROM {quoted} "
+                        "WHERE rowid > ? ORDER BY rowid LIMIT ?)"
+                    )
+                    first = f"SELECT min(rowid) - 1 FROM {quoted}"
+                    last = cursor.execute(first).fetchone()[0]
+                    while last is not None:
+                        lower, upper = cursor.execute(
+                            bounds, (last, REBUILD_CHUNK_SIZE)
+                        ).fetchone()
+                        if upper is None:
+                            break
+                        cursor.execute(insert, (lower, upper))
+                        copied_rows += cursor.rowcount
+                        last = upper
+                        if progress:
+                            progress(copied_rows, total)
+                cursor.execute(f"DROP TABLE {quoted}")
+                legacy = cursor.execute("PRAGMA legacy_alter_table").fetchone()[0]
+                cursor.execute("PRAGMA legacy_alter_table = ON")
+                try:
+                    cursor.execute(f"ALTER TABLE {rebuilt} RENAME TO {quoted}")
+                finally:
+                    cursor.execute(f"PRAGMA legacy_alter_table = {int(legacy)}")
+                for sql in [index.sql for index in indexes] + triggers:
+                    cursor.execute(_rename_identifiers(sql, renames or {}))
+                if foreign_keys and cursor.execute("PRAGMA foreign_key_check").fetchone():
+                    raise sqlite3.IntegrityError("FOREIGN KEY constraint failed")
+        finally:
+            cursor.close()
+            if foreign_keys:
+                self.conn.execute("PRAGMA foreign_keys = ON")
+            self._schema_changed()
+        self._commit()
+        return copied_rows
 
     def cmd_delete(self, condition):
         if self.active_table is None:
-            print("No table selected. Use 'USE <table>' first.")
+            self._error("No table selected. Use 'USE <table>' first.")
             return
         if not condition:
-            print("Missing condition for DELETE. Use: DELETE WHERE <condition>")
+            self._error("Missing condition for DELETE. Use: DELETE WHERE <condition>")
             return
         query = f"DELETE FROM {_quote_identifier(self.active_table)} {condition}"
-        if self.execute(query) is not None:
+        params = ()
+        where_match = re.fullmatch(r"WHERE\s+(.+)", condition.strip(), re.I | re.S)
+        if where_match:
+            with self._timed("parse"):
+                condition, params = _parameterize_condition(where_match.group(1))
+            query = f"DELETE FROM {_quote_identifier(self.active_table)} WHERE {condition}"
+        started = time.perf_counter()
+        if self.execute(query, params) is not None:
+            if where_match:
+                self._record_predicate(
+                    self.active_table, condition, None, params, time.perf_counter() - started
+                )
             print(f"Record(s) deleted from '{self.active_table}'.")
 
+    @staticmethod
+    def _parameterize_insert(values):
+        """Bind the literals of ``(columns) VALUES (values)``; return ``(sql, params)``."""
+
+        columns, row = _split_keyword(values, "VALUES")
+        if columns is None or not (row.startswith("(") and row.endswith(")")):
+            return values, ()
+        try:
+            items = _split_sql_items(row[1:-1])
+        except ValueError:
+            return values, ()
+        items, params = _parameterize_values(items, double_quoted=True)
+        return f"{columns} VALUES ({', '.join(items)})", params
+
     def cmd_insert(self, values):
         if self.active_table is None:
-            print("No table selected. Use 'USE <table>' first.")
+            self._error("No table selected. Use 'USE <table>' first.")
             return
         if not values:
-            print("Missing values for INSERT.")
+            self._error("Missing values for INSERT.")
             return
 
         expected_intro = f"INTO {self.active_table}".upper()
         if values.upper().startswith(expected_intro):
             values = values[len(expected_intro):].strip()
+        with self._timed("parse"):
+            values, params = self._parameterize_insert(values)
         query = f"INSERT INTO {_quote_identifier(self.active_table)} {values}"
-        if self.execute(query) is not None:
+        if self.execute(query, params) is not None:
             print(f"Record inserted into '{self.active_table}'.")
 
     def cmd_drop(self, table_name):
         if not table_name:
-            print("Table name is missing.")
+            self._error("Table name is missing.")
             return
         if not self.table_exists(table_name):
-            print(f"Table '{table_name}' does not exist.")
+            self._error(f"Table '{table_name}' does not exist.")
             return
-        confirm = input(
-            f"Are you sure you want to drop table '{table_name}'? (Y/N): "
-        ).strip().upper()
-        if confirm != "Y":
+        if not self.confirm(f"Are you sure you want to drop table '{table_name}'? (Y/N): "):
             print(f"Operation cancelled. Table '{table_name}' was not dropped.")
             return
         query = f"DROP TABLE {_quote_identifier(table_name)}"
@@ -735,91 +3386,539 @@ class Db3:
                 self.active_table = None
             print(f"Table '{table_name}' dropped.")
 
-    def export(self, table_name, filename, file_format):
-        """Export one table to CSV, JSON, or XML."""
-
-        try:
-            self.cursor.execute(f"SELECT * FROM {_quote_identifier(table_name)}")
-            rows = self.cursor.fetchall()
-            column_names = [description[0] for description in self.cursor.description]
-        except sqlite3.Error as error:
-            print(f"SQL Error: {error}")
-            return
+    def export(self, table_name, filename, file_format, progress=None):
+        """Stream one table to CSV, JSON, NDJSON, or XML and return the row count.
 
-        if not rows:
-            print(f"WARNING: No data found in '{table_name}', nothing to export.")
-            return
+        A progress bar is shown on interactive terminals unless ``progress`` is
+        explicitly disabled.
+        """
 
         file_path = os.path.join(self.export_dir, filename)
         file_format = file_format.lower()
+        if file_format not in _EXPORT_WRITERS:
+            self._error(
+                f"ERROR: Unsupported file format '{file_format}'. "
+                "Use csv, json, ndjson, or xml."
+            )
+            return None
+        status = StatusLine() if (ansi_enabled() if progress is None else progress) else None
+
+        def show_progress(current, total):
+            status.update(f"Exporting '{table_name}' {progress_bar(current, total)}")
+
         try:
-            if file_format == "csv":
-                with open(file_path, "w", newline="", encoding="utf-8") as export_file:
-                    writer = csv.writer(export_file)
-                    writer.writerow(column_names)
-                    writer.writerows(rows)
-            elif file_format == "json":
-                data = [dict(zip(column_names, row)) for row in rows]
-                with open(file_path, "w", encoding="utf-8") as export_file:
-                    json.dump(data, export_file, indent=4, ensure_ascii=False)
-            elif file_format == "xml":
-                root = ET.Element("table", name=table_name)
-                for row in rows:
-                    row_element = ET.SubElement(root, "row")
-                    for column_name, value in zip(column_names, row):
-                        column_element = ET.SubElement(row_element, column_name)
-                        column_element.text = "" if value is None else str(value)
-                xml_text = ET.tostring(root, encoding="unicode")
-                with open(file_path, "w", encoding="utf-8") as export_file:
-                    export_file.write('<?xml version="1.0" encoding="utf-8"?>\n')
-                    export_file.write(xml_text.replace("</row>", "</row>\n"))
-            else:
-                print(
-                    f"ERROR: Unsupported file format '{file_format}'. "
-                    "Use csv, json, or xml."
+            with self._reader() as connection:
+                exported = export_table(
+                    connection,
+                    table_name,
+                    file_path,
+                    file_format,
+                    self.fetch_size,
+                    show_progress if status else None,
                 )
-                return
+        except sqlite3.Error as error:
+            self._error(f"SQL Error: {error}")
+            return None
         except OSError as error:
-            print(f"ERROR: Failed to export {file_format.upper()}: {error}")
-            return
+            self._error(f"ERROR: Failed to export {file_format.upper()}: {error}")
+            return None
+        finally:
+            if status:
+                status.finish()
 
+        self._count_export(exported, file_path)
+        if not exported:
+            print(f"WARNING: No data found in '{table_name}', nothing to export.")
+            return 0
         print(f"SUCCESS: Data exported to '{file_path}' in {file_format.upper()} format.")
+        return exported
+
+    def _count_export(self, rows, file_path):
+        self._stats["rows_read"] += rows
+        if rows and os.path.exists(file_path):
+            self._stats["bytes_exported"] += os.path.getsize(file_path)
+
+    def export_all(self, directory, file_format="csv", workers=None, progress=None):
+        """Export every table to ``directory`` and return the row count per table.
+
+        Tables are spread over ``workers`` processes (default: the CPU count),
+        each reading through its own read-only connection, and an aggregate
+        progress bar is shown on interactive terminals. A relative
+        ``directory`` is created below the export directory. An in-memory
+        database is exported in this process. Tables that fail are reported and
+        left out of the result.
+        """
+
+        file_format = (file_format or "").lower()
+        if file_format not in _EXPORT_WRITERS:
+            self._error(
+                f"ERROR: Unsupported file format '{file_format}'. Use csv, json, ndjson, or xml."
+            )
+            return None
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if not isinstance(workers, int) or workers < 1:
+            self._error("ERROR: WORKERS must be a positive integer.")
+            return None
+        tables = self.catalog.tables()
+        if not tables:
+            print("No tables found.")
+            return {}
+        directory = os.path.join(self.export_dir, directory)
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as error:
+            self._error(f"ERROR: Cannot create '{directory}': {error}")
+            return None
+        self._commit()
+        extension = {"csv": ".csv", "json": ".json", "ndjson": ".ndjson", "xml": ".xml"}
+        paths = {table: os.path.join(directory, table + extension[file_format]) for table in tables}
+
+        status = StatusLine() if (ansi_enabled() if progress is None else progress) else None
+        total_rows = exported_rows = 0
+        if status:
+            with self._reader() as connection:
+                for table in tables:
+                    query = f"SELECT count(*) FROM {_quote_identifier(table)}"
+                    total_rows += connection.execute(query).fetchone()[0]
+        results, failed = {}, []
+
+        def show_progress(new_rows=0):
+            nonlocal exported_rows
+            exported_rows += new_rows
+            if status:
+                status.update(
+                    f"Exporting {len(tables)} tables "
+                    f"{progress_bar(exported_rows, max(total_rows, exported_rows, 1))} "
+                    f"{len(results) + len(failed)}/{len(tables)} done"
+                )
+
+        def finished(table_name, export):
+            try:
+                results[table_name] = export()
+            except (sqlite3.Error, OSError, ValueError) as error:
+                failed.append(table_name)
+                self._error(f"ERROR: Failed to export '{table_name}': {error}")
+            show_progress()
+
+        try:
+            if self.memory or workers == 1 or len(tables) == 1:
+                for table_name in tables:
+                    reported = 0
+
+                    def table_progress(current, total):
+                        nonlocal reported
+                        show_progress(current - reported)
+                        reported = current
+
+                    def export(table_name=table_name):
+                        with self._reader() as connection:
+                            return export_table(
+                                connection,
+                                table_name,
+                                paths[table_name],
+                                file_format,
+                                self.fetch_size,
+                                table_progress if status else None,
+                            )
+
+                    finished(table_name, export)
+            else:
+                with contextlib.ExitStack() as stack:
+                    updates = None
+                    if status:
+                        updates = stack.enter_context(multiprocessing.Manager()).Queue()
+                    executor = stack.enter_context(
+                        concurrent.futures.ProcessPoolExecutor(min(workers, len(tables)))
+                    )
+                    futures = {
+                        executor.submit(
+                            _export_worker,
+                            self.db_file,
+                            table_name,
+                            paths[table_name],
+                            file_format,
+                            self.fetch_size,
+                            updates,
+                        ): table_name
+                        for table_name in tables
+                    }
+                    pending = set(futures)
+                    while pending:
+                        done, pending = concurrent.futures.wait(pending, timeout=0.1)
+                        while updates is not None and not updates.empty():
+                            show_progress(updates.get()[1])
+                        for future in done:
+                            finished(futures[future], future.result)
+        finally:
+            if status:
+                status.finish()
+
+        results = {table: results[table] for table in tables if table in results}
+        for table, rows in results.items():
+            self._count_export(rows, paths[table])
+        empty = [table for table, rows in results.items() if not rows]
+        print(
+            f"SUCCESS: {len(results) - len(empty)} table(s) exported to '{directory}' "
+            f"in {file_format.upper()} format."
+        )
+        if empty:
+            print("WARNING: No data found in " + ", ".join(f"'{table}'" for table in empty) + ".")
+        return results
 
     def export_active(self, filename):
         if self.active_table is None:
-            print("No table selected. Use 'USE <table>' first.")
-            return
+            self._error("No table selected. Use 'USE <table>' first.")
+            return None
         _, extension = os.path.splitext(filename.lower())
-        formats = {".csv": "csv", ".json": "json", ".xml": "xml"}
-        file_format = formats.get(extension)
+        file_format = EXPORT_FORMATS.get(extension)
         if file_format is None:
-            print("Unknown file extension – please use .csv, .xml or .json.")
-            return
-        self.export(self.active_table, filename, file_format)
+            self._error("Unknown file extension – please use .csv, .json, .ndjson or .xml.")
+            return None
+        return self.export(self.active_table, filename, file_format)
+
+    def _import_rows(self, table_name, import_file, file_format, column_types):
+        """Return import column names and an iterator of converted row tuples."""
+
+        if file_format == "csv":
+            reader = csv.reader(import_file)
+            names = next(reader, None)
+            if not names:
+                raise ValueError("The CSV import file has no header row.")
+            names = [name.strip() for name in names]
+        else:
+            if file_format == "json":
+                records = _iter_json_array(import_file)
+            else:
+                records = _iter_ndjson(import_file)
+            first = next(records, None)
+            if first is None:
+                return [], iter(())
+            if not isinstance(first, dict) or not first:
+                raise ValueError("Every JSON import record must be a non-empty object.")
+            names = list(first)
+            records = itertools.chain((first,), records)
+
+        unknown = [name for name in names if name not in column_types]
+        if unknown:
+            raise ValueError(
+                f"Column(s) not found in '{table_name}': " + ", ".join(unknown)
+            )
+        if len(set(names)) != len(names):
+            raise ValueError("Import columns must not contain duplicates.")
+
+        if file_format == "csv":
+            converters = [
+                _text_converter(name, _column_affinity(column_types[name])) for name in names
+            ]
+
+            def csv_rows():
+                for line_number, row in enumerate(reader, 2):
+                    if len(row) != len(names):
+                        raise ValueError(
+                            f"Line {line_number} has {len(row)} value(s); expected {len(names)}."
+                        )
+                    yield tuple(convert(value) for convert, value in zip(converters, row))
+
+            return names, csv_rows()
+
+        known = set(names)
+
+        def json_rows():
+            for record in records:
+                if not isinstance(record, dict):
+                    raise ValueError("Every JSON import record must be an object.")
+                if not known.issuperset(record):
+                    extra = ", ".join(sorted(set(record) - known))
+                    raise ValueError(f"Unexpected field(s) in a JSON record: {extra}")
+                yield tuple(_json_value(name, record.get(name)) for name in names)
+
+        return names, json_rows()
+
+    def import_file(self, table_name, filename, file_format=None, fast=False, batch_size=None):
+        """Bulk-load CSV, JSON, or NDJSON rows into a table; return the row count.
+
+        Rows are streamed from the file, converted to the declared column types,
+        and inserted with ``executemany`` in one transaction. ``fast`` disables
+        synchronous writes and keeps the rollback journal in memory while loading.
+        """
+
+        batch_size = batch_size or IMPORT_BATCH_SIZE
+        if not os.path.exists(filename) and not os.path.isabs(filename):
+            exported_file = os.path.join(self.export_dir, filename)
+            if os.path.exists(exported_file):
+                filename = exported_file
+        if file_format is None:
+            file_format = IMPORT_FORMATS.get(os.path.splitext(filename.lower())[1])
+        if file_format not in ("csv", "json", "ndjson"):
+            self._error("Import error: please use a .csv, .json, .ndjson or .jsonl file.")
+            return None
+        if not self.table_exists(table_name):
+            self._error(f"Table '{table_name}' does not exist.")
+            return None
+
+        column_types = {column.name: column.type for column in self.catalog.columns(table_name)}
+        previous_pragmas = {}
+        imported = 0
+        fast_pragmas = [("synchronous", "OFF")]
+        if not self._explicit_transaction:
+            self._commit_connection()
+            fast_pragmas.append(("journal_mode", "MEMORY"))
+        try:
+            if fast:
+                for name, value in fast_pragmas:
+                    previous_pragmas[name] = self.conn.execute(f"PRAGMA {name}").fetchone()[0]
+                    self.conn.execute(f"PRAGMA {name} = {value}")
+            with open(filename, "r", newline="", encoding="utf-8") as import_file, self._savepoint(
+                "pydb_import"
+            ):
+                names, rows = self._import_rows(
+                    table_name, import_file, file_format, column_types
+                )
+                if names:
+                    query = (
+                        f"INSERT INTO {_quote_identifier(table_name)} "
+                        f"({', '.join(_quote_identifier(name) for name in names)}) "
+                        f"VALUES ({', '.join('?' for _ in names)})"
+                    )
+                    self._debug(query)
+                    while True:
+                        batch = list(itertools.islice(rows, batch_size))
+                        if not batch:
+                            break
+                        self.cursor.executemany(query, batch)
+                        imported += len(batch)
+            self._commit()
+        except (OSError, ValueError, UnicodeDecodeError, csv.Error, sqlite3.Error) as error:
+            self._error(f"Import error: {error}")
+            return None
+        finally:
+            for name, value in previous_pragmas.items():
+                self.conn.execute(f"PRAGMA {name} = {value}")
+
+        self._stats["rows_written"] += imported
+        print(f"{imported} record(s) imported into '{table_name}'.")
+        return imported
+
+    def cmd_import(self, arguments):
+        """Run IMPORT <file> [FAST] against the active table."""
+
+        if self.active_table is None:
+            self._error("No table selected. Use 'USE <table>' first.")
+            return None
+        parameters = (arguments or "").split()
+        fast = len(parameters) > 1 and parameters[-1].upper() == "FAST"
+        if fast:
+            parameters.pop()
+        if len(parameters) != 1:
+            self._error("Usage: IMPORT <file>.csv|json|ndjson [FAST]")
+            return None
+        return self.import_file(self.active_table, parameters[0], fast=fast)
+
+    def run_script(self, filename, batch_size=None):
+        """Execute a .dbs script; return False when it stopped on an error.
+
+        With ``batch_size`` (or the ``script_batch`` default) the script runs in
+        explicit transactions committed every ``batch_size`` commands. Each command
+        runs in its own savepoint; a failing command stops the script and rolls
+        back the uncommitted part of the current batch.
+        """
 
-    def run_script(self, filename):
         if not filename.lower().endswith(".dbs"):
-            print("Error: Only .dbs script files are allowed.")
-            return
+            self._error("Error: Only .dbs script files are allowed.")
+            return False
         if not os.path.exists(filename):
-            print(f"Error: File '{filename}' not found.")
-            return
+            self._error(f"Error: File '{filename}' not found.")
+            return False
+        batch_size = batch_size or self.script_batch
         try:
             with open(filename, "r", encoding="utf-8") as script_file:
-                for command in script_file:
-                    command = command.strip()
-                    if command:
-                        print(f"Executing: {command}")
-                        if not self.execute_dbase_command(command):
-                            break
+                commands = (command.strip() for command in script_file)
+                commands = (command for command in commands if command)
+                if batch_size and not self._explicit_transaction:
+                    return self._run_batched(commands, batch_size)
+                errors = self.error_count
+                for command in commands:
+                    print(f"Executing: {command}")
+                    if not self.execute_dbase_command(command):
+                        break
+                return self.error_count == errors
         except OSError as error:
-            print(f"Error executing file: {error}")
+            self._error(f"Error executing file: {error}")
+            return False
 
-    def select(self, condition=""):
-        """Compatibility helper for SELECT, which is an alias for LIST."""
+    def _run_batched(self, commands, batch_size):
+        self._commit_connection()
+        self.conn.execute("BEGIN")
+        self._explicit_transaction = self._script_transaction = True
+        self._transaction_thread = threading.get_ident()
+        committed = pending = 0
+        try:
+            for command in commands:
+                print(f"Executing: {command}")
+                errors = self.error_count
+                try:
+                    with self._savepoint("pydb_command"):
+                        keep_running = self.execute_dbase_command(command)
+                        if self.error_count != errors:
+                            raise _CommandFailed(command)
+                except _CommandFailed:
+                    self.conn.rollback()
+                    self._schema_changed()
+                    print(
+                        f"Script stopped: {pending} uncommitted command(s) rolled back, "
+                        f"{committed} committed."
+                    )
+                    return False
+                pending += 1
+                if not keep_running:
+                    break
+                if pending >= batch_size:
+                    self._commit_connection()
+                    self.conn.execute("BEGIN")
+                    committed += pending
+                    pending = 0
+            self._commit_connection()
+            return True
+        except BaseException:
+            self.conn.rollback()
+            self._schema_changed()
+            raise
+        finally:
+            self._explicit_transaction = self._script_transaction = False
+            self._transaction_thread = None
+
+    def select(self, condition="", stream=False):
+        """Compatibility helper for SELECT, which is an alias for LIST.
+
+        With ``stream`` the rows are returned as a lazy iterator and not printed.
+        """
 
+        if stream:
+            return self.iter_list(condition)
         return self.cmd_list(condition)
 
+    def _record_predicate(self, table_name, condition, order_by, params, seconds):
+        """Accumulate the time spent on one WHERE/FOR filter and ORDER BY column."""
+
+        if not condition and not order_by:
+            return
+        key = (table_name, condition, order_by)
+        entry = self._predicates.get(key)
+        if entry is None:
+            if len(self._predicates) >= PREDICATE_LOG_SIZE:
+                return
+            entry = self._predicates[key] = [0, 0.0, params]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def _suggested_index_keys(self, table_name, condition, order_by):
+        """Return index keys for equality columns, one range column, and ORDER BY."""
+
+        columns = self.catalog.column_names(table_name)
+        equality, ranges, keys = [], [], []
+        for column, operator, _ in (_split_comparisons(condition) if condition else None) or ():
+            if column in columns:
+                (equality if operator in ("=", "==") else ranges).append(column)
+        for column in equality + ranges[:1]:
+            if column not in keys:
+                keys.append(column)
+        # An index can serve ORDER BY only after equality columns, not after a range.
+        if order_by and not ranges and order_by[0] in columns and order_by[0] not in keys:
+            keys.append(order_by[0] + (" DESC" if order_by[1] == "DESC" else ""))
+        return keys
+
+    def advise(self, apply=False):
+        """Return recorded filters that scan a table, slowest first, with index advice.
+
+        Each suggestion is a dictionary with the table, filter, ORDER BY, call
+        count, cumulative seconds, query plan, and an ``INDEX ON`` command. With
+        ``apply`` the suggested indexes are created.
+        """
+
+        suggestions = []
+        for (table_name, condition, order_by), (count, seconds, params) in self._predicates.items():
+            if not self.table_exists(table_name):
+                continue
+            query = f"SELECT * FROM {_quote_identifier(table_name)}"
+            if condition:
+                query += f" WHERE {condition}"
+            if order_by:
+                query += f" ORDER BY {_quote_identifier(order_by[0])} {order_by[1]}"
+            try:
+                plan = [row[3] for row in self.conn.execute("EXPLAIN QUERY PLAN " + query, params)]
+            except sqlite3.Error:
+                continue
+            if not any(_FULL_SCAN_PATTERN.search(detail) for detail in plan):
+                continue
+            keys = self._suggested_index_keys(table_name, condition, order_by)
+            tag = "ix_" + "_".join([table_name] + [key.split()[0] for key in keys])
+            if keys and any(index.name == tag for index in self.catalog.indexes(table_name)):
+                continue
+            suggestions.append(
+                {
+                    "table": table_name,
+                    "condition": condition,
+                    "order_by": " ".join(order_by) if order_by else None,
+                    "count": count,
+                    "seconds": seconds,
+                    "plan": plan,
+                    "keys": keys,
+                    "command": f"INDEX ON {', '.join(keys)} TAG {tag}" if keys else None,
+                    "tag": tag if keys else None,
+                }
+            )
+        suggestions.sort(key=lambda suggestion: suggestion["seconds"], reverse=True)
+
+        if apply:
+            created = set()
+            for suggestion in suggestions:
+                tag = suggestion["tag"]
+                if tag is None or tag in created:
+                    continue
+                keys = ", ".join(
+                    " ".join([_quote_identifier(key.split()[0])] + key.split()[1:])
+                    for key in suggestion["keys"]
+                )
+                query = (
+                    f"CREATE INDEX IF NOT EXISTS {_quote_identifier(tag)} "
+                    f"ON {_quote_identifier(suggestion['table'])} ({keys})"
+                )
+                if self.execute(query) is not None:
+                    created.add(tag)
+                    print(f"Index tag '{tag}' created on '{suggestion['table']}'.")
+        return suggestions
+
+    def cmd_advise(self, arguments=""):
+        """Print index advice; ``APPLY`` creates the indexes, ``RESET`` clears statistics."""
+
+        option = (arguments or "").strip().upper()
+        if option not in ("", "APPLY", "RESET"):
+            self._error("Usage: ADVISE [APPLY|RESET]")
+            return None
+        if option == "RESET":
+            self._predicates.clear()
+            print("Index advisor statistics cleared.")
+            return []
+        suggestions = self.advise(apply=option == "APPLY")
+        if not suggestions:
+            print("No full-table scans recorded.")
+            return suggestions
+        self.term.y(f"{'Time (s)':>10} {'Calls':>7}  Table / filter / suggestion")
+        print("-" * 60)
+        for suggestion in suggestions:
+            described = suggestion["condition"] or ""
+            if suggestion["order_by"]:
+                described += f" ORDER BY {suggestion['order_by']}"
+            print(
+                f"{suggestion['seconds']:>10.4f} {suggestion['count']:>7}  "
+                f"{suggestion['table']}: {described.strip()}"
+            )
+            print(f"{'':>19}-> {suggestion['command'] or 'no simple index key found'}")
+        if option == "APPLY":
+            self._predicates.clear()
+        return suggestions
+
     def _show_help(self):
         self.term.y("-------------------")
         self.term.y("Available Commands:")
@@ -828,36 +3927,183 @@ class Db3:
             print(f"{self.term.style(keyword, fg='bright_yellow', bold=True)}{description}")
 
     def _execute_raw_sql(self, query):
+        if len(query) > 1 and query[0] == query[-1] == '"':
+            query = query[1:-1].strip()
         if not query:
-            print('Usage: SQL "<query>"')
+            self._error('Usage: SQL "<query>"')
             return
         self._debug(query)
         try:
-            self.cursor.execute(query)
+            with self._timed("execute"):
+                self.cursor.execute(query)
+            if _DDL_PATTERN.match(query):
+                self._schema_changed()
             if self.cursor.description:
                 column_names = [description[0] for description in self.cursor.description]
-                rows = self.cursor.fetchall()
-                self.term.y(" | ".join(column_names))
-                for row in rows:
-                    print(" | ".join(map(str, row)))
-            self.conn.commit()
+                writer = self._result_writer(column_names)
+                chunks = _fetch_chunks(self.cursor, self.fetch_size)
+                while True:
+                    with self._timed("fetch"):
+                        rows = next(chunks, None)
+                    if rows is None:
+                        break
+                    self._stats["rows_read"] += len(rows)
+                    with self._timed("render"):
+                        writer.write(rows)
+                with self._timed("render"):
+                    writer.close()
+            elif self.cursor.rowcount > 0:
+                self._stats["rows_written"] += self.cursor.rowcount
+            with self._timed("execute"):
+                self._commit()
         except sqlite3.Error as error:
-            print(f"SQL Error: {error}")
+            self._error(f"SQL Error: {error}")
+
+    def command_name(self, command):
+        """Return the full name of a command line's command, or ``None`` if unknown."""
+
+        command = command.strip()
+        return self.COMMANDS.get(_split_command(command)[1]) if command else None
+
+    def session(self):
+        """Return a view of this database for one client of a server.
+
+        The view shares the connections, caches, and counters, but has its own
+        active table, order, MODIF block, output stream and format, timing
+        switch, LIST page, and error count, so views can run commands from
+        different threads. Close the database, not its views.
+        """
+
+        view = copy.copy(self)
+        view.error_count = 0
+        return view
 
     def execute_dbase_command(self, command):
         """Execute one interactive command; return False for EXIT."""
 
+        # With a reader pool, reads need neither the writer nor the autosave thread.
+        concurrent = self._readers is not None and self.command_name(command) in READ_ONLY_COMMANDS
+        with contextlib.nullcontext() if concurrent else self._lock:
+            writing = getattr(self._writing, "active", False)
+            self._writing.active = writing or not concurrent
+            outer_timings, outer_sql = self._timings, self._command_sql
+            self._timings = dict.fromkeys(TIMING_PHASES, 0.0)
+            self._command_sql = [] if self._slow_log is not None else None
+            timing = self.timing
+            started = time.perf_counter()
+            try:
+                return self._dispatch_command(command)
+            finally:
+                self._writing.active = writing
+                total = time.perf_counter() - started
+                timings, statements = self._timings, self._command_sql
+                self._timings, self._command_sql = outer_timings, outer_sql
+                if outer_timings is None:
+                    sqlite_seconds = timings["execute"] + timings["fetch"]
+                    self._stats["sqlite_seconds"] += sqlite_seconds
+                    self._stats["python_seconds"] += total - sqlite_seconds
+                else:
+                    # A command run by RUN also counts towards the RUN command.
+                    for phase, seconds in timings.items():
+                        outer_timings[phase] += seconds
+                if timing and self.timing:
+                    self._report_timing(timings, total)
+                if self._slow_log is not None and total >= self.slow_threshold:
+                    self._log_slow_command(command, total, statements)
+
+    def _log_slow_command(self, command, seconds, statements):
+        """Append a slow command with its SQL and EXPLAIN QUERY PLAN to the slow log."""
+
+        lines = [f"{seconds * 1000:.1f} ms [{self.active_table or '-'}] {command.strip()}"]
+        for query, params in statements:
+            lines.append(f"  SQL: {query}" + (f" {params!r}" if params else ""))
+            if not _PLANNABLE_PATTERN.match(query):
+                continue
+            try:
+                plan = self.conn.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()
+            except sqlite3.Error as error:
+                lines.append(f"  PLAN: unavailable ({error})")
+            else:
+                lines.extend(f"  PLAN: {row[3]}" for row in plan)
+        self._stats["slow_commands"] += 1
+        self._slow_log.warning("\n".join(lines))
+
+    def stats(self):
+        """Return counters accumulated since the object was created or STATS RESET.
+
+        ``commands`` counts dispatched commands by name. ``sqlite_seconds`` is
+        the time spent executing statements and fetching rows, and
+        ``python_seconds`` the rest of the commands' time (parsing, rendering).
+        """
+
+        result = {"commands": dict(self._command_counts)}
+        result.update((name, self._stats[name]) for name in STATS_COUNTERS)
+        result["errors"] = self.error_count
+        return result
+
+    def cmd_stats(self, arguments=""):
+        option = (arguments or "").strip().upper()
+        if option not in ("", "RESET"):
+            self._error("Usage: STATS [RESET]")
+            return None
+        if option == "RESET":
+            self._stats.clear()
+            self._command_counts.clear()
+            print("Statistics cleared.")
+            return {}
+        stats = self.stats()
+        self.term.y("Commands:")
+        for name, count in sorted(stats["commands"].items(), key=lambda item: -item[1]):
+            print(f"  {name:<12}{count:>10}")
+        self.term.y("Counters:")
+        for name in STATS_COUNTERS + ("errors",):
+            value = stats[name]
+            value = f"{value:.3f}" if name.endswith("_seconds") else f"{value:,}"
+            print(f"  {name:<16}{value:>14}")
+        return stats
+
+    def _report_timing(self, timings, total):
+        phases = " | ".join(
+            f"{phase} {timings[phase] * 1000:.3f} ms" for phase in TIMING_PHASES
+        )
+        print(f"Timing: {phases} | total {total * 1000:.3f} ms")
+
+    def cmd_profile(self, command):
+        """Run one command under cProfile and print its most expensive functions."""
+
+        command = (command or "").strip()
+        if not command:
+            self._error("Usage: PROFILE <command>")
+            return True
+        if self.command_name(command) in {"PROFILE", "EXIT"}:
+            self._error("PROFILE cannot run PROFILE or EXIT.")
+            return True
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        keep_running = profiler.runcall(self._dispatch_command, command)
+        elapsed = time.perf_counter() - started
+        print(f"Profile of '{command}' ({elapsed * 1000:.3f} ms):")
+        stats = pstats.Stats(profiler, stream=sys.stdout).strip_dirs()
+        stats.sort_stats("tottime", "cumulative").print_stats(PROFILE_LIMIT)
+        return keep_running
+
+    def _dispatch_command(self, command):
         command = command.strip()
         if not command:
             return True
-        words = command.split(" ", 1)
-        command_word = words[0].upper()
-        args = words[1].strip() if len(words) > 1 else ""
-        command_key = command_word[:4] if len(command_word) >= 4 else command_word[:3]
+        with self._timed("parse"):
+            command_word, command_key, args = _split_command(command)
+        try:
+            if self.catalog.validate():
+                self._statements.clear()
+        except sqlite3.Error as error:
+            self._error(f"SQL Error: {error}")
+            return True
         base_command = self.COMMANDS.get(command_key)
         if base_command is None:
-            print(f"Unknown command: {words[0]}")
+            self._error(f"Unknown command: {command_word}")
             return True
+        self._command_counts[base_command] += 1
 
         if base_command == "HELP":
             self._show_help()
@@ -870,42 +4116,76 @@ class Db3:
         elif base_command == "INSERT":
             self.cmd_insert(args)
         elif base_command in {"LIST", "SELECT"}:
-            self.cmd_list(args)
+            for _ in self.cmd_list(args, stream=True):
+                pass
         elif base_command in {"FIND", "LOCATE"}:
             self.cmd_find(args)
+        elif base_command in {"COUNT", "SUM", "AVERAGE"}:
+            self._aggregate(base_command, args)
+        elif base_command == "TOTAL":
+            self.cmd_total(args)
         elif base_command == "UPDATE":
             self.cmd_update(args)
         elif base_command == "REPLACE":
             self.cmd_replace(args)
         elif base_command == "DELETE":
-            self.cmd_delete(args)
+            tag_match = re.fullmatch(r"TAG\s+(\S+)", args, re.I)
+            if tag_match:
+                self.cmd_delete_tag(tag_match.group(1))
+            else:
+                self.cmd_delete(args)
+        elif base_command == "INDEX":
+            self.cmd_index(args)
+        elif base_command == "REINDEX":
+            self.cmd_reindex(args)
+        elif base_command == "SET":
+            self.cmd_set(args)
+        elif base_command == "ADVISE":
+            self.cmd_advise(args)
         elif base_command == "DROP":
             self.cmd_drop(args)
         elif base_command == "USE":
             self.cmd_use(args)
         elif base_command == "SHOW":
-            self.cmd_show()
+            self.cmd_show(self.output_format)
         elif base_command == "STRUCT":
             self.cmd_struct()
         elif base_command == "MODIF":
-            parameters = args.split()
-            if len(parameters) < 2:
-                print("Usage: MODIF ADD <column_name> <column_type>")
-            else:
-                self.modify_table(
-                    parameters[0],
-                    parameters[1],
-                    parameters[2] if len(parameters) > 2 else None,
-                )
+            self.cmd_modif(args)
         elif base_command == "EXPORT":
-            self.export_active(args)
+            all_match = re.fullmatch(
+                r"ALL\s+TO\s+(\S+)(?:\s+FORMAT\s+(\w+))?(?:\s+WORKERS\s+(\d+))?", args, re.I
+            )
+            if all_match:
+                directory, file_format, workers = all_match.groups()
+                self.export_all(directory, file_format or "csv", workers and int(workers))
+            else:
+                self.export_active(args)
+        elif base_command == "IMPORT":
+            self.cmd_import(args)
         elif base_command == "RUN":
-            if not args:
-                print("Filename is missing.")
+            batch_match = re.fullmatch(r"(.+?)\s+BATCH\s+(\S+)", args, re.I)
+            filename, batch = batch_match.groups() if batch_match else (args, None)
+            if not filename:
+                self._error("Filename is missing.")
+            elif batch is not None and not re.fullmatch(r"[1-9]\d*", batch):
+                self._error("Usage: RUN <file>.dbs [BATCH <count>]")
             else:
-                self.run_script(args)
+                self.run_script(filename, int(batch) if batch else None)
+        elif base_command == "BEGIN":
+            self.begin()
+        elif base_command == "COMMIT":
+            self.commit()
+        elif base_command == "ROLLBACK":
+            self.rollback()
         elif base_command == "SQL":
             self._execute_raw_sql(args)
+        elif base_command == "SAVE":
+            self.cmd_save()
+        elif base_command == "PROFILE":
+            return self.cmd_profile(args)
+        elif base_command == "STATS":
+            self.cmd_stats(args)
         elif base_command == "EXIT":
             print("Exiting emulator...")
             return False
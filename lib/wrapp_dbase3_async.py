@@ -0,0 +1,140 @@
+"""Asyncio facade for the dBASE-style SQLite wrapper."""
+
+import asyncio
+import concurrent.futures
+import functools
+import itertools
+import threading
+
+from .wrapp_dbase3 import Db3
+
+
+def _delegate(name):
+    async def method(self, *args, **kwargs):
+        return await self._call(getattr(self.database, name), *args, **kwargs)
+
+    method.__name__ = name
+    method.__qualname__ = f"AsyncDb3.{name}"
+    method.__doc__ = f"Awaitable ``Db3.{name}``."
+    return method
+
+
+class AsyncDb3:
+    """Run one ``Db3`` on a dedicated thread and expose awaitable commands.
+
+    The constructor takes the ``Db3`` arguments. The database is opened by
+    ``open`` or ``async with``, and every call then runs on the object's single
+    executor thread, so calls are serialized and never block the event loop.
+    Cancelling an awaiting task interrupts the running SQLite statement.
+
+        async with AsyncDb3("data/data.db", export_dir="export") as database:
+            await database.cmd_use("products")
+            async for row in database.iter_list("name WHERE price > 10"):
+                ...
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._args = args
+        self._kwargs = kwargs
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="pydb"
+        )
+        self.database = None
+
+    async def open(self):
+        """Create the ``Db3`` on the executor thread; return ``self``."""
+
+        if self.database is None:
+            loop = asyncio.get_running_loop()
+            self.database = await loop.run_in_executor(
+                self._executor, functools.partial(Db3, *self._args, **self._kwargs)
+            )
+        return self
+
+    async def close(self):
+        """Close the database and stop the executor thread."""
+
+        if self.database is not None:
+            await self._call(self.database.close)
+            self.database = None
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _call(self, function, *args, **kwargs):
+        if self.database is None:
+            raise RuntimeError("AsyncDb3 is not open; await open() first.")
+        # "queued" -> "running" -> "done", or "cancelled" before it started.
+        # Interrupting under the lock only ever hits this call's statements,
+        # never those of a call queued behind it.
+        lock = threading.Lock()
+        state = ["queued"]
+
+        def run():
+            with lock:
+                if state[0] == "cancelled":
+                    return None
+                state[0] = "running"
+            try:
+                return function(*args, **kwargs)
+            finally:
+                with lock:
+                    state[0] = "done"
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, run)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            with lock:
+                if state[0] == "running":
+                    self.database.interrupt()
+                elif state[0] == "queued":
+                    state[0] = "cancelled"
+            raise
+
+    def interrupt(self):
+        """Abort the running statement; callable from any thread."""
+
+        if self.database is not None:
+            self.database.interrupt()
+
+    async def iter_list(self, arguments="", display=False):
+        """Yield LIST rows asynchronously, fetching ``fetch_size`` rows per step."""
+
+        rows = await self._call(self.database.iter_list, arguments, display)
+        try:
+            while True:
+                chunk = await self._call(
+                    lambda: list(itertools.islice(rows, self.database.fetch_size))
+                )
+                if not chunk:
+                    break
+                for row in chunk:
+                    yield row
+        finally:
+            await self._call(rows.close)
+
+    def select(self, condition):
+        """Return an async iterator over LIST rows for ``condition``."""
+
+        return self.iter_list(condition)
+
+    execute_dbase_command = _delegate("execute_dbase_command")
+    execute = _delegate("execute")
+    cmd_use = _delegate("cmd_use")
+    cmd_list = _delegate("cmd_list")
+    cmd_find = _delegate("cmd_find")
+    cmd_show = _delegate("cmd_show")
+    cmd_struct = _delegate("cmd_struct")
+    export = _delegate("export")
+    export_all = _delegate("export_all")
+    import_file = _delegate("import_file")
+    run_script = _delegate("run_script")
+    migrate = _delegate("migrate")
+    advise = _delegate("advise")
+    save = _delegate("save")
@@ -0,0 +1,258 @@
+"""Serve dBASE-style commands of one ``Db3`` to local clients over a socket.
+
+The protocol is JSON lines. A client sends ``{"command": "LIST name"}``,
+optionally with ``"format"`` (``text``, ``json``, ``ndjson``, or ``csv``), and
+receives one object per request::
+
+    {"ok": true, "output": "<messages>", "result": "<rows>", "exit": false}
+
+``output`` holds the command's messages and ``result``, when present, the rows
+it returned in the requested format. ``ok`` is false when the command reported
+an error and ``exit`` is true after ``EXIT``, which ends only that client's
+session. A plain text line is accepted as a command too.
+"""
+
+import contextlib
+import io
+import ipaddress
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+from .wrapp_dbase3 import OUTPUT_FORMATS
+
+# Commands whose effect would leak between sessions sharing one connection.
+SESSION_UNSAFE_COMMANDS = {"BEGIN", "COMMIT", "ROLLBACK"}
+
+
+def parse_address(address):
+    """Return ``(family, target)`` for ``unix:PATH``, a socket path, or ``HOST:PORT``.
+
+    TCP addresses must use a loopback host such as ``127.0.0.1`` or
+    ``localhost``. Raises ``ValueError`` for anything else.
+    """
+
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[5:]
+    if os.sep in address or address.endswith(".sock"):
+        return socket.AF_UNIX, address
+    host, separator, port = address.rpartition(":")
+    if not separator or not port.isdigit() or not 0 < int(port) < 65536:
+        raise ValueError(f"Use unix:PATH or HOST:PORT for the address, not '{address}'.")
+    host = host.strip("[]") or "127.0.0.1"
+    if host != "localhost":
+        try:
+            loopback = ipaddress.ip_address(host).is_loopback
+        except ValueError:
+            loopback = False
+        if not loopback:
+            raise ValueError(f"Refusing to listen on non-loopback host '{host}'.")
+    return (socket.AF_INET6 if ":" in host else socket.AF_INET), (host, int(port))
+
+
+class _ThreadOutput(io.TextIOBase):
+    """Stand-in for ``sys.stdout`` sending each thread's writes to its own buffer.
+
+    Threads without a buffer, such as an autosave thread, write to ``stream``.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def capture(self, buffer):
+        """Send this thread's writes to ``buffer`` inside the block."""
+
+        previous = getattr(self._local, "buffer", None)
+        self._local.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            self._local.buffer = previous
+
+    def _target(self):
+        buffer = getattr(self._local, "buffer", None)
+        return self.stream if buffer is None else buffer
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def isatty(self):
+        return self._target().isatty()
+
+
+class CommandEngine:
+    """Run commands for many sessions on one ``Db3``.
+
+    Each session is a ``Db3.session()`` view with its own active table, index
+    order, MODIF block, and output format. Writes are run one at a time by the
+    database; when it has a reader pool, reads run alongside them. While the
+    engine is open, ``sys.stdout`` is replaced so every thread's messages go
+    to the response it is building.
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self._stdout = _ThreadOutput(sys.stdout)
+        sys.stdout = self._stdout
+
+    def close(self):
+        """Restore ``sys.stdout``."""
+
+        if sys.stdout is self._stdout:
+            sys.stdout = self._stdout.stream
+
+    def new_session(self):
+        return self.database.session()
+
+    def run(self, session, command, output_format=None):
+        """Execute ``command`` for ``session`` and return the response object."""
+
+        if output_format is not None and output_format not in OUTPUT_FORMATS:
+            return {
+                "ok": False,
+                "output": "Unknown format. Use one of: " + ", ".join(OUTPUT_FORMATS) + "\n",
+                "exit": False,
+            }
+        if session.command_name(command) in SESSION_UNSAFE_COMMANDS:
+            return {
+                "ok": False,
+                "output": "Transactions are not available in server mode.\n",
+                "exit": False,
+            }
+        messages, rows = io.StringIO(), io.StringIO()
+        session_format, session.output = session.output_format, rows
+        if output_format is not None:
+            session.output_format = output_format
+        errors = session.error_count
+        try:
+            with self._stdout.capture(messages):
+                keep_running = session.execute_dbase_command(command)
+            ok = session.error_count == errors
+        finally:
+            if output_format is not None:
+                session.output_format = session_format
+            session.output = None
+        response = {"ok": ok, "output": messages.getvalue(), "exit": not keep_running}
+        if rows.getvalue():
+            response["result"] = rows.getvalue()
+        return response
+
+
+class _SessionHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        engine = self.server.engine
+        session = engine.new_session()
+        for line in self.rfile:
+            text = line.decode("utf-8").strip()
+            if not text:
+                continue
+            output_format = None
+            if text.startswith("{"):
+                try:
+                    request = json.loads(text)
+                    command = request["command"]
+                    output_format = request.get("format")
+                    if not isinstance(command, str):
+                        raise TypeError("'command' must be a string")
+                except (ValueError, KeyError, TypeError) as error:
+                    self._reply({"ok": False, "output": f"Bad request: {error}\n", "exit": False})
+                    continue
+            else:
+                command = text
+            response = engine.run(session, command, output_format)
+            self._reply(response)
+            if response["exit"]:
+                break
+
+    def _reply(self, response):
+        self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+
+class _EngineServer:
+    daemon_threads = True
+
+    def server_close(self):
+        super().server_close()
+        engine = getattr(self, "engine", None)  # unset when binding failed
+        if engine is not None:
+            engine.close()
+
+
+class _TCPServer(_EngineServer, socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+
+
+class _IPv6TCPServer(_TCPServer):
+    address_family = socket.AF_INET6
+
+
+class _UnixServer(_EngineServer, socketserver.ThreadingUnixStreamServer):
+    pass
+
+
+def create_server(database, address):
+    """Bind a threaded server for ``address`` whose sessions share ``database``.
+
+    Open ``database`` with ``shared=True``, and with ``readers`` so reads do
+    not wait for other sessions' writes. A stale Unix socket file is replaced
+    and the new one is readable and writable by the owner only. Call
+    ``serve_forever`` to start it and ``server_close`` to release it.
+    """
+
+    family, target = parse_address(address)
+    if family == socket.AF_UNIX:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(target)
+        server = _UnixServer(target, _SessionHandler)
+        os.chmod(target, 0o600)
+    else:
+        server_class = _IPv6TCPServer if family == socket.AF_INET6 else _TCPServer
+        server = server_class(target, _SessionHandler)
+    server.engine = CommandEngine(database)
+    return server
+
+
+class Client:
+    """Send commands to a ``--serve`` process and return its responses."""
+
+    def __init__(self, address, timeout=None):
+        family, target = parse_address(address)
+        self._socket = socket.socket(family, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(target)
+        self._file = self._socket.makefile("rwb")
+
+    def execute(self, command, output_format=None):
+        """Run one command remotely and return the response object."""
+
+        request = {"command": command}
+        if output_format is not None:
+            request["format"] = output_format
+        self._file.write((json.dumps(request) + "\n").encode("utf-8"))
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("The server closed the connection.")
+        return json.loads(line)
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
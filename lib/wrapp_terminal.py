@@ -5,7 +5,7 @@ import re
 import shutil
 import sys
 from time import sleep
-from typing import Optional, TextIO
+from typing import Iterable, Optional, Sequence, TextIO
 
 
 __version__ = "0.23.11"
@@ -52,6 +52,8 @@ BACKGROUND_COLORS = {
 ANSI_ESCAPE_RE = re.compile(r"\x1b\[[0-?]*[ -/]*[@-~]")
 SPINNER_FRAMES = "|/-\\"
 TYPEWRITER_DELAY = 0.05
+TABLE_SAMPLE_ROWS = 200
+TABLE_SEPARATOR = " | "
 
 
 def _enable_windows_ansi(stream: TextIO) -> bool:
@@ -147,10 +149,20 @@ def color_text(text: object, color: str, *, enabled: Optional[bool] = None) -> s
 
 
 class Terminal:
-    """Print colored terminal text through short color methods."""
+    """Print colored terminal text through short color methods.
 
-    def __init__(self, file: Optional[TextIO] = None) -> None:
+    ``colors`` forces ANSI styling on or off; by default it is detected from
+    the output stream.
+    """
+
+    def __init__(self, file: Optional[TextIO] = None, colors: Optional[bool] = None) -> None:
         self._file = file
+        self._colors = colors
+
+    def _use_colors(self, output: TextIO) -> bool:
+        """Return whether styled output should be written to ``output``."""
+
+        return colors_enabled(output) if self._colors is None else self._colors
 
     def cls(self) -> None:
         """Clear the terminal screen on Windows, Linux, and macOS."""
@@ -168,7 +180,7 @@ class Terminal:
 
         output = self._file or sys.stdout
         text = sep.join(str(value) for value in values)
-        print(color_text(text, color, enabled=colors_enabled(output)), end=end, file=output)
+        print(color_text(text, color, enabled=self._use_colors(output)), end=end, file=output)
 
     def tw(self, color: str, text: object) -> None:
         """Print ``text`` one character at a time in the requested color.
@@ -178,7 +190,7 @@ class Terminal:
         """
 
         output = self._file or sys.stdout
-        use_colors = colors_enabled(output)
+        use_colors = self._use_colors(output)
         _resolve_color(color)
         for character in str(text):
             output.write(color_text(character, color, enabled=use_colors))
@@ -191,7 +203,7 @@ class Terminal:
         """Return one piece of text in color for use inside a longer line."""
 
         output = self._file or sys.stdout
-        return color_text(text, color, enabled=colors_enabled(output))
+        return color_text(text, color, enabled=self._use_colors(output))
 
     def style(
         self,
@@ -213,9 +225,15 @@ class Terminal:
             bold=bold,
             dim=dim,
             underline=underline,
-            enabled=colors_enabled(output),
+            enabled=self._use_colors(output),
         )
 
+    def table(self, columns: Sequence[str], stream: Optional[TextIO] = None) -> "TableRenderer":
+        """Return a ``TableRenderer`` that styles its header like this terminal."""
+
+        output = stream or self._file or sys.stdout
+        return TableRenderer(columns, output, colors=self._use_colors(output))
+
     def r(self, *values: object, **kwargs: object) -> None:
         """Print in red."""
 
@@ -319,6 +337,100 @@ def terminal_width(default: int = 80) -> int:
     return shutil.get_terminal_size(fallback=(default, 24)).columns
 
 
+def _fit_widths(widths: Sequence[int], limit: int) -> list:
+    """Cap the widest columns so a table row stays within ``limit`` characters."""
+
+    available = limit - len(TABLE_SEPARATOR) * (len(widths) - 1)
+    if sum(widths) <= available:
+        return list(widths)
+    # Find the largest cap that fits, letting narrow columns keep their width.
+    remaining = len(widths)
+    cap = 1
+    for width in sorted(widths):
+        fair = available // remaining
+        if width > fair:
+            cap = max(1, fair)
+            break
+        available -= width
+        remaining -= 1
+    return [min(width, cap) for width in widths]
+
+
+def _isatty(stream: TextIO) -> bool:
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+class TableRenderer:
+    """Write rows as an aligned ``a | b`` table in a few large writes.
+
+    Column widths are taken from the header and a sample of the first chunk
+    of rows; later, longer values widen their line instead of the column.
+    On a terminal each row is cut to ``terminal_width()``, with ``~`` marking
+    cut cells. The header is styled only when ``colors`` (by default, whether
+    ``stream`` is a terminal with colors enabled) allows it.
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        stream: Optional[TextIO] = None,
+        *,
+        colors: Optional[bool] = None,
+        width: Optional[int] = None,
+        sample: int = TABLE_SAMPLE_ROWS,
+    ) -> None:
+        self.stream = stream or sys.stdout
+        self.columns = [str(column) for column in columns]
+        self._colors = colors_enabled(self.stream) if colors is None else colors
+        if width is None and _isatty(self.stream):
+            width = terminal_width()
+        self.width = width
+        self._sample = max(1, sample)
+        self._widths: Optional[list] = None
+
+    def write(self, rows: Iterable[Sequence[object]]) -> None:
+        """Write one chunk of rows, starting with the header on the first call."""
+
+        rows = [["" if value is None else str(value) for value in row] for row in rows]
+        lines = []
+        if self._widths is None:
+            lines += self._start(rows)
+        lines += map(self._format, rows)
+        if lines:
+            self.stream.write("\n".join(lines) + "\n")
+
+    def close(self) -> None:
+        """Write the header of an empty table and flush the stream."""
+
+        if self._widths is None:
+            self.stream.write("\n".join(self._start([])) + "\n")
+        self.stream.flush()
+
+    def _start(self, rows: list) -> list:
+        widths = [len(column) for column in self.columns]
+        for row in rows[: self._sample]:
+            widths = [max(width, len(value)) for width, value in zip(widths, row)]
+        if self.width is not None:
+            widths = _fit_widths(widths, self.width)
+        self._widths = widths
+        header = self._format(self.columns)
+        if self._colors:
+            header = color_text(header, "y", enabled=True)
+        return [header, "-" * (sum(widths) + len(TABLE_SEPARATOR) * (len(widths) - 1))]
+
+    def _format(self, values: Sequence[str]) -> str:
+        if self.width is None:
+            return TABLE_SEPARATOR.join(map(str.ljust, values, self._widths)).rstrip()
+        cells = [
+            value if len(value) <= width else value[: width - 1] + "~"
+            for value, width in zip(values, self._widths)
+        ]
+        return TABLE_SEPARATOR.join(map(str.ljust, cells, self._widths)).rstrip()[: self.width]
+
+
 def progress_bar(
     current: int,
     total: int,
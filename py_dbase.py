@@ -5,17 +5,21 @@ import json
 import os
 import sqlite3
 import sys
+from contextlib import redirect_stdout
 
-from lib.wrapp_dbase3 import Db3, __version__
+from lib.wrapp_dbase3 import Db3, __version__, pragma_profile
+from lib.wrapp_dbase3_server import Client, create_server
 from lib.wrapp_terminal import Terminal
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_FILE = os.path.join(BASE_DIR, "py_dbase.json")
 TERM = Terminal()
+# Read-only connections that let --serve answer reads while another client writes.
+SERVE_READERS = 4
 
 
 def load_config():
-    """Load the data directory, database, and debug setting from py_dbase.json."""
+    """Load the data directory, database, debug, profile, slow-log, and cache settings."""
 
     with open(CONFIG_FILE, "r", encoding="utf-8") as config_file:
         config = json.load(config_file)
@@ -29,9 +33,44 @@ def load_config():
         raise ValueError("'default_database' must be a non-empty string")
     if not isinstance(debug, bool):
         raise ValueError("'debug' must be true or false")
+    pragma_profile(config.get("profile"))
+    slow_log = config.get("slow_log")
+    if slow_log is not None:
+        if not isinstance(slow_log, dict) or not isinstance(slow_log.get("path"), str):
+            raise ValueError("'slow_log' must be an object with a 'path' string")
+        threshold = slow_log.get("threshold_ms", 1000)
+        if isinstance(threshold, bool) or not isinstance(threshold, (int, float)) or threshold < 0:
+            raise ValueError("'slow_log.threshold_ms' must be a non-negative number")
+    cache = config.get("result_cache_mb", 0)
+    if isinstance(cache, bool) or not isinstance(cache, (int, float)) or cache < 0:
+        raise ValueError("'result_cache_mb' must be a non-negative number")
     return config
 
 
+def slow_log_options(config):
+    """Return the ``Db3`` slow-log arguments for the configuration's ``slow_log``."""
+
+    slow_log = config.get("slow_log")
+    if not slow_log:
+        return {}
+    return {
+        "slow_log": os.path.join(BASE_DIR, slow_log["path"]),
+        "slow_threshold": slow_log.get("threshold_ms", 1000) / 1000,
+    }
+
+
+def positive_integer(value):
+    """Parse a positive integer command-line value."""
+
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a positive integer")
+    return number
+
+
 def parse_arguments():
     parser = argparse.ArgumentParser(description="pyDb Emulator")
     parser.add_argument(
@@ -59,11 +98,34 @@ def parse_arguments():
         action="store_true",
         help="list tables in the selected database and exit",
     )
+    batch_group = parser.add_mutually_exclusive_group()
+    batch_group.add_argument(
+        "-e",
+        "--exec",
+        metavar="COMMAND",
+        action="append",
+        help="execute a dBASE command without the prompt and exit; may be repeated",
+    )
+    batch_group.add_argument(
+        "--script",
+        metavar="FILE.dbs",
+        help="execute a .dbs script without the prompt and exit",
+    )
+    batch_group.add_argument(
+        "--stdin",
+        action="store_true",
+        help="execute dBASE commands read line by line from standard input and exit",
+    )
+    parser.add_argument(
+        "--yes",
+        action="store_true",
+        help="answer yes to DROP confirmations in --exec/--script/--stdin/--serve mode",
+    )
     parser.add_argument(
         "--format",
-        choices=("text", "json"),
+        choices=("text", "json", "ndjson", "csv"),
         default="text",
-        help="output format for --list (default: text)",
+        help="output format for --list and command results (default: text)",
     )
     parser.add_argument(
         "--json",
@@ -72,6 +134,51 @@ def parse_arguments():
         dest="format",
         help="shorthand for --format json with --list",
     )
+    parser.add_argument(
+        "--batch",
+        metavar="COUNT",
+        type=positive_integer,
+        help="run RUN scripts in transactions committed every COUNT commands",
+    )
+    parser.add_argument(
+        "--export-all",
+        metavar="DIRECTORY",
+        help="export every table to DIRECTORY below export/ and exit",
+    )
+    parser.add_argument(
+        "--export-format",
+        choices=("csv", "json", "ndjson", "xml"),
+        default="csv",
+        help="file format for --export-all (default: csv)",
+    )
+    parser.add_argument(
+        "--workers",
+        metavar="COUNT",
+        type=positive_integer,
+        help="worker processes for --export-all (default: number of CPUs)",
+    )
+    server_group = parser.add_mutually_exclusive_group()
+    server_group.add_argument(
+        "--serve",
+        metavar="ADDRESS",
+        help="serve commands to clients on unix:PATH or 127.0.0.1:PORT until interrupted",
+    )
+    server_group.add_argument(
+        "--connect",
+        metavar="ADDRESS",
+        help="send commands to a --serve process instead of opening the database",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="work on an in-memory copy of the database, saved on SAVE and on exit",
+    )
+    parser.add_argument(
+        "--autosave",
+        metavar="SECONDS",
+        type=positive_integer,
+        help="with --memory, also save changes in the background every SECONDS",
+    )
     debug_group = parser.add_mutually_exclusive_group()
     debug_group.add_argument(
         "--debug",
@@ -84,10 +191,29 @@ def parse_arguments():
         help="suppress executed SQLite statements",
     )
     arguments = parser.parse_args()
-    if arguments.format != "text" and not arguments.list:
-        parser.error("--format/--json may only be used with --list")
-    if arguments.format == "json" and arguments.crea:
+    arguments.batch_mode = bool(arguments.exec or arguments.script or arguments.stdin)
+    if arguments.list and arguments.batch_mode:
+        parser.error("--list cannot be combined with --exec, --script, or --stdin")
+    if arguments.format != "text" and not (arguments.list or arguments.batch_mode):
+        parser.error("--format/--json may only be used with --list, --exec, --script, or --stdin")
+    if arguments.list and arguments.format not in ("text", "json"):
+        parser.error("--list supports only --format text or json")
+    if arguments.format == "json" and arguments.crea and not arguments.batch_mode:
         parser.error("--format json cannot be combined with --create")
+    if arguments.export_all and (arguments.list or arguments.batch_mode):
+        parser.error("--export-all cannot be combined with --list, --exec, --script, or --stdin")
+    if arguments.workers and not arguments.export_all:
+        parser.error("--workers requires --export-all")
+    if arguments.serve and (arguments.list or arguments.batch_mode or arguments.export_all):
+        parser.error("--serve cannot be combined with --list, --export-all, or batch options")
+    if arguments.connect and (
+        arguments.list or arguments.script or arguments.export_all or arguments.crea
+    ):
+        parser.error("--connect supports only the prompt, --exec, and --stdin")
+    if arguments.autosave and not arguments.memory:
+        parser.error("--autosave requires --memory")
+    if arguments.yes and not (arguments.batch_mode or arguments.serve):
+        parser.error("--yes may only be used with --exec, --script, --stdin, or --serve")
     return arguments
 
 
@@ -122,16 +248,110 @@ def create_table_from_definition(database, data_dir, filename):
     if not isinstance(columns, list) or not columns:
         raise ValueError("JSON definition must contain a non-empty 'columns' list.")
 
+    migrations = definition.get("migrations", [])
+    if not isinstance(migrations, list):
+        raise ValueError("JSON definition 'migrations' must be a list.")
+
     fallback_table_name = os.path.splitext(os.path.basename(filename))[0]
     table_name = definition.get("table", fallback_table_name)
     database.create_table_from_columns(table_name, columns)
+    if migrations:
+        database.migrate(table_name, migrations, skip_applied=True)
+
+
+def run_batch(database, data_dir, arguments):
+    """Run --exec, --script, or --stdin commands; return the process exit code.
+
+    Command messages go to standard error so standard output carries only
+    result rows in the selected format. Execution stops at the first failing
+    --exec/--stdin command.
+    """
+
+    with redirect_stdout(sys.stderr):
+        if arguments.crea:
+            create_table_from_definition(database, data_dir, arguments.crea)
+        if arguments.script:
+            database.run_script(arguments.script)
+        else:
+            commands = arguments.exec or (line.strip() for line in sys.stdin)
+            for command in commands:
+                errors = database.error_count
+                keep_running = database.execute_dbase_command(command)
+                if database.error_count != errors or not keep_running:
+                    break
+    return 1 if database.error_count else 0
+
+
+def serve_readers(arguments, config):
+    """Return the reader pool size for ``--serve``; 0 when the database cannot use WAL."""
+
+    if not arguments.serve or arguments.memory:
+        return 0
+    journal_mode = pragma_profile(config.get("profile")).get("journal_mode", "WAL")
+    return SERVE_READERS if journal_mode == "WAL" else 0
+
+
+def serve(database, address):
+    """Serve ``database`` on ``address`` until interrupted; return the exit code."""
+
+    server = create_server(database, address)
+    print(f"Serving '{database.db_file}' on {address}. Press Ctrl+C to stop.", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nServer stopped.", file=sys.stderr)
+    finally:
+        server.server_close()
+        if isinstance(server.server_address, str):
+            os.unlink(server.server_address)
+    return 0
+
+
+def run_client(arguments):
+    """Send prompt, --exec, or --stdin commands to a --serve process."""
+
+    try:
+        client = Client(arguments.connect)
+    except (OSError, ValueError) as error:
+        print(f"Connection error: {error}", file=sys.stderr)
+        return 2
+
+    failed = False
+    with client:
+        if arguments.batch_mode:
+            commands = arguments.exec or (line.strip() for line in sys.stdin)
+            output_format = arguments.format
+        else:
+            print(f"Connected to {arguments.connect}. Type 'EXIT' to quit.")
+            commands = iter(
+                lambda: input(TERM.style("pyDb> ", fg="bright_yellow", bold=True)).strip(), None
+            )
+            output_format = None
+        try:
+            for command in commands:
+                if not command:
+                    continue
+                response = client.execute(command, output_format)
+                print(response["output"], end="", file=sys.stderr if arguments.batch_mode else None)
+                print(response.get("result", ""), end="")
+                failed = failed or not response["ok"]
+                if response["exit"] or (arguments.batch_mode and not response["ok"]):
+                    break
+        except EOFError:
+            print()
+        except (OSError, ConnectionError) as error:
+            print(f"Connection error: {error}", file=sys.stderr)
+            return 2
+    return 1 if failed and arguments.batch_mode else 0
 
 
 def main():
     """Configure and run the interactive database wrapper."""
 
+    arguments = parse_arguments()
+    if arguments.connect:
+        return run_client(arguments)
     try:
-        arguments = parse_arguments()
         config = load_config()
         data_dir = os.path.abspath(os.path.join(BASE_DIR, config["data_path"]))
         os.makedirs(data_dir, exist_ok=True)
@@ -146,8 +366,26 @@ def main():
             db_file,
             export_dir=os.path.join(BASE_DIR, "export"),
             debug=True if arguments.debug else False if arguments.no_debug else config["debug"],
-            terminal=TERM,
+            terminal=Terminal(colors=False) if arguments.batch_mode or arguments.serve else TERM,
+            script_batch=arguments.batch,
+            output=sys.stdout,
+            output_format="text" if arguments.list else arguments.format,
+            confirm=(
+                (lambda prompt: arguments.yes)
+                if arguments.batch_mode or arguments.serve
+                else None
+            ),
+            profile=config.get("profile"),
+            memory=arguments.memory,
+            autosave=arguments.autosave,
+            shared=bool(arguments.serve),
+            readers=serve_readers(arguments, config),
+            result_cache=int(config.get("result_cache_mb", 0) * 2**20),
+            **slow_log_options(config),
         )
+        if arguments.batch_mode:
+            return run_batch(database, data_dir, arguments)
+
         if arguments.crea:
             create_table_from_definition(database, data_dir, arguments.crea)
 
@@ -155,6 +393,15 @@ def main():
             database.cmd_show(arguments.format)
             return 0
 
+        if arguments.serve:
+            return serve(database, arguments.serve)
+
+        if arguments.export_all:
+            exported = database.export_all(
+                arguments.export_all, arguments.export_format, arguments.workers
+            )
+            return 0 if exported is not None and not database.error_count else 1
+
         print("=" * 50)
         print(
             f"{TERM.style(f'pyDb Emulator v{__version__}', fg='bright_yellow', bold=True)}"
@@ -1,16 +1,24 @@
 """Behaviour checks for the dBASE-style query and command-line additions."""
 
+import asyncio
+import base64
 import io
 import json
 import os
+import sqlite3
 import sys
 import tempfile
+import threading
+import time
 import unittest
-from contextlib import redirect_stderr, redirect_stdout
+from contextlib import closing, redirect_stderr, redirect_stdout
 from unittest.mock import patch
 
 import py_dbase
-from lib.wrapp_dbase3 import Db3
+from bench.bench_dbase import compare_results, run_benchmarks
+from lib.wrapp_dbase3 import Db3, SchemaCatalog
+from lib.wrapp_dbase3_async import AsyncDb3
+from lib.wrapp_dbase3_server import Client, create_server, parse_address
 
 
 class Db3CommandTests(unittest.TestCase):
@@ -50,6 +58,121 @@ class Db3CommandTests(unittest.TestCase):
         self.assertEqual(page, [("Mouse",)])
         self.assertEqual(quoted_clause, [("LIMIT product",)])
 
+    def test_list_pages_seek_from_the_previous_page_key(self):
+        with redirect_stdout(io.StringIO()):
+            self.database.cmd_insert("(name, price, in_stock) VALUES ('Pad', 19.5, NULL)")
+            first = self.database.list_page("name ORDER BY price DESC PAGE 1 SIZE 2")
+            second = self.database.list_page(token=first.next)
+            third = self.database.list_page(token=second.next)
+            back = self.database.list_page(token=third.previous)
+            self.database.debug_mode = True
+            output = io.StringIO()
+            with redirect_stdout(output):
+                listed = self.database.cmd_list("name ORDER BY price DESC PAGE 3 SIZE 2")
+                following = self.database.cmd_list("NEXT")
+            by_stock = self.database.list_page("name ORDER BY in_stock PAGE 1 SIZE 1")
+            names = list(by_stock.rows)
+            while by_stock.next:
+                by_stock = self.database.list_page(token=by_stock.next)
+                names += by_stock.rows
+            self.assertIsNone(self.database.list_page(token="bm90IGEgdG9rZW4"))
+            errors = self.database.error_count
+            state = json.loads(base64.urlsafe_b64decode(first.next))
+            for key in ([1], [49.9, 2, 3], "49.9", [49.9, "2"]):
+                damaged = base64.urlsafe_b64encode(json.dumps(dict(state, last=key)).encode())
+                self.assertIsNone(self.database.list_page(token=damaged.decode()))
+            self.assertEqual(self.database.error_count, errors + 4)
+
+        self.assertEqual(first.rows, [("LIMIT product",), ("Keyboard",)])
+        self.assertIsNone(first.previous)
+        self.assertEqual(second.rows, [("Pad",), ("Mouse",)])
+        self.assertEqual((third.rows, third.page, third.next), ([("Cable",)], 3, None))
+        self.assertEqual(back, second)
+        self.assertEqual(listed, [("Cable",)])
+        self.assertEqual(following, [])
+        self.assertIn('"price" DESC, rowid DESC', output.getvalue())
+        self.assertNotIn("OFFSET", output.getvalue())
+        self.assertEqual(
+            names, [("Pad",), ("Cable",), ("Keyboard",), ("Mouse",), ("LIMIT product",)]
+        )
+
+    def test_list_pages_seek_on_a_one_column_set_order_index_only(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.database.cmd_use("products")
+            self.database.cmd_index("ON price TAG by_price")
+            self.database.cmd_index("ON in_stock, price TAG by_stock")
+            self.database.execute_dbase_command("SET ORDER TO by_price")
+            first = self.database.list_page("name PAGE 1 SIZE 2")
+            self.database.debug_mode = True
+            seeking = io.StringIO()
+            with redirect_stdout(seeking):
+                second = self.database.list_page(token=first.next)
+            self.database.execute_dbase_command("SET ORDER TO by_stock")
+            stock_first = self.database.list_page("name PAGE 1 SIZE 2")
+            offsetting = io.StringIO()
+            with redirect_stdout(offsetting):
+                stock_second = self.database.list_page(token=stock_first.next)
+
+        by_price = [("Cable",), ("Mouse",), ("Keyboard",), ("LIMIT product",)]
+        self.assertEqual(first.rows + second.rows, by_price)
+        self.assertIn('("price", rowid) > (?, ?)', seeking.getvalue())
+        self.assertNotIn("OFFSET", seeking.getvalue())
+        self.assertEqual(stock_first.rows + stock_second.rows, by_price)
+        self.assertIn("OFFSET 2", offsetting.getvalue())
+
+    def test_streaming_list_fetches_rows_lazily_in_chunks(self):
+        self.database.fetch_size = 1
+        with redirect_stdout(io.StringIO()):
+            self.database.cmd_use("products")
+        rows = self.database.select("name WHERE in_stock=1 ORDER BY price", stream=True)
+        self.assertNotIsInstance(rows, list)
+        self.assertEqual(next(rows), ("Mouse",))
+        self.assertEqual(list(rows), [("Keyboard",), ("LIMIT product",)])
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertTrue(self.database.execute_dbase_command("LIST name WHERE price > 40"))
+        self.assertIn("Keyboard", output.getvalue())
+        self.assertIn("LIMIT product", output.getvalue())
+
+    def test_repeated_commands_reuse_parsed_statements_until_schema_changes(self):
+        with (
+            patch.object(
+                Db3, "_parse_list_arguments", autospec=True,
+                side_effect=Db3._parse_list_arguments,
+            ) as parse,
+            redirect_stdout(io.StringIO()),
+        ):
+            for _ in range(3):
+                self.database.execute_dbase_command("LIST name WHERE price > 10")
+            self.assertEqual(parse.call_count, 1)
+            self.database.execute_dbase_command("MODIF ADD sku TEXT")
+            rows = self.database.cmd_list("WHERE price > 10")
+
+        self.assertEqual(parse.call_count, 2)
+        self.assertEqual(len(rows[0]), 5)
+
+    def test_schema_catalog_caches_metadata_and_detects_external_changes(self):
+        catalog = self.database.catalog
+        self.assertIsInstance(catalog, SchemaCatalog)
+        self.assertEqual(catalog.column_names("products"), ["id", "name", "price", "in_stock"])
+        self.assertTrue(catalog.columns("products")[0].primary_key)
+        generation = catalog.generation
+
+        other = Db3(self.database.db_file, export_dir=self.directory.name)
+        with redirect_stdout(io.StringIO()):
+            other.create("orders")
+        other.close()
+        self.assertFalse(catalog.has_table("orders"))
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.database.execute_dbase_command("SHOW")
+        self.assertIn("- orders", output.getvalue())
+        self.assertGreater(catalog.generation, generation)
+        self.assertEqual(catalog.tables(), ["orders", "products"])
+
     def test_find_and_locate_return_first_matching_record(self):
         with redirect_stdout(io.StringIO()):
             found = self.database.cmd_find("name='Mouse'")
@@ -58,6 +181,28 @@ class Db3CommandTests(unittest.TestCase):
         self.assertEqual(found, (2, "Mouse", 19.5, 1))
         self.assertEqual(located, (2, "Mouse", 19.5, 1))
 
+    def test_count_sum_average_and_total_aggregate_in_sqlite(self):
+        with redirect_stdout(io.StringIO()):
+            self.database.cmd_use("products")
+            count = self.database.cmd_count()
+            in_stock = self.database.cmd_count("FOR in_stock = 1")
+            sums = self.database.cmd_sum()
+            cheap = self.database.cmd_sum("price FOR name = 'Mouse'")
+            averages = self.database.cmd_average("price, in_stock WHERE price > 1000")
+            created = self.database.cmd_total("ON in_stock TO stock_totals FIELDS price")
+            self.database.cmd_use("stock_totals")
+            totals = self.database.cmd_list()
+            self.database.cmd_use("products")
+            self.assertIsNone(self.database.cmd_sum("missing"))
+            self.assertIsNone(self.database.cmd_total("ON in_stock TO stock_totals"))
+
+        self.assertEqual((count, in_stock), (4, 3))
+        self.assertEqual(sums, {"price": 173.4, "in_stock": 3})
+        self.assertEqual(cheap, {"price": 19.5})
+        self.assertEqual(averages, {"price": None, "in_stock": None})
+        self.assertEqual(created, 2)
+        self.assertEqual(totals, [(0, 5.0), (1, 168.4)])
+
     def test_update_and_replace_change_only_matching_rows(self):
         with redirect_stdout(io.StringIO()):
             self.assertTrue(self.database.cmd_update("SET price=17.9 WHERE name='Mouse'"))
@@ -71,6 +216,782 @@ class Db3CommandTests(unittest.TestCase):
         )
         self.assertEqual(rows, [(17.9, 0)])
 
+    def test_export_streams_every_format_in_small_batches(self):
+        self.database.fetch_size = 1
+        with redirect_stdout(io.StringIO()):
+            for extension in ("csv", "json", "ndjson", "xml"):
+                self.assertEqual(self.database.export_active(f"products.{extension}"), 4)
+
+        with open(os.path.join(self.directory.name, "products.json"), encoding="utf-8") as file:
+            self.assertEqual([item["name"] for item in json.load(file)][-1], "LIMIT product")
+        with open(os.path.join(self.directory.name, "products.ndjson"), encoding="utf-8") as file:
+            lines = [json.loads(line) for line in file]
+        self.assertEqual(lines[1], {"id": 2, "name": "Mouse", "price": 19.5, "in_stock": 1})
+        with open(os.path.join(self.directory.name, "products.xml"), encoding="utf-8") as file:
+            self.assertEqual(file.read().count("<row>"), 4)
+        self.assertFalse(
+            any(name.endswith(".part") for name in os.listdir(self.directory.name))
+        )
+
+    def test_import_loads_exported_files_with_type_conversion(self):
+        with redirect_stdout(io.StringIO()):
+            self.database.export_active("products.csv")
+            self.database.export_active("products.json")
+            self.database.create(
+                "copies", "(id INTEGER PRIMARY KEY, name TEXT, price REAL, in_stock INTEGER)"
+            )
+            self.assertEqual(self.database.execute_dbase_command("IMPORT products.csv FAST"), True)
+            self.database.execute("DELETE FROM copies")
+            imported = self.database.import_file("copies", "products.json", batch_size=3)
+
+        self.assertEqual(imported, 4)
+        self.assertEqual(
+            self.database.execute("SELECT * FROM copies ORDER BY id"),
+            self.database.execute("SELECT * FROM products ORDER BY id"),
+        )
+
+        path = os.path.join(self.directory.name, "broken.csv")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("name,price\nValid,1.5\nInvalid,cheap\n")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertIsNone(self.database.import_file("copies", path))
+        self.assertIn("'cheap' is not valid for REAL column 'price'", output.getvalue())
+        self.assertEqual(self.database.execute("SELECT COUNT(*) FROM copies"), [(4,)])
+
+    def test_csv_export_of_date_and_decimal_columns_imports_again(self):
+        with redirect_stdout(io.StringIO()):
+            self.database.create("ev", "(id INTEGER PRIMARY KEY, day DATE, amount DECIMAL)")
+            self.database.execute(
+                "INSERT INTO ev (day, amount) VALUES ('2024-01-05', 12), ('2024-02-29', 1.5), "
+                "(NULL, NULL)"
+            )
+            original = self.database.execute("SELECT * FROM ev ORDER BY id")
+            self.database.export_active("ev.csv")
+            self.database.execute("DELETE FROM ev")
+            imported = self.database.import_file("ev", "ev.csv")
+
+        self.assertEqual(imported, 3)
+        self.assertEqual(self.database.execute("SELECT * FROM ev ORDER BY id"), original)
+        self.assertEqual(
+            self.database.execute("SELECT typeof(day), typeof(amount) FROM ev WHERE id = 1"),
+            [("text", "integer")],
+        )
+
+    def test_batched_script_commits_batches_and_rolls_back_on_failure(self):
+        script_path = os.path.join(self.directory.name, "load.dbs")
+        with open(script_path, "w", encoding="utf-8") as script_file:
+            script_file.write(
+                "INSERT (name, price) VALUES ('A', 1)\n"
+                "INSERT (name, price) VALUES ('B', 2)\n"
+                "INSERT (name, price) VALUES ('C', 3)\n"
+                "INSERT (missing) VALUES (4)\n"
+            )
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(self.database.execute_dbase_command(f"RUN {script_path} BATCH 2"))
+        names = self.database.execute("SELECT name FROM products WHERE id > 4")
+        self.assertEqual(names, [("A",), ("B",)])
+        self.assertFalse(self.database.conn.in_transaction)
+
+    def test_explicit_transactions_commit_or_roll_back(self):
+        with redirect_stdout(io.StringIO()):
+            self.database.execute_dbase_command("BEGIN")
+            self.database.execute_dbase_command("DELETE WHERE price < 20")
+            self.assertTrue(self.database.conn.in_transaction)
+            self.database.execute_dbase_command("ROLLBACK")
+            self.database.execute_dbase_command("BEGIN")
+            self.database.execute_dbase_command("UPDATE SET price=1 WHERE name='Cable'")
+            self.database.execute_dbase_command("COMMIT")
+            self.assertFalse(self.database.commit())
+
+        self.assertEqual(self.database.execute("SELECT COUNT(*) FROM products"), [(4,)])
+        self.assertEqual(
+            self.database.execute("SELECT price FROM products WHERE name='Cable'"), [(1.0,)]
+        )
+
+    def test_literal_values_are_bound_as_parameters(self):
+        self.database.debug_mode = True
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.database.cmd_insert("(name, price) VALUES ('O''Brien', -2.5)")
+            self.database.cmd_update("SET price=3, in_stock=abs(price) > 1 WHERE name='O''Brien'")
+            self.database.cmd_replace("name WITH 'Reilly' FOR price = 3 AND in_stock = 1")
+            found = self.database.cmd_find("name = 'Reilly'")
+            self.database.cmd_delete("WHERE name LIKE 'Rei%'")
+
+        self.assertEqual(found, (5, "Reilly", 3, 1))
+        debug = output.getvalue()
+        self.assertIn("""VALUES (?, ?) ("O'Brien", -2.5)""", debug)
+        self.assertIn('SET "price" = ?, "in_stock" = abs(price) > 1 WHERE name = ?', debug)
+        self.assertIn('SET "name" = ? WHERE price = ? AND in_stock = ?', debug)
+        self.assertIn("WHERE name LIKE ? ('Rei%',)", debug)
+        self.assertEqual(self.database.execute("SELECT COUNT(*) FROM products"), [(4,)])
+
+    def test_index_tags_order_list_and_find_and_show_in_struct(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertTrue(self.database.cmd_index("ON price DESC TAG by_price"))
+            self.assertTrue(
+                self.database.execute_dbase_command("INDEX ON name, in_stock TAG by_name UNIQUE")
+            )
+            self.assertFalse(self.database.cmd_index("ON missing TAG broken"))
+            self.database.execute_dbase_command("SET ORDER TO by_price")
+            ordered = self.database.cmd_list("name")
+            found = self.database.cmd_find("FOR in_stock = 1")
+            self.database.cmd_struct()
+            self.assertTrue(self.database.cmd_reindex())
+            self.database.execute_dbase_command("DELETE TAG by_price")
+            natural = self.database.cmd_list("LIMIT 1")
+
+        self.assertEqual(
+            [name for (name,) in ordered], ["LIMIT product", "Keyboard", "Mouse", "Cable"]
+        )
+        self.assertEqual(found[1], "LIMIT product")
+        self.assertIn('by_name             YES       "name", "in_stock"', output.getvalue())
+        self.assertIn('"price" DESC (ORDER)', output.getvalue())
+        self.assertIsNone(self.database.order_tag)
+        self.assertEqual(natural[0][1], "Keyboard")
+        self.assertEqual(
+            [index.name for index in self.database.catalog.indexes("products")], ["by_name"]
+        )
+
+    def test_advise_ranks_full_scans_and_applies_suggested_indexes(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.database.cmd_list("name WHERE in_stock = 1 AND price > 5 ORDER BY name")
+            self.database.cmd_find("FOR name = 'Mouse'")
+            self.database.cmd_find("FOR name = 'Cable'")
+            self.database.execute_dbase_command("ADVISE")
+            suggestions = self.database.advise()
+            applied = self.database.advise(apply=True)
+            remaining = self.database.advise()
+
+        commands = sorted(suggestion["command"] for suggestion in suggestions)
+        self.assertEqual(
+            commands,
+            [
+                "INDEX ON in_stock, price TAG ix_products_in_stock_price",
+                "INDEX ON name TAG ix_products_name",
+            ],
+        )
+        find_advice = next(item for item in suggestions if item["condition"] == "name = ?")
+        self.assertEqual(find_advice["count"], 2)
+        self.assertIn("ix_products_name", output.getvalue())
+        self.assertEqual(len(applied), 2)
+        self.assertEqual(remaining, [])
+        self.assertEqual(
+            sorted(index.name for index in self.database.catalog.indexes("products")),
+            ["ix_products_in_stock_price", "ix_products_name"],
+        )
+
+    def test_modif_drop_keeps_rows_constraints_indexes_and_triggers(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.database.execute_sql_script(
+                "CREATE TABLE items (id INTEGER PRIMARY KEY, code TEXT UNIQUE, "
+                "qty INTEGER NOT NULL DEFAULT 1, note TEXT, "
+                "product_id INTEGER REFERENCES products(id));"
+                "CREATE INDEX items_by_qty ON items (qty);"
+                "CREATE TABLE audit (item_id INTEGER);"
+                "CREATE TRIGGER items_audit AFTER INSERT ON items "
+                "BEGIN INSERT INTO audit VALUES (new.id); END;"
+                "INSERT INTO items (id, code, qty, note, product_id) VALUES "
+                "(7, 'A', 2, 'x', 1), (9, 'B', 3, 'y', 2);"
+            )
+            self.database.cmd_use("items")
+            self.database.execute_dbase_command("MODIF DROP note")
+            self.database.modify_table("DROP", "code", progress=False)
+            self.database.cmd_insert("(qty) VALUES (5)")
+
+        self.assertNotIn("SQL Error", output.getvalue())
+        self.assertEqual(self.database.catalog.column_names("items"), ["id", "qty", "product_id"])
+        self.assertEqual(
+            self.database.conn.execute("SELECT * FROM items ORDER BY id").fetchall(),
+            [(7, 2, 1), (9, 3, 2), (10, 5, None)],
+        )
+        self.assertEqual(
+            [index.name for index in self.database.catalog.indexes("items")], ["items_by_qty"]
+        )
+        self.assertIn("DEFAULT 1", self.database.catalog.table_sql("items"))
+        self.assertIn("REFERENCES products", self.database.catalog.table_sql("items"))
+        self.assertEqual(
+            self.database.conn.execute("SELECT * FROM audit").fetchall(), [(7,), (9,), (10,)]
+        )
+
+    def test_modif_rename_keeps_string_literals_and_object_names(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.database.execute_sql_script(
+                "CREATE TABLE stock (id INTEGER PRIMARY KEY, qty INTEGER, status TEXT, "
+                "CONSTRAINT qty CHECK (status <> 'qty'));"
+                "CREATE INDEX qty ON stock (qty);"
+                "INSERT INTO stock VALUES (1, 4, 'open');"
+            )
+            self.database.cmd_use("stock")
+            for command in (
+                "MODIF BEGIN",
+                "MODIF RENAME qty TO amount",
+                "MODIF ALTER status TYPE VARCHAR",
+                "MODIF APPLY",
+            ):
+                self.database.execute_dbase_command(command)
+
+        self.assertNotIn("SQL Error", output.getvalue())
+
+        table_sql = self.database.catalog.table_sql("stock")
+        self.assertIn("CONSTRAINT qty CHECK (status <> 'qty')", table_sql)
+        self.assertEqual(
+            [(index.name, index.columns) for index in self.database.catalog.indexes("stock")],
+            [("qty", ["amount"])],
+        )
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.database.conn.execute("INSERT INTO stock VALUES (2, 1, 'qty')")
+
+    def test_rebuild_is_refused_inside_a_transaction_and_keeps_child_rows(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.database.execute_sql_script(
+                "CREATE TABLE parent (id INTEGER PRIMARY KEY, name TEXT UNIQUE, extra TEXT);"
+                "CREATE TABLE child (id INTEGER PRIMARY KEY, "
+                "parent_id INTEGER REFERENCES parent(id) ON DELETE CASCADE);"
+                "INSERT INTO parent VALUES (1, 'a', '1');"
+                "INSERT INTO child VALUES (10, 1);"
+            )
+            self.database.cmd_use("parent")
+            for command in ("BEGIN", "MODIF ALTER extra TYPE INTEGER", "COMMIT"):
+                self.database.execute_dbase_command(command)
+            script = os.path.join(self.directory.name, "rebuild.dbs")
+            with open(script, "w", encoding="utf-8") as script_file:
+                script_file.write("USE parent\nMODIF DROP name\n")
+            self.database.run_script(script, 10)
+            refused_columns = self.database.catalog.column_names("parent")
+            self.database.execute_dbase_command("MODIF ALTER extra TYPE INTEGER")
+
+        self.assertEqual(output.getvalue().count("not possible inside an open transaction"), 2)
+        self.assertEqual(refused_columns, ["id", "name", "extra"])
+        self.assertEqual(self.database.catalog.columns("parent")[2].type, "INTEGER")
+        self.assertEqual(self.database.conn.execute("SELECT * FROM child").fetchall(), [(10, 1)])
+
+    def test_modif_block_applies_several_changes_with_one_rebuild(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.database.cmd_index("ON price TAG by_price")
+            self.database.cmd_index("ON in_stock TAG by_stock")
+            for command in (
+                "MODIF BEGIN",
+                "MODIF ADD sku TEXT DEFAULT 'n/a'",
+                "MODIF RENAME price TO unit_price",
+                "MODIF ALTER unit_price TYPE TEXT",
+                "MODIF DROP in_stock",
+            ):
+                self.database.execute_dbase_command(command)
+            queued = self.database.catalog.column_names("products")
+            with patch.object(
+                Db3, "_rebuild_table", autospec=True, side_effect=Db3._rebuild_table
+            ) as rebuild:
+                self.database.execute_dbase_command("MODIF APPLY")
+            self.database.execute_dbase_command("MODIF RENAME sku TO code")
+            self.database.execute_dbase_command("MODIF CANCEL")
+
+        self.assertEqual(rebuild.call_count, 1)
+        self.assertEqual(queued, ["id", "name", "price", "in_stock"])
+        columns = self.database.catalog.columns("products")
+        self.assertEqual(
+            [(column.name, column.type) for column in columns],
+            [("id", "INTEGER"), ("name", "TEXT"), ("unit_price", "TEXT"), ("code", "TEXT")],
+        )
+        self.assertEqual(
+            self.database.conn.execute("SELECT * FROM products WHERE id = 2").fetchone(),
+            (2, "Mouse", "19.5", "n/a"),
+        )
+        self.assertEqual(
+            [(index.name, index.columns) for index in self.database.catalog.indexes("products")],
+            [("by_price", ["unit_price"])],
+        )
+        self.assertIn("No MODIF block is open", output.getvalue())
+        self.assertEqual(self.database.error_count, 1)
+
+    def test_pragma_profiles_apply_at_connect_and_at_runtime(self):
+        path = os.path.join(self.directory.name, "tuned.db")
+        database = Db3(path, export_dir=self.directory.name, profile="fast")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(database.pragmas["journal_mode"], "wal")
+            self.assertEqual(database.pragmas["synchronous"], 1)
+            self.assertTrue(database.execute_dbase_command("SET PRAGMA cache_size TO -4000"))
+            database.execute_dbase_command("SET PROFILE safe")
+            database.execute_dbase_command("SET PRAGMA synchronous = sometimes")
+            database.execute_dbase_command("SET PROFILE turbo")
+            database.execute_dbase_command("SET PRAGMA")
+        database.close()
+
+        self.assertEqual(database.pragmas["journal_mode"], "delete")
+        self.assertEqual(database.pragmas["cache_size"], -2000)
+        self.assertIn("PRAGMA cache_size = -4000", output.getvalue())
+        self.assertIn("mmap_size", output.getvalue())
+        self.assertEqual(database.error_count, 2)
+        with self.assertRaisesRegex(ValueError, "Unsupported PRAGMA"):
+            Db3(path, export_dir=self.directory.name, profile={"locking_mode": "EXCLUSIVE"})
+
+    def test_timing_reports_phases_and_profile_shows_hot_spots(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.database.execute_dbase_command("USE products")
+            self.database.execute_dbase_command("SET TIMING ON")
+            self.database.execute_dbase_command("LIST name WHERE price > 10")
+            self.database.execute_dbase_command("SET TIMING OFF")
+            self.database.execute_dbase_command("FIND price < 10")
+            timed = output.getvalue()
+            output.seek(0)
+            output.truncate()
+            self.database.execute_dbase_command("PROFILE LIST WHERE in_stock = 1")
+            self.database.execute_dbase_command("PROFILE EXIT")
+
+        reports = [line for line in timed.splitlines() if line.startswith("Timing:")]
+        self.assertEqual(len(reports), 1)
+        self.assertRegex(
+            reports[0],
+            r"parse [\d.]+ ms \| execute [\d.]+ ms \| fetch [\d.]+ ms "
+            r"\| render [\d.]+ ms \| total [\d.]+ ms",
+        )
+        self.assertIn("Keyboard", output.getvalue())
+        self.assertIn("_build_list_query", output.getvalue())
+        self.assertIn("PROFILE cannot run", output.getvalue())
+
+    def test_stats_count_commands_rows_and_slow_commands_are_logged(self):
+        log_path = os.path.join(self.directory.name, "logs", "slow.log")
+        self.database.close()
+        self.database = Db3(
+            os.path.join(self.directory.name, "commands.db"),
+            export_dir=self.directory.name,
+            slow_log=log_path,
+            slow_threshold=0,
+        )
+        output = io.StringIO()
+        with redirect_stdout(output):
+            for command in (
+                "USE products",
+                "LIST name WHERE price > 10",
+                "FIND name = 'Cable'",
+                "REPLACE in_stock WITH 1 FOR price < 20",
+                "EXPORT products.csv",
+                "STATS",
+            ):
+                self.database.execute_dbase_command(command)
+        stats = self.database.stats()
+        self.database.close()
+        with open(log_path, encoding="utf-8") as log_file:
+            log = log_file.read()
+
+        self.assertEqual(stats["commands"]["LIST"], 1)
+        self.assertEqual(stats["commands"]["STATS"], 1)
+        self.assertEqual(stats["rows_read"], 3 + 1 + 4)
+        self.assertEqual(stats["rows_written"], 2)
+        self.assertEqual(stats["commits"], 1)
+        self.assertEqual(
+            stats["bytes_exported"],
+            os.path.getsize(os.path.join(self.directory.name, "products.csv")),
+        )
+        self.assertGreater(stats["sqlite_seconds"], 0)
+        self.assertIn("rows_written", output.getvalue())
+        self.assertIn("[products] FIND name = 'Cable'", log)
+        self.assertIn("SQL: SELECT \"id\", \"name\"", log)
+        self.assertIn("PLAN: SCAN products", log)
+
+    def test_result_cache_serves_repeats_until_the_data_changes(self):
+        path = os.path.join(self.directory.name, "commands.db")
+        self.database.close()
+        self.database = Db3(path, export_dir=self.directory.name, result_cache=2**20)
+        with redirect_stdout(io.StringIO()):
+            self.database.cmd_use("products")
+            first = self.database.cmd_list("name WHERE price > 10 ORDER BY price")
+            self.database.cmd_find("name = 'Cable'")
+            self.database.cmd_count("FOR in_stock = 1")
+            self.database.debug_mode = True
+            repeated = io.StringIO()
+            with redirect_stdout(repeated):
+                again = self.database.cmd_list("name WHERE price > 10 ORDER BY price")
+                self.database.cmd_find("name = 'Cable'")
+                counted = self.database.cmd_count("FOR in_stock = 1")
+            self.database.debug_mode = False
+            hits = self.database.stats()["cache_hits"]
+            self.database.execute_dbase_command("UPDATE SET price = 1 WHERE name = 'Mouse'")
+            after_update = self.database.cmd_list("name WHERE price > 10 ORDER BY price")
+            with sqlite3.connect(path) as other:
+                other.execute("UPDATE products SET price = 1 WHERE name = 'Keyboard'")
+            after_other = self.database.cmd_list("name WHERE price > 10 ORDER BY price")
+
+        self.assertEqual(first, again)
+        self.assertEqual(counted, 3)
+        self.assertEqual(hits, 3)
+        self.assertNotIn("SELECT", repeated.getvalue())
+        self.assertEqual(after_update, [("Keyboard",), ("LIMIT product",)])
+        self.assertEqual(after_other, [("LIMIT product",)])
+        self.assertEqual(self.database.stats()["cache_misses"], 5)
+
+    def test_result_cache_keys_include_parameter_types(self):
+        self.database.close()
+        self.database = Db3(
+            os.path.join(self.directory.name, "commands.db"),
+            export_dir=self.directory.name,
+            result_cache=2**20,
+        )
+        with redirect_stdout(io.StringIO()):
+            self.database.execute_sql_script(
+                "CREATE TABLE codes (id INTEGER PRIMARY KEY, code TEXT);"
+                "INSERT INTO codes (code) VALUES ('1'), ('1.0');"
+            )
+            self.database.cmd_use("codes")
+            integer = self.database.cmd_list("code WHERE code = 1")
+            real = self.database.cmd_list("code WHERE code = 1.0")
+
+        self.assertEqual(integer, [("1",)])
+        self.assertEqual(real, [("1.0",)])
+
+    def test_result_cache_ignores_reads_made_while_another_thread_writes(self):
+        path = os.path.join(self.directory.name, "commands.db")
+        self.database.close()
+        self.database = Db3(
+            path, export_dir=self.directory.name, readers=1, shared=True, result_cache=2**20
+        )
+        database = self.database
+        updated, commit = threading.Event(), threading.Event()
+
+        def write():
+            with database._lock:
+                database.conn.execute("UPDATE products SET price = 2 WHERE name = 'Cable'")
+                updated.set()
+                commit.wait(5)
+                database.conn.commit()
+
+        with redirect_stdout(io.StringIO()):
+            database.cmd_use("products")
+            writer = threading.Thread(target=write)
+            writer.start()
+            updated.wait(5)
+            during = database.cmd_list("price WHERE name = 'Cable'")
+            commit.set()
+            writer.join()
+            after = database.cmd_list("price WHERE name = 'Cable'")
+            found = database.cmd_find("name = 'Cable'")
+
+        self.assertEqual(during, [(5.0,)])
+        self.assertEqual(after, [(2.0,)])
+        self.assertEqual(found[2], 2.0)
+
+    def test_memory_mode_saves_on_save_on_close_and_by_autosave(self):
+        path = os.path.join(self.directory.name, "commands.db")
+        self.database.close()
+
+        def stored_names():
+            with closing(sqlite3.connect(path)) as connection:
+                return [name for (name,) in connection.execute("SELECT name FROM products")]
+
+        database = Db3(path, export_dir=self.directory.name, memory=True)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            database.execute_dbase_command("USE products")
+            database.execute_dbase_command("DELETE WHERE name = 'Cable'")
+            unsaved = stored_names()
+            database.execute_dbase_command("SAVE")
+            saved = stored_names()
+            database.execute_dbase_command("SAVE")
+            database.execute_dbase_command("BEGIN")
+            database.execute_dbase_command("DELETE WHERE name = 'Mouse'")
+            database.close()
+
+        self.assertEqual(len(unsaved), 4)
+        self.assertNotIn("Cable", saved)
+        self.assertIn("No changes to save.", output.getvalue())
+        self.assertIn("Mouse", stored_names())
+
+        database = Db3(path, export_dir=self.directory.name, memory=True, autosave=0.01)
+        with redirect_stdout(io.StringIO()):
+            database.execute_dbase_command("USE products")
+            database.execute_dbase_command("DELETE WHERE name = 'Mouse'")
+            for _ in range(200):
+                if "Mouse" not in stored_names():
+                    break
+                time.sleep(0.01)
+            autosaved = stored_names()
+            database.close()
+        self.assertEqual(autosaved, ["Keyboard", "LIMIT product"])
+        self.database = Db3(path, export_dir=self.directory.name)
+
+    def test_reader_pool_serves_concurrent_reads_while_writing(self):
+        path = os.path.join(self.directory.name, "commands.db")
+        self.database.close()
+        self.database = Db3(path, export_dir=self.directory.name, readers=2)
+        database = self.database
+        with redirect_stdout(io.StringIO()):
+            database.cmd_use("products")
+            stream = database.select("name ORDER BY id", stream=True)
+            first = next(stream)
+            database.execute_dbase_command("INSERT (name, price, in_stock) VALUES ('Pen', 1, 1)")
+            snapshot = [first] + list(stream)
+            database.execute_dbase_command("BEGIN")
+            database.execute_dbase_command("DELETE WHERE name = 'Pen'")
+            inside = database.cmd_find("name = 'Pen'")
+            database.execute_dbase_command("ROLLBACK")
+
+            results = []
+            threads = [
+                threading.Thread(target=lambda: results.append(len(database.select("name"))))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            database.execute_dbase_command("UPDATE SET price = 2 WHERE name = 'Pen'")
+            for thread in threads:
+                thread.join()
+            found = database.cmd_find("name = 'Pen'")
+
+        self.assertEqual(database.pragmas["journal_mode"], "wal")
+        self.assertEqual(len(snapshot), 4)
+        self.assertIsNone(inside)
+        self.assertEqual(results, [5] * 8)
+        self.assertEqual(found[2], 2)
+        self.assertEqual(database._readers.qsize(), 2)
+        with self.assertRaises(sqlite3.OperationalError):
+            with database._reader() as connection:
+                connection.execute("DELETE FROM products")
+        with self.assertRaisesRegex(ValueError, "WAL"):
+            Db3(path, export_dir=self.directory.name, readers=1, memory=True)
+
+    def test_pool_reads_never_see_another_threads_open_transaction(self):
+        path = os.path.join(self.directory.name, "commands.db")
+        self.database.close()
+        self.database = Db3(path, export_dir=self.directory.name, readers=1, shared=True)
+        database = self.database
+        found = []
+
+        def read():
+            found.append(database.cmd_find("name = 'Cable'"))
+
+        with redirect_stdout(io.StringIO()):
+            database.cmd_use("products")
+            database.execute_dbase_command("BEGIN")
+            database.execute_dbase_command("UPDATE SET price = 2 WHERE name = 'Cable'")
+            reader = threading.Thread(target=read)
+            reader.start()
+            reader.join()
+            inside = database.cmd_find("name = 'Cable'")
+            database.execute_dbase_command("ROLLBACK")
+
+        self.assertEqual(found[0][2], 5.0)
+        self.assertEqual(inside[2], 2.0)
+
+    def test_command_measurements_are_kept_per_thread(self):
+        path = os.path.join(self.directory.name, "commands.db")
+        self.database.close()
+        self.database = Db3(path, export_dir=self.directory.name, readers=1)
+        database = self.database
+        found = []
+        with redirect_stdout(io.StringIO()):
+            database.cmd_use("products")
+            database._timings = dict.fromkeys(("parse", "execute", "fetch", "render"), 0.0)
+            database._command_sql = []
+            thread = threading.Thread(
+                target=lambda: found.append(database.cmd_find("name = 'Cable'"))
+            )
+            thread.start()
+            thread.join()
+
+        self.assertEqual(found[0][1], "Cable")
+        self.assertEqual(set(database._timings.values()), {0.0})
+        self.assertEqual(database._command_sql, [])
+
+    def test_export_all_writes_every_table_with_worker_processes(self):
+        with redirect_stdout(io.StringIO()):
+            self.database.create("tags", "(name TEXT)")
+            self.database.create("notes")
+            self.database.execute_dbase_command("INSERT (data) VALUES ('first')")
+            self.database.execute_dbase_command("EXPORT ALL TO nightly FORMAT ndjson WORKERS 2")
+            exported = self.database.export_all("inline", "xml", workers=1, progress=False)
+
+        nightly = os.path.join(self.directory.name, "nightly")
+        self.assertEqual(sorted(os.listdir(nightly)), ["notes.ndjson", "products.ndjson"])
+        with open(os.path.join(nightly, "notes.ndjson"), encoding="utf-8") as export_file:
+            self.assertEqual(export_file.read(), '{"id": 1, "data": "first"}\n')
+        self.assertEqual(exported, {"notes": 1, "products": 4, "tags": 0})
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, "inline", "products.xml")))
+
+
+class AsyncDb3Tests(unittest.IsolatedAsyncioTestCase):
+    async def test_async_facade_streams_rows_and_interrupts_on_cancel(self):
+        with tempfile.TemporaryDirectory() as directory, redirect_stdout(io.StringIO()):
+            async with AsyncDb3(
+                os.path.join(directory, "async.db"), export_dir=directory, fetch_size=2
+            ) as database:
+                await database.execute_dbase_command("CREATE items (id INTEGER PRIMARY KEY, n)")
+                await database.execute("INSERT INTO items (n) VALUES (1), (2), (3)")
+                rows = [row async for row in database.iter_list("n ORDER BY n DESC")]
+                found = await database.cmd_find("n = 2")
+
+                slow = asyncio.create_task(
+                    database.execute(
+                        "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) "
+                        "SELECT count(*) FROM c"
+                    )
+                )
+                await asyncio.sleep(0.05)
+                slow.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await slow
+                after = await database.cmd_list("n LIMIT 1")
+                errors = database.database.error_count
+
+        self.assertEqual(rows, [(3,), (2,), (1,)])
+        self.assertEqual(found, (2, 2))
+        self.assertEqual(after, [(1,)])
+        self.assertEqual(errors, 1)
+
+
+    async def test_cancelling_a_queued_call_leaves_the_running_one_alone(self):
+        with tempfile.TemporaryDirectory() as directory, redirect_stdout(io.StringIO()):
+            async with AsyncDb3(os.path.join(directory, "async.db")) as database:
+                slow = asyncio.create_task(
+                    database.execute(
+                        "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c "
+                        "WHERE x < 2000000) SELECT count(*) FROM c"
+                    )
+                )
+                await asyncio.sleep(0.02)
+                queued = asyncio.create_task(database.cmd_show())
+                await asyncio.sleep(0.02)
+                queued.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await queued
+                result = await slow
+                errors = database.database.error_count
+
+        self.assertEqual(result, [(2000000,)])
+        self.assertEqual(errors, 0)
+
+class ServerTests(unittest.TestCase):
+    def test_sessions_share_one_engine_but_keep_their_own_state(self):
+        with tempfile.TemporaryDirectory() as directory:
+            database = Db3(
+                os.path.join(directory, "served.db"), export_dir=directory, shared=True
+            )
+            with redirect_stdout(io.StringIO()):
+                database.create("items", "(id INTEGER PRIMARY KEY, name TEXT)")
+                database.create("users", "(id INTEGER PRIMARY KEY, login TEXT)")
+                database.cmd_use("items")
+            address = "unix:" + os.path.join(directory, "pydb.sock")
+            server = create_server(database, address)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                with Client(address, timeout=5) as first, Client(address, timeout=5) as second:
+                    first.execute("USE items")
+                    second.execute("USE users")
+                    first.execute("INSERT (name) VALUES ('pen')")
+                    second.execute("INSERT (login) VALUES ('ada')")
+                    rows = first.execute("LIST", "json")
+                    missing = second.execute("LIST name")
+                    refused = second.execute("BEGIN")
+                    closed = second.execute("EXIT")
+                    still_open = first.execute("FIND name = 'pen'")
+            finally:
+                server.shutdown()
+                server.server_close()
+                database.close()
+
+        self.assertTrue(rows["ok"])
+        self.assertEqual(json.loads(rows["result"]), [{"id": 1, "name": "pen"}])
+        self.assertFalse(missing["ok"])
+        self.assertIn("name", missing["output"])
+        self.assertFalse(refused["ok"])
+        self.assertTrue(closed["exit"])
+        self.assertIn("pen", still_open["result"])
+        self.assertEqual(database.active_table, "items")
+
+    def test_reads_do_not_wait_for_writes_and_messages_stay_per_client(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "served.db")
+            database = Db3(path, export_dir=directory, shared=True, readers=2)
+            with redirect_stdout(io.StringIO()):
+                database.create("items", "(id INTEGER PRIMARY KEY, name TEXT)")
+                database.execute("INSERT INTO items (name) VALUES ('pen')")
+            address = "unix:" + os.path.join(directory, "pydb.sock")
+            finished, stop = {}, threading.Event()
+
+            def write():
+                with Client(address, timeout=30) as client:
+                    finished["write"] = client.execute(
+                        'SQL "INSERT INTO items (name) SELECT \'bulk\' FROM (WITH RECURSIVE '
+                        "c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 2000000) "
+                        'SELECT x FROM c)"'
+                    )
+                    finished["write_at"] = time.perf_counter()
+
+            def chatter():
+                while not stop.is_set():
+                    print("stray")
+                    time.sleep(0.001)
+
+            stray = io.StringIO()
+            with redirect_stdout(stray):
+                server = create_server(database, address)
+                threads = [
+                    threading.Thread(target=server.serve_forever, daemon=True),
+                    threading.Thread(target=chatter),
+                    threading.Thread(target=write),
+                ]
+                try:
+                    for thread in threads:
+                        thread.start()
+                    time.sleep(0.1)
+                    with Client(address, timeout=30) as reader:
+                        reader.execute("USE items")
+                        listed = reader.execute("LIST name", "json")
+                        read_at = time.perf_counter()
+                        counted = reader.execute("COUNT")
+                    threads[2].join()
+                finally:
+                    stop.set()
+                    threads[1].join()
+                    server.shutdown()
+                    server.server_close()
+                    database.close()
+                restored = sys.stdout is stray
+
+        self.assertTrue(restored)
+        self.assertLess(read_at, finished["write_at"])
+        self.assertEqual(json.loads(listed["result"]), [{"name": "pen"}])
+        self.assertTrue(finished["write"]["ok"])
+        self.assertNotIn("stray", listed["output"] + counted["output"])
+        self.assertNotIn("stray", finished["write"]["output"])
+        self.assertIn("stray", stray.getvalue())
+
+    def test_tcp_addresses_must_be_loopback(self):
+        self.assertEqual(parse_address("127.0.0.1:7000")[1], ("127.0.0.1", 7000))
+        self.assertEqual(parse_address("/tmp/pydb.sock")[1], "/tmp/pydb.sock")
+        with self.assertRaisesRegex(ValueError, "non-loopback"):
+            parse_address("0.0.0.0:7000")
+
+
+class BenchmarkTests(unittest.TestCase):
+    def test_benchmarks_report_every_command_and_flag_regressions(self):
+        report = run_benchmarks(300, operations=20)
+
+        benchmarks = report["benchmarks"]
+        self.assertGreater(benchmarks["run_script"]["rows_per_second"], 0)
+        for name in ("insert", "list_page", "find_key", "update", "replace"):
+            self.assertGreater(benchmarks[name]["rows_per_second"], 0)
+            self.assertLessEqual(
+                benchmarks[name]["latency_ms"]["p50"], benchmarks[name]["latency_ms"]["max"]
+            )
+        self.assertEqual(benchmarks["export_xml"]["rows"], 340)
+        self.assertEqual(benchmarks["modif_drop"]["rows"], 340)
+
+        slower = json.loads(json.dumps(report))
+        slower["benchmarks"]["find_key"]["rows_per_second"] /= 2
+        _, regressions = compare_results(report, slower, threshold=0.2)
+        self.assertEqual(regressions, ["find_key"])
+        self.assertEqual(compare_results(report, report)[1], [])
+
 
 class CommandLineTests(unittest.TestCase):
     def test_create_accepts_a_sql_schema_script(self):
@@ -158,6 +1079,85 @@ class CommandLineTests(unittest.TestCase):
             self.assertTrue(any(index[2] for index in indexes))
             database.close()
 
+    def test_json_schema_migrations_are_applied_once(self):
+        with tempfile.TemporaryDirectory() as directory:
+            database = Db3(os.path.join(directory, "schema.db"), export_dir=directory)
+            definition = {"table": "notes", "columns": [{"field": "uid"}, {"field": "body"}]}
+            definition_path = os.path.join(directory, "notes.json")
+            with redirect_stdout(io.StringIO()):
+                for migrations in (
+                    [],
+                    [
+                        {"action": "add", "field": "rank", "type": "INTEGER", "default": 0},
+                        {"action": "rename", "field": "body", "to": "text"},
+                    ],
+                ):
+                    with open(definition_path, "w", encoding="utf-8") as definition_file:
+                        json.dump(dict(definition, migrations=migrations), definition_file)
+                    for _ in range(2):
+                        py_dbase.create_table_from_definition(database, directory, "notes.json")
+
+            self.assertEqual(database.catalog.column_names("notes"), ["uid", "text", "rank"])
+            self.assertEqual(database.error_count, 0)
+            with open(definition_path, "w", encoding="utf-8") as definition_file:
+                json.dump(
+                    dict(definition, migrations=[{"action": "add", "field": "x;"}]),
+                    definition_file,
+                )
+            with self.assertRaisesRegex(ValueError, "identifiers"):
+                py_dbase.create_table_from_definition(database, directory, "notes.json")
+            database.close()
+
+    def test_config_profile_is_validated(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config_path = os.path.join(directory, "py_dbase.json")
+            with open(config_path, "w", encoding="utf-8") as config_file:
+                json.dump(
+                    {
+                        "data_path": directory,
+                        "default_database": "cli.db",
+                        "profile": {"preset": "fast", "mmap_size": "large"},
+                    },
+                    config_file,
+                )
+            errors = io.StringIO()
+            with (
+                patch.object(py_dbase, "CONFIG_FILE", config_path),
+                patch.object(sys, "argv", ["py_dbase.py", "--list"]),
+                redirect_stderr(errors),
+            ):
+                status = py_dbase.main()
+
+        self.assertEqual(status, 2)
+        self.assertIn("PRAGMA 'mmap_size' must be an integer", errors.getvalue())
+
+    def test_config_slow_log_records_slow_commands(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config_path = os.path.join(directory, "py_dbase.json")
+            log_path = os.path.join(directory, "slow.log")
+            with open(config_path, "w", encoding="utf-8") as config_file:
+                json.dump(
+                    {
+                        "data_path": directory,
+                        "default_database": "cli.db",
+                        "debug": False,
+                        "slow_log": {"path": log_path, "threshold_ms": 0},
+                    },
+                    config_file,
+                )
+            with (
+                patch.object(py_dbase, "CONFIG_FILE", config_path),
+                patch.object(sys, "argv", ["py_dbase.py", "--exec", "SHOW"]),
+                redirect_stdout(io.StringIO()),
+                redirect_stderr(io.StringIO()),
+            ):
+                status = py_dbase.main()
+            with open(log_path, encoding="utf-8") as log_file:
+                log = log_file.read()
+
+        self.assertEqual(status, 0)
+        self.assertIn("SHOW", log)
+
     def test_json_schema_rejects_unsafe_column_type(self):
         with tempfile.TemporaryDirectory() as directory:
             database = Db3(os.path.join(directory, "schema.db"), export_dir=directory)
@@ -197,6 +1197,90 @@ class CommandLineTests(unittest.TestCase):
         self.assertEqual(status, 0)
         self.assertEqual(json.loads(output.getvalue()), {"database": "cli.db", "tables": ["items"]})
 
+    def test_export_all_flag_exports_and_exits(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config_path = os.path.join(directory, "py_dbase.json")
+            with open(config_path, "w", encoding="utf-8") as config_file:
+                json.dump(
+                    {"data_path": directory, "default_database": "cli.db", "debug": False},
+                    config_file,
+                )
+            database = Db3(os.path.join(directory, "cli.db"), export_dir=directory)
+            with redirect_stdout(io.StringIO()):
+                database.create("items")
+                database.create("users")
+            database.close()
+
+            target = os.path.join(directory, "out")
+            output = io.StringIO()
+            with (
+                patch.object(py_dbase, "CONFIG_FILE", config_path),
+                patch.object(
+                    sys,
+                    "argv",
+                    [
+                        "py_dbase.py",
+                        "--export-all",
+                        target,
+                        "--export-format",
+                        "json",
+                        "--workers",
+                        "2",
+                    ],
+                ),
+                redirect_stdout(output),
+            ):
+                status = py_dbase.main()
+            created = os.path.isdir(target)
+
+        self.assertEqual(status, 0)
+        self.assertTrue(created)
+        self.assertIn("WARNING: No data found in 'items', 'users'.", output.getvalue())
+
+    def test_exec_and_stdin_modes_emit_machine_readable_rows(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config_path = os.path.join(directory, "py_dbase.json")
+            with open(config_path, "w", encoding="utf-8") as config_file:
+                json.dump(
+                    {"data_path": directory, "default_database": "cli.db", "debug": False},
+                    config_file,
+                )
+            output, messages = io.StringIO(), io.StringIO()
+            with (
+                patch.object(py_dbase, "CONFIG_FILE", config_path),
+                patch.object(
+                    sys,
+                    "argv",
+                    [
+                        "py_dbase.py",
+                        "--exec", "CREATE items (id INTEGER PRIMARY KEY, name TEXT)",
+                        "--exec", "INSERT (name) VALUES ('pen')",
+                        "--exec", "LIST name",
+                        "--format", "ndjson",
+                    ],
+                ),
+                redirect_stdout(output),
+                redirect_stderr(messages),
+            ):
+                status = py_dbase.main()
+            self.assertEqual(status, 0)
+            self.assertEqual(output.getvalue(), '{"name": "pen"}\n')
+            self.assertIn("Record inserted into 'items'.", messages.getvalue())
+
+            output = io.StringIO()
+            with (
+                patch.object(py_dbase, "CONFIG_FILE", config_path),
+                patch.object(sys, "argv", ["py_dbase.py", "--stdin", "--format", "csv"]),
+                patch.object(
+                    sys, "stdin", io.StringIO("USE items\nDROP items\nLIST\nUSE nope\nLIST\n")
+                ),
+                redirect_stdout(output),
+                redirect_stderr(io.StringIO()),
+            ):
+                status = py_dbase.main()
+        self.assertEqual(status, 1)
+        self.assertEqual(output.getvalue().splitlines(), ["id,name", "1,pen"])
+
     def test_configuration_error_returns_two(self):
         with tempfile.TemporaryDirectory() as directory:
             config_path = os.path.join(directory, "py_dbase.json")
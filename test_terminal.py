@@ -14,6 +14,7 @@ from lib.wrapp_terminal import (
     COLORS,
     RESET,
     StatusLine,
+    TableRenderer,
     Terminal,
     clear_line,
     color_text,
@@ -63,6 +64,15 @@ class TerminalTests(unittest.TestCase):
             f"\033[1;4;31;44mtest{RESET}",
         )
 
+    def test_terminal_colors_can_be_forced_off(self) -> None:
+        output = io.StringIO()
+        with patch("lib.wrapp_terminal.colors_enabled", return_value=True):
+            terminal = Terminal(output, colors=False)
+            terminal.y("plain")
+            self.assertEqual(terminal.style("text", fg="red", bold=True), "text")
+
+        self.assertEqual(output.getvalue(), "plain\n")
+
     def test_strip_ansi_removes_color_and_cursor_sequences(self) -> None:
         self.assertEqual(strip_ansi("\033[31mError\033[0m\033[2A"), "Error")
 
@@ -97,6 +107,33 @@ class TerminalTests(unittest.TestCase):
 
         self.assertEqual(output.getvalue(), "\r50 %\033[K")
 
+    def test_table_renderer_aligns_columns_without_ansi_off_a_terminal(self) -> None:
+        output = io.StringIO()
+        table = TableRenderer(["id", "name"], output)
+        table.write([(1, "Keyboard"), (20, None)])
+        table.write([(300, "Mouse")])
+        table.close()
+
+        self.assertEqual(
+            output.getvalue(),
+            "id | name\n-------------\n1  | Keyboard\n20 |\n300 | Mouse\n",
+        )
+
+    def test_table_renderer_truncates_to_width_and_styles_header(self) -> None:
+        output = io.StringIO()
+        table = TableRenderer(["id", "note"], output, colors=True, width=12)
+        table.write([(1, "a long note that does not fit")])
+        table.close()
+
+        self.assertEqual(
+            output.getvalue(),
+            f"{COLORS['bright_yellow']}id | note{RESET}\n------------\n1  | a long~\n",
+        )
+        with patch.object(output, "isatty", return_value=True), patch(
+            "lib.wrapp_terminal.terminal_width", return_value=9
+        ):
+            self.assertEqual(TableRenderer(["id"], output).width, 9)
+
     def test_cursor_helpers_emit_expected_control_sequences(self) -> None:
         output = io.StringIO()
         with patch("lib.wrapp_terminal.ansi_enabled", return_value=True):